@@ -1,15 +1,110 @@
 from __future__ import annotations
 
 import asyncio
+import html
 import logging
+import re
+import time
+from urllib.parse import urljoin, urlparse
 
 import httpx
 
+from app.clock import get_clock
 from app.config import Config
+from app.conn_warmer import client_options
+from app.cookie_bridge import cookie_bridge
+from app.event_urls import event_urls
 from app.models import GrabTask
 
 logger = logging.getLogger(__name__)
 
+# Everything the cart extraction needs from the event page, as one pattern
+# scanned over the body while it streams in. Each branch is bounded so no
+# match can be longer than _CartScanner.MAX_TOKEN.
+_CART_TOKENS = re.compile(
+    r'<form\b[^>]{0,400}?\baction="(?P<form_action>[^"]{0,500})"'
+    r'|(?P<form_end></form\s*>)'
+    r'|<input\b(?P<input>[^>]{0,500})>'
+    r'|<meta\b(?P<meta>[^>]{0,250}?csrf[^>]{0,250})>'
+    r'|\bhref="(?P<href>[^"]{0,500}?(?:addToCart|add-to-cart)[^"]{0,500})"'
+    r'|"(?P<url>https?://[^"\s]{0,500}?(?:cart|warenkorb|basket|checkout)[^"\s]{0,500})"',
+    re.IGNORECASE,
+)
+_ATTR = re.compile(r'([\w:-]+)\s*=\s*"([^"]*)"')
+_CART_WORDS = re.compile(r"cart|warenkorb|basket", re.IGNORECASE)
+_CSRF_NAME = re.compile(r"csrf|xsrf|authenticity_token|requestverificationtoken", re.IGNORECASE)
+
+
+class _CartScanner:
+    """Incremental scan of an event page for the cart endpoint and what to POST to it.
+
+    Feed decoded chunks as they arrive; ``feed`` returns True once the scan
+    is complete: at an add-to-cart link or absolute cart/checkout URL, or at
+    the end of a cart form (so its hidden fields are collected). CSRF tokens
+    (hidden inputs or ``<meta name="csrf-token">``) are picked up on the way.
+    """
+
+    MAX_TOKEN = 2048  # chars kept between chunks; longer than any _CART_TOKENS match
+
+    def __init__(self) -> None:
+        self.status = 0
+        self.url = ""
+        self.endpoint: str | None = None
+        self.kind: str | None = None  # "form_action" / "href" / "url"
+        self.fields: dict[str, str] = {}  # hidden inputs of the cart form
+        self.csrf_fields: dict[str, str] = {}  # CSRF hidden inputs outside it
+        self.csrf_header: str | None = None  # token from a csrf <meta> tag
+        self.scanned = 0  # chars of body read
+        self.done = False
+        self._buf = ""
+        self._in_cart_form = False
+
+    def feed(self, text: str, final: bool = False) -> bool:
+        buf = self._buf + text
+        self.scanned += len(text)
+        # Matches ending in the last MAX_TOKEN chars may still be cut off
+        limit = len(buf) if final else len(buf) - self.MAX_TOKEN
+        keep = max(limit, 0)
+        for match in _CART_TOKENS.finditer(buf):
+            if match.end() > limit:
+                keep = match.start()
+                break
+            self._handle(match)
+            if self.done:
+                break
+        self._buf = "" if self.done else buf[keep:]
+        if final:
+            self.done = True
+        return self.done
+
+    def _handle(self, match: re.Match) -> None:
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "form_action":
+            self._in_cart_form = self.endpoint is None and bool(_CART_WORDS.search(value))
+            if self._in_cart_form:
+                self.endpoint, self.kind = html.unescape(value), kind
+        elif kind == "form_end":
+            if self._in_cart_form:
+                self.done = True
+            self._in_cart_form = False
+        elif kind in ("input", "meta"):
+            attrs = {k.lower(): html.unescape(v) for k, v in _ATTR.findall(value)}
+            if kind == "meta":
+                if _CSRF_NAME.search(attrs.get("name", "")) and "content" in attrs:
+                    self.csrf_header = attrs["content"]
+                return
+            name = attrs.get("name")
+            if not name or attrs.get("type", "").lower() != "hidden":
+                return
+            if self._in_cart_form:
+                self.fields[name] = attrs.get("value", "")
+            elif _CSRF_NAME.search(name):
+                self.csrf_fields[name] = attrs.get("value", "")
+        elif self.endpoint is None:
+            self.endpoint, self.kind = html.unescape(value), kind
+            self.done = True
+
 
 class APIGrabber:
     """Alternative ticket grabber using direct HTTP requests.
@@ -19,8 +114,15 @@ class APIGrabber:
     """
 
     def __init__(self):
-        self._cookies: dict[str, str] = {}
+        self._cookies = httpx.Cookies()
+        # (domain, path, name) -> value of the cookies last copied from the browser
+        self._browser_cookies: dict[tuple[str, str, str], str] = {}
         self._client: httpx.AsyncClient | None = None
+        self._drains: set[asyncio.Task] = set()
+
+    async def client(self) -> httpx.AsyncClient:
+        """The shared Eventim client, so warm-ups land in the pool the grab uses."""
+        return await self._get_client()
 
     async def _get_client(self) -> httpx.AsyncClient:
         if self._client is None or self._client.is_closed:
@@ -35,6 +137,7 @@ class APIGrabber:
                     "Accept-Language": "en-US,en;q=0.9,de;q=0.8",
                 },
                 "cookies": self._cookies,
+                **client_options(),
             }
             if Config.PROXY_URL:
                 client_kwargs["proxy"] = Config.PROXY_URL
@@ -43,42 +146,104 @@ class APIGrabber:
             self._client = httpx.AsyncClient(**client_kwargs)
         return self._client
 
+    @staticmethod
+    def is_eventim_cookie(cookie: dict) -> bool:
+        domain = cookie.get("domain", "").lstrip(".").lower()
+        base = urlparse(Config.EVENTIM_BASE_URL).hostname.removeprefix("www.")
+        return domain == base or domain.endswith("." + base)
+
+    def apply_browser_cookies(self, cookies: list[dict]) -> int:
+        """Write Playwright cookies into the cookie jars in place.
+
+        Updates the live client's jar as well as the one future clients
+        start from, so the client (and its warm connections) is never
+        recreated. Cookies the browser no longer has are removed; cookies
+        Eventim set on API responses are left alone. Returns how many
+        cookies were added, changed or removed.
+        """
+        current = {(c["domain"], c["path"], c["name"]): c["value"] for c in cookies}
+        updated = {key: value for key, value in current.items() if self._browser_cookies.get(key) != value}
+        gone = self._browser_cookies.keys() - current.keys()
+        jars = [self._cookies]
+        if self._client and not self._client.is_closed:
+            jars.append(self._client.cookies)
+        for jar in jars:
+            for (domain, path, name), value in updated.items():
+                jar.set(name, value, domain=domain, path=path)
+            for domain, path, name in gone:
+                try:
+                    jar.jar.clear(domain, path, name)
+                except KeyError:
+                    pass
+        self._browser_cookies = current
+        return len(updated) + len(gone)
+
     def load_cookies_from_browser(self, browser_manager) -> bool:
-        """Extract cookies from the Playwright browser session.
+        """Sync entry point: schedule a cookie sync from the Playwright session.
 
-        Must be called after user has logged in via browser.
+        The cookie bridge copies the cookies on the running event loop;
+        returns True if a sync was scheduled.
         """
+        if not browser_manager.is_initialized:
+            logger.warning("Browser not initialized, cannot extract cookies")
+            return False
         try:
-            if not browser_manager.is_initialized:
-                logger.warning("Browser not initialized, cannot extract cookies")
-                return False
+            asyncio.get_running_loop()
+        except RuntimeError:
+            logger.warning("No running event loop; use load_cookies_from_browser_async")
+            return False
+        cookie_bridge.request_sync("load_cookies_from_browser")
+        return True
 
-            # This is a sync method; cookies will be loaded when the browser context
-            # provides them. In practice, call this from an async context.
-            logger.info("Cookie loading needs to be done via async method")
+    async def load_cookies_from_browser_async(self, browser_manager) -> bool:
+        """Async version: copy cookies from the Playwright context now."""
+        if not browser_manager.is_initialized:
             return False
-        except Exception:
-            logger.exception("Failed to load cookies from browser")
+        if not await cookie_bridge.sync("load_cookies_from_browser"):
             return False
+        logger.info("Loaded %d cookies from browser", len(self._browser_cookies))
+        return bool(self._browser_cookies)
 
-    async def load_cookies_from_browser_async(self, browser_manager) -> bool:
-        """Async version: extract cookies from Playwright browser context."""
+    async def _scan_event_page(self, client: httpx.AsyncClient, url: str) -> _CartScanner:
+        """GET ``url`` and scan the body as it streams in, stopping at the cart endpoint.
+
+        The rest of the body is drained in the background rather than the
+        response closed early, so the warm connection goes back to the pool
+        instead of being dropped; the cart POST doesn't wait for it.
+        """
+        scanner = _CartScanner()
+        start = time.perf_counter()
+        resp = await client.send(client.build_request("GET", url), stream=True)
+        scanner.status, scanner.url = resp.status_code, str(resp.url)
+        chunks = resp.aiter_text()
         try:
-            if not browser_manager.is_initialized:
-                return False
-
-            context = browser_manager._context
-            cookies = await context.cookies(Config.EVENTIM_BASE_URL)
-            self._cookies = {c["name"]: c["value"] for c in cookies}
-            # Recreate client with new cookies
-            if self._client and not self._client.is_closed:
-                await self._client.aclose()
-                self._client = None
-            logger.info("Loaded %d cookies from browser", len(self._cookies))
-            return bool(self._cookies)
-        except Exception:
-            logger.exception("Failed to extract cookies")
-            return False
+            if resp.status_code == 200:
+                async for chunk in chunks:
+                    if scanner.feed(chunk):
+                        break
+                else:
+                    scanner.feed("", final=True)
+        except BaseException:
+            await resp.aclose()
+            raise
+        logger.debug(
+            "Scanned %d chars of %s in %.1fms: %s", scanner.scanned, scanner.url,
+            (time.perf_counter() - start) * 1000, scanner.endpoint or "no cart endpoint",
+        )
+
+        async def _drain():
+            try:
+                async for _ in chunks:
+                    pass
+            except Exception:
+                pass
+            finally:
+                await resp.aclose()
+
+        drain = asyncio.create_task(_drain())
+        self._drains.add(drain)
+        drain.add_done_callback(self._drains.discard)
+        return scanner
 
     async def grab_ticket(self, task: GrabTask, on_status=None) -> dict:
         """Attempt to grab a ticket via direct HTTP requests.
@@ -99,42 +264,37 @@ class APIGrabber:
             logger.info("API Grab [%s] %s: %s", task.ext_id_screening, status, msg)
 
         try:
+            if not await cookie_bridge.ensure_fresh():
+                await _report("failed", "Could not refresh session cookies from the browser")
+                return {"success": False, "message": "Browser session cookies unavailable"}
             client = await self._get_client()
             await _report("grabbing", "Sending HTTP request to Eventim...")
 
-            # Step 1: GET the event page
-            resp = await client.get(task.eventim_url)
-            if resp.status_code != 200:
-                await _report("failed", f"HTTP {resp.status_code}")
-                return {"success": False, "message": f"HTTP {resp.status_code} from Eventim"}
-
-            page_text = resp.text
-            await _report("grabbing", "Page loaded, analyzing...")
-
-            # Step 2: Look for add-to-cart form/API endpoint in the page
-            import re
-            # Look for cart/purchase URLs in the page
-            cart_patterns = [
-                r'action="([^"]*(?:cart|warenkorb|basket)[^"]*)"',
-                r'href="([^"]*(?:addToCart|add-to-cart)[^"]*)"',
-                r'"(https?://[^"]*(?:cart|warenkorb|basket|checkout)[^"]*)"',
-            ]
-
-            cart_url = None
-            for pattern in cart_patterns:
-                match = re.search(pattern, page_text, re.IGNORECASE)
-                if match:
-                    cart_url = match.group(1)
-                    if not cart_url.startswith("http"):
-                        cart_url = Config.EVENTIM_BASE_URL + cart_url
-                    break
-
-            if cart_url:
+            # Step 1: stream the event page (straight to the pre-resolved landing URL if cached)
+            landing = event_urls.get(task)
+            scan = await self._scan_event_page(client, landing or task.eventim_url)
+            if landing:
+                if scan.status == 200:
+                    event_urls.record_hit(task)
+                else:
+                    event_urls.record_fallback(task)
+                    scan = await self._scan_event_page(client, task.eventim_url)
+            if scan.status != 200:
+                await _report("failed", f"HTTP {scan.status}")
+                return {"success": False, "message": f"HTTP {scan.status} from Eventim"}
+
+            # Step 2: POST to the cart endpoint with the form's hidden fields and CSRF token
+            if scan.endpoint:
+                cart_url = urljoin(scan.url, scan.endpoint)
                 await _report("grabbing", "Found cart URL, adding ticket...")
-                cart_resp = await client.post(cart_url, data={
+                data = {
+                    **scan.csrf_fields,
+                    **scan.fields,
                     "quantity": str(task.ticket_count),
                     "amount": str(task.ticket_count),
-                })
+                }
+                headers = {"X-CSRF-Token": scan.csrf_header} if scan.csrf_header else None
+                cart_resp = await client.post(cart_url, data=data, headers=headers)
                 if cart_resp.status_code in (200, 302):
                     await _report("success", "Ticket may have been added to cart!")
                     return {"success": True, "message": "HTTP request sent to cart endpoint"}
@@ -152,6 +312,52 @@ class APIGrabber:
                 await on_status("failed", str(e))
             return {"success": False, "message": str(e)}
 
+    async def wait_for_availability(self, task: GrabTask, timeout: float | None = None) -> dict | None:
+        """Hybrid mode detection: poll over HTTP until the screening's tickets open.
+
+        ``HYBRID_DETECT_SOURCE`` picks what is polled: the Berlinale ticket
+        JS ("ticket_js", the screening turns "available") or the Eventim
+        event page ("event_page", a cart endpoint appears; it is streamed
+        and scanning stops there). Both go over the warm pooled clients.
+
+        Returns {"url", "source", "polls", "detected_at" (perf_counter),
+        "detected_ts" (synced clock)}, or None if nothing opened in time.
+        """
+        from app.berlinale_api import fetch_ticket_status
+        from app.time_sync import get_time_sync
+
+        source = Config.HYBRID_DETECT_SOURCE
+        if source == "event_page" and not task.eventim_url:
+            source = "ticket_js"
+        clock = get_clock()  # virtual under simulation, like the rest of the pre-sale timeline
+        deadline = clock.monotonic() + (Config.HYBRID_DETECT_TIMEOUT if timeout is None else timeout)
+        polls = 0
+        while clock.monotonic() < deadline:
+            polls += 1
+            url = None
+            try:
+                if source == "event_page":
+                    client = await self._get_client()
+                    scan = await self._scan_event_page(client, event_urls.get(task) or task.eventim_url)
+                    if scan.status == 200 and scan.endpoint:
+                        url = task.eventim_url
+                else:
+                    info = (await fetch_ticket_status()).get(task.ext_id_screening)
+                    if info and info.state == "available":
+                        url = info.url or task.eventim_url or ""
+            except Exception as e:
+                logger.debug("Availability poll for %s failed: %r", task.ext_id_screening, e)
+            if url is not None:
+                return {
+                    "url": url,
+                    "source": source,
+                    "polls": polls,
+                    "detected_at": time.perf_counter(),
+                    "detected_ts": get_time_sync().timestamp(),
+                }
+            await clock.sleep(Config.HYBRID_POLL_INTERVAL)
+        return None
+
     async def poll_and_grab(self, task: GrabTask, on_status=None) -> dict:
         """Poll ticket status and grab when available.
 
@@ -169,6 +375,8 @@ class APIGrabber:
         max_polls = int(300 / Config.POLL_INTERVAL)  # poll for up to 5 minutes
         for i in range(max_polls):
             try:
+                # Keep the session fresh while polling, so the grab itself needn't sync
+                await cookie_bridge.ensure_fresh()
                 ticket_map = await fetch_ticket_status()
                 info = ticket_map.get(task.ext_id_screening)
                 if info and info.state == "available":
@@ -181,7 +389,7 @@ class APIGrabber:
             except Exception:
                 logger.exception("Poll error")
 
-            await asyncio.sleep(Config.POLL_INTERVAL)
+            await get_clock().sleep(Config.POLL_INTERVAL)
 
         await _report("failed", "Polling timeout")
         return {"success": False, "message": "Polling timeout after 5 minutes"}
@@ -9,6 +9,7 @@ from zoneinfo import ZoneInfo
 import httpx
 
 from app.config import Config
+from app.conn_warmer import client_options
 from app.models import DayProgramme, Event, Film, TicketInfo
 
 logger = logging.getLogger(__name__)
@@ -29,10 +30,16 @@ def _get_client() -> httpx.AsyncClient:
                 "Accept": "application/json, text/javascript, */*",
                 "Accept-Language": "en-US,en;q=0.9",
             },
+            **client_options(),
         )
     return _client
 
 
+def get_client() -> httpx.AsyncClient:
+    """The shared berlinale.de client, so warm-ups land in the pool the API calls use."""
+    return _get_client()
+
+
 # ─── todayOnSale ─────────────────────────────────────────────
 
 async def fetch_today_on_sale() -> list[Film]:
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from datetime import datetime
+
+# A clock that keeps counting while the machine is suspended, unlike time.monotonic()
+if sys.platform == "darwin":
+    _SUSPEND_CLOCK = getattr(time, "CLOCK_MONOTONIC_RAW", None)  # continuous time on macOS
+else:
+    _SUSPEND_CLOCK = getattr(time, "CLOCK_BOOTTIME", None)  # Linux
+
+
+class SystemClock:
+    """The real clock. Time sync, the trigger, the monitor and the scheduler
+    read time and sleep through ``get_clock()`` so a simulation can swap in
+    a ``VirtualClock``; the methods are the ``time`` builtins themselves, so
+    the hot paths pay nothing for the indirection.
+    """
+
+    speed = 1.0
+    simulated = False
+
+    time_ns = staticmethod(time.time_ns)
+    monotonic = staticmethod(time.monotonic)
+    monotonic_ns = staticmethod(time.monotonic_ns)
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+    @staticmethod
+    def asleep_ns() -> int | None:
+        """Time spent suspended, up to a constant; None where the platform can't tell.
+
+        ``monotonic()`` stops while the machine sleeps, so its distance to
+        a clock that keeps counting grows by exactly the time slept (and
+        stays put when the system clock is stepped).
+        """
+        if _SUSPEND_CLOCK is None:
+            return None
+        return time.clock_gettime_ns(_SUSPEND_CLOCK) - time.monotonic_ns()
+
+    def to_real(self, dt: datetime) -> datetime:
+        """The real moment at which the clock shows ``dt``."""
+        return dt
+
+
+class VirtualClock(SystemClock):
+    """Accelerated clock for simulations.
+
+    Starts at ``start`` and runs ``speed`` times faster than real time, so
+    a festival day replays in minutes. Sleeps are shortened by ``speed``,
+    and ``to_real()`` maps virtual run dates onto the real timeline for
+    APScheduler, which keeps its own (real) clock.
+    """
+
+    simulated = True
+
+    def __init__(self, start: datetime, speed: float = 60.0) -> None:
+        if speed <= 0:
+            raise ValueError("speed must be positive")
+        self.speed = speed
+        self.start = start
+        self._real_mono0_ns = time.monotonic_ns()
+        self._real_time0 = time.time()
+        self._virtual0_ns = int(start.timestamp() * 1e9)
+
+    def _elapsed_ns(self) -> int:
+        return int((time.monotonic_ns() - self._real_mono0_ns) * self.speed)
+
+    def time_ns(self) -> int:
+        return self._virtual0_ns + self._elapsed_ns()
+
+    def monotonic_ns(self) -> int:
+        return self._real_mono0_ns + self._elapsed_ns()
+
+    def monotonic(self) -> float:
+        return self.monotonic_ns() / 1e9
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(max(0.0, seconds) / self.speed)
+
+    def asleep_ns(self) -> int:
+        return 0  # virtual time never sleeps
+
+    def to_real(self, dt: datetime) -> datetime:
+        real_ts = self._real_time0 + (dt.timestamp() - self._virtual0_ns / 1e9) / self.speed
+        return datetime.fromtimestamp(real_ts, dt.tzinfo)
+
+
+# Global clock, replaced only by simulations
+_clock: SystemClock = SystemClock()
+
+
+def get_clock() -> SystemClock:
+    return _clock
+
+
+def set_clock(clock: SystemClock | None) -> None:
+    """Install ``clock`` app-wide; None restores the real clock."""
+    global _clock
+    _clock = clock if clock is not None else SystemClock()
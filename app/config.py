@@ -18,6 +18,8 @@ class Config:
     # Local paths
     BROWSER_PROFILE_DIR = "data/browser_profile"
     TASKS_FILE = "data/tasks.json"
+    SELECTOR_STATS_FILE = "data/selector_stats.json"
+    SELECTOR_STATS_HALF_LIFE_DAYS = 2.0  # a selector win counts half after this long, so a changed page is relearned
 
     # Server
     SERVER_HOST = "0.0.0.0"
@@ -28,11 +30,23 @@ class Config:
 
     # Grab settings
     TICKET_COUNT = 2  # default number of tickets to grab
+    MAX_TICKETS_PER_ORDER = int(os.environ.get("MAX_TICKETS_PER_ORDER", "4"))  # cap for coalesced same-screening tasks
     GRAB_RETRY_COUNT = 3
     PRE_SALE_WARMUP = 60  # seconds before sale to start browser
     PRE_SALE_OPEN_PAGE = 15  # seconds before sale to open page (optimized from 30s)
+    PRE_SALE_FIRE_LEAD = 2  # seconds before sale the fire job starts; the precise trigger does the rest
     PRE_SALE_POLL = 5  # seconds before sale to start polling
     POLL_INTERVAL = 0.5  # seconds between polls
+    GRAB_MODE = os.environ.get("GRAB_MODE", "browser")  # default for new tasks: browser / api / hybrid
+
+    # Hybrid mode: HTTP polling detects the opening, a preheated page runs the purchase flow
+    HYBRID_DETECT_SOURCE = os.environ.get("HYBRID_DETECT_SOURCE", "ticket_js")  # "ticket_js" or "event_page"
+    HYBRID_POLL_INTERVAL = 0.25  # seconds between detection polls
+    HYBRID_DETECT_TIMEOUT = 300  # seconds of polling before giving up
+
+    # Waiting rooms (Queue-it / Eventim interstitials): wait passively, never reload
+    QUEUE_POLL_INTERVAL = 2  # seconds between progress checks (navigations wake the wait at once)
+    QUEUE_MAX_WAIT = 3600  # seconds in a waiting room before giving up
 
     # Monitor settings
     MONITOR_POLL_INTERVAL = 15       # seconds between polls (normal)
@@ -54,16 +68,78 @@ class Config:
     SALE_TIME_MINUTE = 0
     TIMEZONE = "Europe/Berlin"
 
+    # Browser page pool: blank grab pages kept ready so grabs skip page creation
+    PAGE_POOL_SIZE = int(os.environ.get("PAGE_POOL_SIZE", "2"))
+    # Page lifecycle: leaked grab pages are reaped, and tabs/memory are capped
+    BROWSER_MAX_PAGES = int(os.environ.get("BROWSER_MAX_PAGES", "12"))
+    BROWSER_MEMORY_LIMIT_MB = int(os.environ.get("BROWSER_MEMORY_LIMIT_MB", "1024"))  # summed renderer JS heap
+    PAGE_ACTIVE_TTL = 900  # seconds a borrowed grab page may sit unused before it is reaped
+    PAGE_REAP_INTERVAL = 60  # seconds between reaper runs
+    BROWSER_HEALTH_FAILURES = 3  # consecutive failed liveness checks before the browser is restarted
+    # Grab slots: browser grabs running at once (preheat to end of purchase), highest priority first
+    GRAB_SLOTS = int(os.environ.get("GRAB_SLOTS", "0"))  # 0 = auto: one per 2 CPU cores, within the tab budget
+    GRAB_SLOT_SETTLE_MS = 50  # arrivals within this window are ranked by priority before any is admitted
+
+    # Cookie bridge: browser session cookies copied into the API client's jar
+    COOKIE_SYNC_INTERVAL = 30  # seconds between scheduled syncs
+    COOKIE_SYNC_MAX_AGE = 10  # seconds; API grabs re-sync when the last sync is older
+
+    # Request filtering on grab pages (optional, never applied to the login page)
+    REQUEST_FILTER_ENABLED = os.environ.get("REQUEST_FILTER_ENABLED", "false").lower() == "true"
+    REQUEST_FILTER_BLOCK_TYPES = ["image", "media", "font"]  # Playwright resource types
+    REQUEST_FILTER_BLOCK_HOSTS = [  # matched with subdomains
+        "googletagmanager.com",
+        "google-analytics.com",
+        "doubleclick.net",
+        "googlesyndication.com",
+        "facebook.net",
+        "hotjar.com",
+        "criteo.com",
+        "criteo.net",
+        "adnxs.com",
+        "bat.bing.com",
+    ]
+    REQUEST_FILTER_ALLOW_HOSTS = ["consentmanager.net"]  # never blocked (consent banner is a flow step)
+
     # Proxy settings (optional)
     PROXY_URL = os.environ.get("PROXY_URL", None)  # e.g. "http://proxy:8080" or "socks5://proxy:1080"
 
+    # HTTP clients (berlinale.de API, eventim.de API grabber)
+    HTTP2_ENABLED = os.environ.get("HTTP2_ENABLED", "false").lower() == "true"  # needs the h2 package
+    HTTP_MAX_CONNECTIONS = 10  # per client
+    HTTP_KEEPALIVE_EXPIRY = 180  # seconds an idle pooled connection is kept (httpx default: 5)
+
+    # Pre-sale connection warmer: pools are opened at warmup and pinged until after the sale
+    CONN_WARM_PING_INTERVAL = 20  # seconds; below typical server idle timeouts
+    CONN_WARM_HOLD = 120  # seconds after sale time to keep connections warm
+    CONN_WARM_TIMEOUT = 5.0  # seconds per warm-up request
+    CONN_WARM_EVENTIM_CONNECTIONS = 2  # event page GET + cart POST in API mode
+    EVENT_URL_CACHE_TTL = 900  # seconds a pre-resolved Eventim landing URL stays valid
+
     # Time synchronization settings (optional)
     TIME_SYNC_ENABLED = os.environ.get("TIME_SYNC_ENABLED", "true").lower() == "true"
-    TIME_SYNC_METHOD = os.environ.get("TIME_SYNC_METHOD", "auto")  # "ntp", "http", or "auto"
-    TIME_SYNC_INTERVAL = int(os.environ.get("TIME_SYNC_INTERVAL", "300"))  # seconds between re-syncs
+    TIME_SYNC_METHOD = os.environ.get("TIME_SYNC_METHOD", "auto")  # "ntp", "http", "server", or "auto"
+    TIME_SYNC_INTERVAL = int(os.environ.get("TIME_SYNC_INTERVAL", "300"))  # max seconds between re-syncs
+    TIME_SYNC_MIN_INTERVAL = 60  # min seconds between re-syncs (also min span for a drift fit)
+    TIME_SYNC_MAX_ERROR_MS = 1.0  # re-sync before unmodeled drift exceeds this
+    TIME_SYNC_SUSPEND_THRESHOLD_MS = 1000  # wall clock gaining this much on monotonic = the machine slept
+    TIME_SYNC_HISTORY = 8  # (monotonic, offset) samples kept for the drift fit
+    TIME_SYNC_READY_TIMEOUT = 30  # max seconds a trigger waits for the first sync
+
+    # Target server clocks, measured from HTTP Date headers
+    SERVER_CLOCK_HOSTS = [BERLINALE_BASE_URL, EVENTIM_BASE_URL]
+    SERVER_CLOCK_ROUNDS = 8  # HEAD requests per host when bisecting the sub-second offset
+    SALE_CLOCK_HOST = os.environ.get("SALE_CLOCK_HOST", "")  # e.g. "eventim.de"; empty = atomic clock
+
+    # Precise sale-time trigger
+    TRIGGER_TOLERANCE_MS = float(os.environ.get("TRIGGER_TOLERANCE_MS", "1.0"))  # acceptable fire skew
+    TRIGGER_SPIN_WINDOW_MS = 20  # final phase length before the target; coarse sleep until then
     
     # Debug settings
     DEBUG_MODE = os.environ.get("DEBUG_MODE", "false").lower() == "true"
+    SCREENSHOT_POLICY = os.environ.get("SCREENSHOT_POLICY", "on-failure")  # off / on-failure / async / ring
+    SCREENSHOT_RING_SIZE = 5  # frames kept in memory by the "ring" policy
+    SCREENSHOT_DIR = "data"
 
 
 class TimingConfig:
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from urllib.parse import urlparse
+from zoneinfo import ZoneInfo
+
+import httpx
+
+from app.config import Config
+from app.time_sync import get_time_sync
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional ``h2`` package (``pip install httpx[http2]``)
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class _RequestTrace:
+    """httpcore ``trace`` extension: timestamps every connection event of one request."""
+
+    __slots__ = ("started", "marks")
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.marks: dict[str, float] = {}
+
+    async def __call__(self, event: str, info: dict) -> None:
+        self.marks[event] = time.perf_counter()
+
+    def span_ms(self, step: str) -> float | None:
+        """Duration of ``step`` (e.g. "connect_tcp"), whatever layer traced it."""
+        start = end = None
+        for event, at in self.marks.items():
+            if event.endswith(f"{step}.started"):
+                start = at
+            elif event.endswith(f"{step}.complete"):
+                end = at
+        if start is None or end is None:
+            return None
+        return round((end - start) * 1000, 2)
+
+
+async def _on_request(request: httpx.Request) -> None:
+    request.extensions["trace"] = _RequestTrace()
+
+
+async def _on_response(response: httpx.Response) -> None:
+    trace = response.request.extensions.get("trace")
+    if isinstance(trace, _RequestTrace):
+        connection_warmer.record(response, trace)
+
+
+def client_options() -> dict:
+    """Shared ``httpx.AsyncClient`` kwargs: pool limits, keepalive, HTTP/2, tracing.
+
+    httpx drops idle pooled connections after 5s by default, so a pool
+    warmed a minute before the sale would be cold again at T-0;
+    ``HTTP_KEEPALIVE_EXPIRY`` keeps them for the whole pre-sale window.
+    """
+    http2 = Config.HTTP2_ENABLED and HTTP2_AVAILABLE
+    if Config.HTTP2_ENABLED and not HTTP2_AVAILABLE:
+        logger.warning("HTTP2_ENABLED is set but h2 is not installed, using HTTP/1.1")
+    return {
+        "http2": http2,
+        "limits": httpx.Limits(
+            max_connections=Config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=Config.HTTP_MAX_CONNECTIONS,
+            keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        "event_hooks": {"request": [_on_request], "response": [_on_response]},
+    }
+
+
+class ConnectionWarmer:
+    """Opens and keeps alive pooled connections to berlinale.de and eventim.de.
+
+    ``hold(sale_dt)`` warms both httpx clients now (DNS, TCP and TLS are
+    paid here instead of at T-0) and pings them every
+    ``CONN_WARM_PING_INTERVAL`` seconds until ``CONN_WARM_HOLD`` seconds
+    after the latest held sale, so neither side closes the idle sockets.
+    Every request made through ``client_options()`` clients is traced:
+    whether it reused a pooled connection and what its handshake cost.
+    """
+
+    MAX_TRACES = 200
+
+    def __init__(self) -> None:
+        self._traces: deque[dict] = deque(maxlen=self.MAX_TRACES)
+        self._hosts: dict[str, dict] = {}
+        self._extra_urls: dict[str, str] = {}  # host -> URL of an event host besides the base URLs
+        self._hold_until: float = 0.0
+        self._task: asyncio.Task | None = None
+
+    def record(self, response: httpx.Response, trace: _RequestTrace) -> None:
+        """Response hook: store how the request got its connection."""
+        connect_ms = trace.span_ms("connect_tcp")
+        tls_ms = trace.span_ms("start_tls")
+        host = response.request.url.host
+        entry = {
+            "host": host,
+            "method": response.request.method,
+            "path": response.request.url.path,
+            "status": response.status_code,
+            "http_version": response.http_version,
+            "reused": connect_ms is None,
+            "connect_ms": connect_ms,
+            "tls_ms": tls_ms,
+            "ttfb_ms": round((time.perf_counter() - trace.started) * 1000, 2),
+            "at": get_time_sync().timestamp(),
+        }
+        self._traces.append(entry)
+
+        stats = self._hosts.setdefault(host, {
+            "requests": 0, "reused": 0, "handshakes": 0, "handshake_ms_total": 0.0, "last": None,
+        })
+        stats["requests"] += 1
+        if entry["reused"]:
+            stats["reused"] += 1
+        else:
+            stats["handshakes"] += 1
+            stats["handshake_ms_total"] += (connect_ms or 0.0) + (tls_ms or 0.0)
+        stats["last"] = entry
+        logger.debug(
+            "%s %s%s: %s, ttfb %.1fms", entry["method"], host, entry["path"],
+            "reused connection" if entry["reused"] else f"new connection (tcp {connect_ms}ms, tls {tls_ms}ms)",
+            entry["ttfb_ms"],
+        )
+
+    async def _targets(self) -> list[tuple[httpx.AsyncClient, str]]:
+        from app import berlinale_api
+        from app.api_grabber import api_grabber
+
+        eventim = await api_grabber.client()
+        # Concurrent pings open separate connections, so an API grab's cart
+        # POST finds a warm one while the event page GET is still draining
+        targets = [(berlinale_api.get_client(), Config.BERLINALE_BASE_URL + "/")]
+        targets += [(eventim, Config.EVENTIM_BASE_URL + "/")] * Config.CONN_WARM_EVENTIM_CONNECTIONS
+        targets += [(eventim, url) for url in self._extra_urls.values()]
+        return targets
+
+    async def warm_once(self) -> dict[str, float | None]:
+        """HEAD every target once; returns ms per host (None on failure)."""
+        results: dict[str, float | None] = {}
+
+        async def _ping(client: httpx.AsyncClient, url: str):
+            host = urlparse(url).hostname or url
+            start = time.perf_counter()
+            try:
+                await client.head(url, follow_redirects=False, timeout=Config.CONN_WARM_TIMEOUT)
+                results[host] = round((time.perf_counter() - start) * 1000, 1)
+            except Exception as e:
+                logger.warning("Connection warm-up to %s failed: %r", host, e)
+                results[host] = None
+
+        await asyncio.gather(*(_ping(client, url) for client, url in await self._targets()))
+        return results
+
+    async def hold(self, sale_dt: datetime, url: str | None = None) -> dict[str, float | None]:
+        """Warm now and keep the pools warm until just after ``sale_dt``.
+
+        Args:
+            url: An event URL; its host is warmed too if it isn't one of
+                 the base hosts (e.g. an affiliate redirector).
+        """
+        if url:
+            host = urlparse(url).hostname
+            base_hosts = {urlparse(u).hostname for u in (Config.BERLINALE_BASE_URL, Config.EVENTIM_BASE_URL)}
+            if host and host not in base_hosts:
+                self._extra_urls[host] = f"{urlparse(url).scheme}://{host}/"
+        self._hold_until = max(self._hold_until, sale_dt.timestamp() + Config.CONN_WARM_HOLD)
+        results = await self.warm_once()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._keepalive_loop())
+        logger.info(
+            "Connections warm until %s: %s", sale_dt.isoformat(),
+            ", ".join(f"{h} {ms}ms" if ms is not None else f"{h} failed" for h, ms in results.items()),
+        )
+        return results
+
+    async def _keepalive_loop(self) -> None:
+        try:
+            while get_time_sync().timestamp() < self._hold_until:
+                await asyncio.sleep(Config.CONN_WARM_PING_INTERVAL)
+                await self.warm_once()
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            logger.exception("Connection keepalive loop failed")
+        finally:
+            self._extra_urls.clear()
+            logger.info("Connection keepalive stopped")
+
+    def status(self) -> dict:
+        hosts = {}
+        for host, stats in self._hosts.items():
+            hosts[host] = {
+                "requests": stats["requests"],
+                "reused": stats["reused"],
+                "reuse_rate": round(stats["reused"] / stats["requests"], 3),
+                "handshakes": stats["handshakes"],
+                "avg_handshake_ms": (
+                    round(stats["handshake_ms_total"] / stats["handshakes"], 1) if stats["handshakes"] else None
+                ),
+                "last": stats["last"],
+            }
+        return {
+            "http2": Config.HTTP2_ENABLED and HTTP2_AVAILABLE,
+            "keepalive_expiry": Config.HTTP_KEEPALIVE_EXPIRY,
+            "holding": self._task is not None and not self._task.done(),
+            "hold_until": datetime.fromtimestamp(self._hold_until, ZoneInfo(Config.TIMEZONE)).isoformat() if self._hold_until else None,
+            "hosts": hosts,
+            "recent": list(self._traces)[-20:],
+        }
+
+    def stop(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+
+# Global singleton
+connection_warmer = ConnectionWarmer()
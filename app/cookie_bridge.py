@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class CookieBridge:
+    """Keeps the APIGrabber cookie jar in step with the Playwright context.
+
+    Eventim cookies are copied from the browser on a schedule
+    (``COOKIE_SYNC_INTERVAL``) and on session events reported by
+    ``BrowserManager`` (session checks, login page navigations, browser
+    restarts). They are written into the live httpx client's jar in place,
+    so its warm connections survive every sync. ``ensure_fresh()`` is the
+    gate API grabs go through: it re-syncs when the last sync is older
+    than ``COOKIE_SYNC_MAX_AGE``.
+    """
+
+    def __init__(self) -> None:
+        self._task: asyncio.Task | None = None
+        self._pending: asyncio.Task | None = None
+        self._lock: asyncio.Lock | None = None
+        self._last_sync: float | None = None  # monotonic time of the last successful sync
+        self._snapshot: tuple = ()
+        self._stats = {"syncs": 0, "changes": 0, "failures": 0, "cookies": 0,
+                       "last_reason": None, "last_sync_at": None, "last_sync_ms": None}
+
+    async def sync(self, reason: str = "manual") -> bool:
+        """Copy the browser's Eventim cookies into the API client now.
+
+        Returns True if the browser is running and the copy succeeded.
+        """
+        from app.api_grabber import api_grabber
+        from app.grabber import browser_manager
+
+        if not browser_manager.is_initialized:
+            return False
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            start = time.perf_counter()
+            try:
+                cookies = await browser_manager.context.cookies()
+            except Exception as e:
+                self._stats["failures"] += 1
+                logger.warning("Cookie sync (%s) failed: %r", reason, e)
+                return False
+            cookies = [c for c in cookies if api_grabber.is_eventim_cookie(c)]
+            snapshot = tuple(sorted((c["domain"], c["path"], c["name"], c["value"]) for c in cookies))
+            if snapshot != self._snapshot:
+                changed = api_grabber.apply_browser_cookies(cookies)
+                self._snapshot = snapshot
+                self._stats["changes"] += 1
+                logger.info("Cookie sync (%s): %d Eventim cookies, %d changed", reason, len(cookies), changed)
+            self._last_sync = time.monotonic()
+            self._stats.update(
+                syncs=self._stats["syncs"] + 1,
+                cookies=len(cookies),
+                last_reason=reason,
+                last_sync_at=time.time(),
+                last_sync_ms=round((time.perf_counter() - start) * 1000, 1),
+            )
+            return True
+
+    def request_sync(self, reason: str) -> None:
+        """Session event hook: sync soon, coalescing bursts of events."""
+        if self._pending and not self._pending.done():
+            return
+        try:
+            self._pending = asyncio.get_running_loop().create_task(self.sync(reason))
+        except RuntimeError:
+            logger.debug("No running loop, cookie sync (%s) skipped", reason)
+
+    @property
+    def age(self) -> float | None:
+        """Seconds since the last successful sync, or None if never synced."""
+        return None if self._last_sync is None else time.monotonic() - self._last_sync
+
+    async def ensure_fresh(self, max_age: float | None = None) -> bool:
+        """Re-sync unless the last sync is younger than ``max_age`` seconds.
+
+        Returns False only if the browser is running but its cookies could
+        not be read, i.e. the API client's session may be stale.
+        """
+        from app.grabber import browser_manager
+
+        if not browser_manager.is_initialized:
+            return True  # no browser session to be stale against
+        max_age = Config.COOKIE_SYNC_MAX_AGE if max_age is None else max_age
+        age = self.age
+        if age is not None and age <= max_age:
+            return True
+        return await self.sync("freshness check")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._sync_loop())
+
+    async def _sync_loop(self) -> None:
+        try:
+            while True:
+                await asyncio.sleep(Config.COOKIE_SYNC_INTERVAL)
+                await self.sync("scheduled")
+        except asyncio.CancelledError:
+            pass
+
+    def stop(self) -> None:
+        for task in (self._task, self._pending):
+            if task and not task.done():
+                task.cancel()
+        self._task = self._pending = None
+
+    def status(self) -> dict:
+        age = self.age
+        return {**self._stats, "age_s": None if age is None else round(age, 1)}
+
+
+# Global singleton
+cookie_bridge = CookieBridge()
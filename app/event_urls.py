@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import logging
+import time
+from urllib.parse import urlparse
+
+from app.config import Config
+from app.models import GrabTask
+
+logger = logging.getLogger(__name__)
+
+
+class EventUrlCache:
+    """Final Eventim landing URLs, resolved ahead of the sale.
+
+    ``task.eventim_url`` comes from the Berlinale ticket JS and usually goes
+    through affiliate and ``noapp`` redirects before landing on the event
+    page. ``resolve()`` follows that chain once during warmup (over the
+    already warm API client) and caches where it ends; grabs then navigate
+    straight to the landing URL and only fall back to the original URL if
+    that fails. Each cache hit is credited with the redirect time measured
+    at resolve time.
+
+    An entry is only used while it is valid: same source URL as the task,
+    younger than ``EVENT_URL_CACHE_TTL``, and the chain ended in a 2xx page
+    on an Eventim host.
+    """
+
+    def __init__(self) -> None:
+        # task id -> {"source", "final", "hops", "redirect_ms", "resolved_at"}
+        self._entries: dict[str, dict] = {}
+        # task id -> {"hits", "fallbacks", "saved_ms"}
+        self._stats: dict[str, dict] = {}
+
+    @staticmethod
+    def _is_eventim(url: str) -> bool:
+        host = (urlparse(url).hostname or "").lower()
+        domain = urlparse(Config.EVENTIM_BASE_URL).hostname.removeprefix("www.")
+        return host == domain or host.endswith("." + domain)
+
+    async def resolve(self, task: GrabTask) -> dict | None:
+        """Follow ``task.eventim_url``'s redirects and cache the landing URL.
+
+        Uses HEAD, so the event page body is never downloaded and each
+        connection goes back to the pool warm (a GET stream closed unread
+        would be dropped instead). Servers that refuse HEAD get a plain
+        GET whose body is read. Returns the cache entry, or None if the
+        chain failed or did not end on a usable Eventim page.
+        """
+        from app.api_grabber import api_grabber
+
+        if not task.eventim_url:
+            return None
+        self._entries.pop(task.id, None)
+        client = await api_grabber.client()
+        start = time.perf_counter()
+        try:
+            resp = await client.head(task.eventim_url, follow_redirects=True)
+            if resp.status_code in (405, 501):
+                resp = await client.get(task.eventim_url, follow_redirects=True)
+            final, status, history = str(resp.url), resp.status_code, resp.history
+        except Exception as e:
+            logger.warning("Could not resolve redirects for task %s: %r", task.id, e)
+            return None
+        total_ms = (time.perf_counter() - start) * 1000
+
+        if status >= 300 or not self._is_eventim(final):
+            logger.warning(
+                "Redirect chain for task %s ended at %s (HTTP %d), not caching", task.id, final, status,
+            )
+            return None
+        # Each redirect response is fully read and closed, so its elapsed is set
+        redirect_ms = sum(r.elapsed.total_seconds() * 1000 for r in history)
+        entry = {
+            "source": task.eventim_url,
+            "final": final,
+            "hops": len(history),
+            "redirect_ms": round(redirect_ms, 1),
+            "resolved_at": time.time(),
+        }
+        self._entries[task.id] = entry
+        logger.info(
+            "Resolved task %s: %d redirect(s), %.0fms of %.0fms -> %s",
+            task.id, entry["hops"], redirect_ms, total_ms, final,
+        )
+        return entry
+
+    def get(self, task: GrabTask) -> str | None:
+        """The cached landing URL for ``task``, if still valid and worth using."""
+        entry = self._entries.get(task.id)
+        if entry is None:
+            return None
+        if entry["source"] != task.eventim_url or time.time() - entry["resolved_at"] > Config.EVENT_URL_CACHE_TTL:
+            self._entries.pop(task.id, None)
+            return None
+        if not entry["hops"]:
+            return None  # no redirects to skip
+        return entry["final"]
+
+    def record_hit(self, task: GrabTask) -> None:
+        """A grab navigated straight to the landing URL."""
+        stats = self._stats.setdefault(task.id, {"hits": 0, "fallbacks": 0, "saved_ms": 0.0})
+        stats["hits"] += 1
+        stats["saved_ms"] += self._entries.get(task.id, {}).get("redirect_ms", 0.0)
+
+    def record_fallback(self, task: GrabTask) -> None:
+        """The landing URL failed; drop it so later navigations use the original."""
+        stats = self._stats.setdefault(task.id, {"hits": 0, "fallbacks": 0, "saved_ms": 0.0})
+        stats["fallbacks"] += 1
+        self._entries.pop(task.id, None)
+
+    def forget(self, task_id: str) -> None:
+        self._entries.pop(task_id, None)
+
+    def report(self) -> dict:
+        task_ids = set(self._entries) | set(self._stats)
+        report = {}
+        for task_id in task_ids:
+            stats = self._stats.get(task_id, {"hits": 0, "fallbacks": 0, "saved_ms": 0.0})
+            report[task_id] = {
+                "cached": task_id in self._entries,
+                **self._entries.get(task_id, {}),
+                **stats,
+                "saved_ms": round(stats["saved_ms"], 1),
+            }
+        return report
+
+
+# Global singleton
+event_urls = EventUrlCache()
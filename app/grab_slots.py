@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+
+from app.clock import get_clock
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def _auto_capacity(pages: int) -> int:
+    """One grab per two usable CPU cores, within the ``pages`` tabs grabs may use."""
+    try:
+        cpus = len(os.sched_getaffinity(0))  # honours CPU pinning and container cpusets
+    except AttributeError:
+        cpus = os.cpu_count() or 2
+    return max(1, min(cpus // 2, pages))
+
+
+class GrabSlots:
+    """Bounded, priority-ordered admission for page-heavy grab work.
+
+    Every day's sales open at the same minute, so without a limit all of
+    that day's browser grabs open and drive Playwright pages at once and
+    saturate the CPU. A task holds a slot from preheating its page until
+    its purchase attempt ends; at most ``capacity`` tasks hold one. Waiting
+    tasks are admitted highest ``priority`` first, then first come first
+    served, as slots free up.
+    """
+
+    def __init__(self) -> None:
+        self._holders: dict[str, dict] = {}  # task id -> {"priority", "since"}
+        # heap of [-priority, seq, task_id, future]; entries with a done future are stale
+        self._waiters: list[list] = []
+        self._futures: dict[str, asyncio.Future] = {}  # task id -> its pending admission
+        self._queued: set[str] = set()  # waiters already counted as left waiting
+        self._seq = itertools.count()
+        self._on_change = None  # async callback(status)
+        self._page_budget = None  # callable() -> tabs grabs may use, set by the browser
+        self._notify_task: asyncio.Task | None = None
+        self._settle: asyncio.TimerHandle | None = None  # pending admission of new arrivals
+        self._dirty = False
+        self._stats = {"admitted": 0, "waited": 0, "timeouts": 0, "wait_ms_total": 0.0, "peak_waiting": 0}
+
+    @property
+    def capacity(self) -> int:
+        if Config.GRAB_SLOTS > 0:
+            return Config.GRAB_SLOTS
+        pages = self._page_budget() if self._page_budget else Config.BROWSER_MAX_PAGES - Config.PAGE_POOL_SIZE
+        return _auto_capacity(pages)
+
+    def set_on_change(self, callback) -> None:
+        """Set callback for queue changes: async fn(status dict)."""
+        self._on_change = callback
+
+    def set_page_budget(self, budget) -> None:
+        """Set ``budget() -> int``, the browser tabs grabs may use right now.
+
+        Set once the page pool is configured; until then the auto capacity
+        assumes every tab outside the pool is free for grabs.
+        """
+        self._page_budget = budget
+        self.capacity_changed()
+
+    def capacity_changed(self) -> None:
+        """The page budget changed; admit waiters if it grew."""
+        if self._waiters:
+            self._dispatch()
+
+    def holds(self, task_id: str) -> bool:
+        return task_id in self._holders
+
+    async def acquire(self, task_id: str, priority: int = 0, timeout: float | None = None) -> bool:
+        """Wait for a slot; returns False on timeout or if the task was released meanwhile.
+
+        Idempotent per task: a task holding a slot gets True at once, and a
+        second caller for a task already waiting shares its place in line.
+        """
+        if task_id in self._holders:
+            return True
+        future = self._futures.get(task_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._futures[task_id] = future
+            heapq.heappush(self._waiters, [-priority, next(self._seq), task_id, future])
+            self._schedule_dispatch()
+        start = time.perf_counter()
+        if timeout is not None:
+            timeout /= get_clock().speed  # app-clock seconds (virtual under simulation)
+        try:
+            admitted = await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            if future.done():
+                admitted = future.result()
+            else:
+                self._stats["timeouts"] += 1
+                self._drop_waiter(task_id, admitted=False)
+                return False
+        self._stats["wait_ms_total"] += (time.perf_counter() - start) * 1000
+        return admitted
+
+    def release(self, task_id: str) -> None:
+        """Free the task's slot, or take it out of the line."""
+        if self._holders.pop(task_id, None) is not None:
+            logger.debug("Task %s released its grab slot", task_id)
+            self._dispatch()
+        elif task_id in self._futures:
+            self._drop_waiter(task_id, admitted=False)
+
+    def reprioritize(self, task_id: str, priority: int) -> None:
+        """Move a waiting task to its new priority (keeping its arrival order)."""
+        for entry in self._waiters:
+            if entry[2] == task_id and not entry[3].done():
+                entry[0] = -priority
+                heapq.heapify(self._waiters)
+                self._changed()
+                return
+        if task_id in self._holders:
+            self._holders[task_id]["priority"] = priority
+
+    def position(self, task_id: str) -> int | None:
+        """1-based place in line, or None if the task isn't waiting."""
+        waiting = self.waiting()
+        return waiting.index(task_id) + 1 if task_id in waiting else None
+
+    def waiting(self) -> list[str]:
+        """Waiting task ids in admission order."""
+        return [entry[2] for entry in sorted(self._waiters) if not entry[3].done()]
+
+    def _drop_waiter(self, task_id: str, admitted: bool) -> None:
+        future = self._futures.pop(task_id, None)
+        self._queued.discard(task_id)
+        if future is not None and not future.done():
+            future.set_result(admitted)
+        self._waiters = [entry for entry in self._waiters if not entry[3].done()]
+        heapq.heapify(self._waiters)
+        self._changed()
+
+    def _reclaim_stale(self) -> None:
+        """Free slots held past any possible attempt (e.g. a fire job that misfired)."""
+        max_hold = Config.PRE_SALE_OPEN_PAGE + Config.HYBRID_DETECT_TIMEOUT + Config.QUEUE_MAX_WAIT
+        now = get_clock().monotonic()
+        for task_id, holder in list(self._holders.items()):
+            if now - holder["since"] > max_hold:
+                logger.warning("Task %s held its grab slot for %.0fs, reclaiming it", task_id, now - holder["since"])
+                del self._holders[task_id]
+
+    def _schedule_dispatch(self) -> None:
+        """Admit new arrivals after a short settle window.
+
+        Every open_page job of a sale reaches ``acquire`` within a few
+        milliseconds; admitting each on arrival would hand out the free
+        slots in arrival order. Waiting ``GRAB_SLOT_SETTLE_MS`` lets them
+        all into the heap first, so priority decides.
+        """
+        if self._settle is not None:
+            return
+        delay = Config.GRAB_SLOT_SETTLE_MS / 1000 / get_clock().speed
+        self._settle = asyncio.get_running_loop().call_later(delay, self._settled)
+
+    def _settled(self) -> None:
+        self._settle = None
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Admit waiters, best first, while slots are free."""
+        if self._waiters and len(self._holders) >= self.capacity:
+            self._reclaim_stale()
+        while self._waiters and len(self._holders) < self.capacity:
+            neg_priority, _, task_id, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self._futures.pop(task_id, None)
+            self._queued.discard(task_id)
+            self._holders[task_id] = {"priority": -neg_priority, "since": get_clock().monotonic()}
+            self._stats["admitted"] += 1
+            future.set_result(True)
+            logger.info("Task %s got a grab slot (%d/%d in use)", task_id, len(self._holders), self.capacity)
+        if self._futures.keys() - self._queued:
+            waiting = self.waiting()
+            for task_id in self._futures.keys() - self._queued:
+                self._queued.add(task_id)
+                self._stats["waited"] += 1
+                logger.info("Task %s waits for a grab slot (position %d)", task_id, waiting.index(task_id) + 1)
+            self._stats["peak_waiting"] = max(self._stats["peak_waiting"], len(self._futures))
+        self._changed()
+
+    def _changed(self) -> None:
+        if self._on_change is None:
+            return
+        self._dirty = True
+        if self._notify_task and not self._notify_task.done():
+            return  # the running notifier picks this change up
+        try:
+            self._notify_task = asyncio.get_running_loop().create_task(self._emit())
+        except RuntimeError:
+            pass
+
+    async def _emit(self) -> None:
+        while self._dirty:
+            self._dirty = False
+            await asyncio.sleep(0)  # let a burst of changes settle
+            try:
+                await self._on_change(self.status())
+            except Exception:
+                logger.exception("Grab slot change callback failed")
+
+    def status(self) -> dict:
+        stats = self._stats
+        return {
+            "capacity": self.capacity,
+            "running": {task_id: holder["priority"] for task_id, holder in self._holders.items()},
+            "waiting": self.waiting(),
+            "admitted": stats["admitted"],
+            "waited": stats["waited"],
+            "timeouts": stats["timeouts"],
+            "avg_wait_ms": round(stats["wait_ms_total"] / stats["admitted"], 1) if stats["admitted"] else None,
+            "peak_waiting": stats["peak_waiting"],
+        }
+
+
+# Global singleton
+grab_slots = GrabSlots()
@@ -3,12 +3,18 @@ from __future__ import annotations
 import asyncio
 import logging
 import time
+from collections import deque
+from contextvars import ContextVar
 from pathlib import Path
 from typing import TYPE_CHECKING
 from urllib.parse import urlparse
 
 from app.config import Config, TimingConfig
+from app.event_urls import event_urls
 from app.models import GrabTask
+from app.request_filter import request_filter
+from app.screenshots import screenshots
+from app.selector_stats import selector_stats
 from app.timing import HumanTiming
 
 if TYPE_CHECKING:
@@ -19,6 +25,12 @@ logger = logging.getLogger(__name__)
 # Browser navigation constants
 BLANK_PAGE_URL = "about:blank"
 
+# Task statuses after which a task's grab page is no longer needed
+FINISHED_TASK_STATUSES = ("success", "failed", "cancelled")
+
+# Set by TicketGrabber.grab_detected for the grab it runs: {"at": perf_counter of the first click}
+_first_click: ContextVar[dict | None] = ContextVar("first_click", default=None)
+
 
 class BrowserManager:
     """Manages a persistent Playwright browser context for Eventim sessions."""
@@ -31,6 +43,30 @@ class BrowserManager:
         self._init_lock = asyncio.Lock()
         # Extract domain from config URL for consistency
         self._eventim_domain = self._extract_domain(Config.EVENTIM_LOGIN_URL)
+        # Warm pool of blank, fully set-up grab pages (see acquire_page)
+        self._pool: list[Page] = []
+        self._refill_task: asyncio.Task | None = None
+        self._page_stats = {"created": 0, "create_ms_total": 0.0, "create_ms_max": 0.0,
+                            "create_ms_last": 0.0, "pool_hits": 0, "pool_misses": 0}
+        # Registry of grab pages: page -> {"owner", "state", "created", "updated"}
+        # state: pooled (blank, in the pool) / active (borrowed by a task) /
+        # checkout (grab succeeded, left open for payment; never reaped)
+        self._pages: dict[Page, dict] = {}
+        self._page_memory: dict[Page, int] = {}  # last measured JS heap per page (bytes)
+        self._task_status = None  # callable(task_id) -> status, or None if the task is gone
+        self._on_session_event = None  # callable(reason): login/session changes worth a cookie sync
+        self._login_pages: set[Page] = set()
+        self._session_lock = asyncio.Lock()  # one session check at a time
+        self._reaper_task: asyncio.Task | None = None
+        self._reaped = 0
+        # Watchdog: crash/disconnect detection and background restarts
+        self._closing = False  # set while we close the context on purpose
+        self._restart_task: asyncio.Task | None = None
+        self._health_page: Page | None = None  # blank tab probed by is_alive, never used for work
+        self._check_failures = 0  # consecutive failed liveness checks
+        self._health = {"restarts": 0, "last_restart_reason": None, "last_restart_at": None,
+                        "last_restart_ms": None, "last_check_ok": None, "last_check_ms": None,
+                        "page_crashes": 0}
     
     @staticmethod
     def _extract_domain(url: str) -> str:
@@ -65,12 +101,7 @@ class BrowserManager:
 
             profile_dir = Path(Config.BROWSER_PROFILE_DIR).resolve()
             profile_dir.mkdir(parents=True, exist_ok=True)
-
-            # Remove stale SingletonLock from previous crashed browser
-            lock_file = profile_dir / "SingletonLock"
-            if lock_file.exists():
-                lock_file.unlink(missing_ok=True)
-                logger.warning("Removed stale SingletonLock from %s", profile_dir)
+            self._clear_singleton_lock(profile_dir)
 
             self._playwright = await async_playwright().start()
 
@@ -104,8 +135,23 @@ class BrowserManager:
             except ImportError:
                 logger.warning("playwright-stealth not installed, skipping stealth setup")
 
+            if request_filter.enabled:
+                # Learn resource sizes from every page, to estimate what filtered pages save
+                self._context.on("response", request_filter.learn)
+
+            # Watchdog: notice a dead browser or renderer right away
+            self._context.on("close", self._on_context_closed)
+            for page in self._context.pages:
+                page.on("crash", self._on_page_crash)
+            self._context.on("page", lambda p: p.on("crash", self._on_page_crash))
+
             self._initialized = True
             logger.info("Browser initialized with persistent profile at %s", profile_dir)
+            from app.grab_slots import grab_slots
+            grab_slots.set_page_budget(self.grab_page_budget)
+            self._schedule_refill()
+            if not self._reaper_task or self._reaper_task.done():
+                self._reaper_task = asyncio.create_task(self._reaper_loop())
 
     async def get_page(self) -> Page:
         """Get the main browser page, creating one if needed."""
@@ -113,7 +159,7 @@ class BrowserManager:
             await self.init_browser()
         
         try:
-            pages = self._context.pages
+            pages = self._user_pages()
             if pages:
                 return pages[0]
             page = await self._context.new_page()
@@ -126,9 +172,11 @@ class BrowserManager:
                 logger.warning("Browser context was closed, reinitializing...")
                 self._initialized = False
                 self._context = None
+                self._pool.clear()
+                self._pages.clear()
                 await self.init_browser()
                 # Retry once after reinitializing
-                pages = self._context.pages
+                pages = self._user_pages()
                 if pages:
                     return pages[0]
                 page = await self._context.new_page()
@@ -136,14 +184,21 @@ class BrowserManager:
                 return page
             raise
 
-    async def new_page(self) -> Page:
-        """Create a new browser tab."""
+    async def new_page(self, filtered: bool = False) -> Page:
+        """Create a new browser tab.
+
+        Args:
+            filtered: Route the tab through the request filter (grab pages
+                      only; a no-op unless REQUEST_FILTER_ENABLED).
+        """
         if not self._initialized:
             await self.init_browser()
         
         try:
             page = await self._context.new_page()
             await self._apply_stealth(page)
+            if filtered:
+                await request_filter.attach(page)
             return page
         except Exception as e:
             # Browser context was closed, reinitialize
@@ -152,13 +207,445 @@ class BrowserManager:
                 logger.warning("Browser context was closed, reinitializing...")
                 self._initialized = False
                 self._context = None
+                self._pool.clear()
+                self._pages.clear()
                 await self.init_browser()
                 # Retry once after reinitializing
                 page = await self._context.new_page()
                 await self._apply_stealth(page)
+                if filtered:
+                    await request_filter.attach(page)
                 return page
             raise
 
+    @staticmethod
+    def _clear_singleton_lock(profile_dir: Path) -> None:
+        """Remove a stale SingletonLock left by a browser that crashed or was killed.
+
+        Chromium's lock is a symlink to ``<host>-<pid>``, dangling once that
+        process is gone, so check the link itself rather than its target.
+        """
+        lock_file = profile_dir / "SingletonLock"
+        if lock_file.is_symlink() or lock_file.exists():
+            lock_file.unlink(missing_ok=True)
+            logger.warning("Removed stale SingletonLock from %s", profile_dir)
+
+    def _on_context_closed(self, context) -> None:
+        # Ignore our own close() and stale events from an already replaced context
+        if self._closing or context is not self._context:
+            return
+        logger.error("Browser context closed unexpectedly (crash or disconnect)")
+        self._initialized = False
+        self._schedule_restart("context closed")
+
+    def _on_page_crash(self, page: Page) -> None:
+        entry = self._pages.get(page)
+        self._health["page_crashes"] += 1
+        if page is self._health_page:
+            self._health_page = None  # the next check opens a fresh one
+        logger.error(
+            "Renderer crashed on %s page of task %s: %s",
+            entry["state"] if entry else "user", (entry or {}).get("owner") or "-", page.url,
+        )
+        if entry and entry["state"] == "pooled":
+            # Nobody is using it; replace it with a fresh one
+            asyncio.ensure_future(page.close())
+            self._forget_page(page)
+            self._schedule_refill()
+
+    def _schedule_restart(self, reason: str) -> None:
+        if self._restart_task and not self._restart_task.done():
+            return
+        self._restart_task = asyncio.create_task(self.restart(reason))
+
+    async def restart(self, reason: str) -> bool:
+        """Tear down the (dead) persistent context and launch a fresh one."""
+        start = time.perf_counter()
+        logger.warning("Restarting browser: %s", reason)
+        async with self._init_lock:
+            self._initialized = False
+            self._closing = True
+            try:
+                for task in (self._refill_task, self._reaper_task):
+                    if task and not task.done():
+                        task.cancel()
+                self._pool.clear()
+                self._pages.clear()
+                self._page_memory.clear()
+                self._health_page = None
+                if self._context:
+                    try:
+                        await asyncio.wait_for(self._context.close(), 5)
+                    except Exception:
+                        logger.debug("Closing dead context failed", exc_info=True)
+                    self._context = None
+                if self._playwright:
+                    try:
+                        await self._playwright.stop()
+                    except Exception:
+                        logger.debug("Stopping Playwright failed", exc_info=True)
+                    self._playwright = None
+            finally:
+                self._closing = False
+        try:
+            await self.init_browser()
+        except Exception:
+            logger.exception("Browser restart failed")
+            return False
+        elapsed = (time.perf_counter() - start) * 1000
+        self._health.update(
+            restarts=self._health["restarts"] + 1,
+            last_restart_reason=reason,
+            last_restart_at=time.time(),
+            last_restart_ms=round(elapsed, 1),
+        )
+        logger.info("Browser restarted in %.1fms", elapsed)
+        self._session_event("browser restart")
+        return True
+
+    async def is_alive(self, timeout: float = 2.0) -> bool:
+        """Cheap liveness check: one round trip to the browser and one to a renderer.
+
+        The renderer probed is a dedicated blank tab, so a task page busy
+        with a heavy event page can't fail the check.
+        """
+        if not self._initialized or not self._context:
+            return False
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._context.cookies(Config.EVENTIM_BASE_URL), timeout)
+            if self._health_page is None or self._health_page.is_closed():
+                self._health_page = await asyncio.wait_for(self._context.new_page(), timeout)
+            await asyncio.wait_for(self._health_page.evaluate("() => 1"), timeout)
+            ok = True
+        except Exception as e:
+            logger.warning("Browser liveness check failed: %r", e)
+            ok = False
+        self._health["last_check_ok"] = ok
+        self._health["last_check_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return ok
+
+    async def ensure_healthy(self) -> bool:
+        """Start the browser if needed, or restart it if it keeps failing the liveness check.
+
+        A crash or disconnect restarts the browser right away (see
+        ``_on_context_closed``); a slow check alone only does so after
+        BROWSER_HEALTH_FAILURES in a row, since a restart closes every
+        page. Waits for any restart already in progress.
+        """
+        if self._restart_task and not self._restart_task.done():
+            return await self._restart_task
+        if not self._initialized:
+            await self.init_browser()
+            return True
+        while not await self.is_alive():
+            if self._restart_task and not self._restart_task.done():
+                return await self._restart_task  # the context closed meanwhile
+            if not self._initialized:
+                await self.init_browser()
+                return True
+            self._check_failures += 1
+            if self._check_failures >= Config.BROWSER_HEALTH_FAILURES:
+                self._check_failures = 0
+                self._schedule_restart(f"{Config.BROWSER_HEALTH_FAILURES} liveness checks failed")
+                return await self._restart_task
+        self._check_failures = 0
+        return True
+
+    async def prewarm(self, url: str, timeout: float = 5.0) -> float | None:
+        """Resolve and connect to ``url``'s origin ahead of opening the page.
+
+        Fires a no-cors fetch from a blank pooled page. Best effort: the DNS
+        cache is shared by all tabs, but Chromium partitions connections by
+        top-level site, so the TLS connection itself may not be reused by
+        the event page. Returns the time taken in ms, or None if skipped.
+        """
+        page = next((p for p in self._pool if not p.is_closed()), None)
+        if page is None:
+            return None
+        origin = "{0.scheme}://{0.netloc}/".format(urlparse(url))
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(page.evaluate(
+                "(url) => fetch(url, {mode: 'no-cors', credentials: 'include'}).then(() => true, () => false)",
+                origin,
+            ), timeout)
+        except Exception:
+            logger.debug("Prewarm of %s failed", origin, exc_info=True)
+            return None
+        return (time.perf_counter() - start) * 1000
+
+    def health_status(self) -> dict:
+        return {
+            **self._health,
+            "restarting": bool(self._restart_task and not self._restart_task.done()),
+        }
+
+    def _user_pages(self) -> list[Page]:
+        """Open tabs that aren't grab pages (login, session checks, the user's own)."""
+        return [p for p in self._context.pages if p not in self._pages and p is not self._health_page]
+
+    def _track(self, page: Page, state: str, owner: str | None = None) -> None:
+        """Record a grab page's state (and owner task) in the page registry."""
+        now = time.monotonic()
+        entry = self._pages.get(page)
+        if entry is None:
+            entry = self._pages[page] = {"owner": "", "state": state, "created": now, "updated": now}
+            page.on("close", self._forget_page)
+        entry["state"] = state
+        entry["updated"] = now
+        if owner is not None:
+            entry["owner"] = owner
+
+    def _forget_page(self, page: Page) -> None:
+        entry = self._pages.pop(page, None)
+        self._page_memory.pop(page, None)
+        if page in self._pool:
+            self._pool.remove(page)
+        if entry and entry["state"] == "checkout":
+            from app.grab_slots import grab_slots
+            grab_slots.capacity_changed()  # its tab is free for grabs again
+
+    def grab_page_budget(self) -> int:
+        """Tabs grabs may use: the tab budget minus the pool and tabs kept open for other uses.
+
+        Checkout pages stay open for payment, and the user's tabs and the
+        health tab count against BROWSER_MAX_PAGES like any other.
+        """
+        kept = sum(entry["state"] == "checkout" for entry in self._pages.values())
+        if self._context:
+            kept += len(self._user_pages()) + (self._health_page is not None)
+        return Config.BROWSER_MAX_PAGES - Config.PAGE_POOL_SIZE - kept
+
+    def set_task_status_lookup(self, lookup) -> None:
+        """Set ``lookup(task_id) -> status | None`` used to reap pages of finished tasks."""
+        self._task_status = lookup
+
+    def set_on_session_event(self, callback) -> None:
+        """Set callback for session events: fn(reason), called synchronously."""
+        self._on_session_event = callback
+
+    def _session_event(self, reason: str) -> None:
+        if self._on_session_event:
+            self._on_session_event(reason)
+
+    def _watch_login_page(self, page: Page) -> None:
+        """Report main-frame navigations of the login page (logging in redirects)."""
+        if page in self._login_pages:
+            return
+        self._login_pages.add(page)
+        page.on("framenavigated", lambda frame: frame == page.main_frame and self._session_event("login navigation"))
+        page.on("close", lambda p: self._login_pages.discard(p))
+
+    def mark_checkout(self, page: Page) -> None:
+        """The grab on ``page`` succeeded: keep it open for payment, never reap it."""
+        self._track(page, "checkout")
+
+    def mark_queued(self, page: Page, queued: bool = True) -> None:
+        """``page`` sits in a waiting room: exempt from the idle TTL until it is released."""
+        self._track(page, "queued" if queued else "active")
+
+    async def _create_grab_page(self) -> Page:
+        """Create a grab page ready to navigate: stealth, request filter, live renderer."""
+        start = time.perf_counter()
+        page = await self.new_page(filtered=True)
+        self._track(page, "pooled")
+        await page.evaluate("() => 0")
+        elapsed = (time.perf_counter() - start) * 1000
+        stats = self._page_stats
+        stats["created"] += 1
+        stats["create_ms_total"] += elapsed
+        stats["create_ms_max"] = max(stats["create_ms_max"], elapsed)
+        stats["create_ms_last"] = elapsed
+        if Config.DEBUG_MODE:
+            logger.info("  → Grab page created (took %.1fms)", elapsed)
+        return page
+
+    def _schedule_refill(self) -> None:
+        if Config.PAGE_POOL_SIZE <= 0 or (self._refill_task and not self._refill_task.done()):
+            return
+        self._refill_task = asyncio.create_task(self._refill_pool())
+
+    async def _refill_pool(self) -> None:
+        try:
+            while (
+                self._initialized
+                and len(self._pool) < Config.PAGE_POOL_SIZE
+                and len(self._context.pages) < Config.BROWSER_MAX_PAGES
+                and not self._over_memory_limit()
+            ):
+                self._pool.append(await self._create_grab_page())
+        except Exception:
+            logger.exception("Failed to refill page pool")
+
+    async def acquire_page(self, owner: str = "") -> Page:
+        """Borrow a grab page for task ``owner``: pooled if one is ready, else created on the spot.
+
+        The pool is refilled in the background either way, so page
+        creation stays off the critical path of the next grab.
+        """
+        if not self._initialized:
+            await self.init_browser()
+
+        page = None
+        while self._pool:
+            candidate = self._pool.pop(0)
+            if not candidate.is_closed():
+                page = candidate
+                break
+        if page is not None:
+            self._page_stats["pool_hits"] += 1
+        else:
+            self._page_stats["pool_misses"] += 1
+            if len(self._context.pages) >= Config.BROWSER_MAX_PAGES:
+                await self.reap_pages()
+            page = await self._create_grab_page()
+        self._track(page, "active", owner)
+        self._schedule_refill()
+        return page
+
+    async def release_page(self, page: Page) -> None:
+        """Give back a borrowed page whose grab is over (not one left open for payment).
+
+        It goes back to the pool as a blank page if there is room,
+        otherwise it is closed.
+        """
+        if page is None or page.is_closed():
+            return
+        # Let pending debug captures of this page finish first
+        await screenshots.drain_page(page)
+        try:
+            if self._initialized and len(self._pool) < Config.PAGE_POOL_SIZE and not self._over_memory_limit():
+                await page.goto(BLANK_PAGE_URL)
+                self._track(page, "pooled", owner="")
+                self._pool.append(page)
+            else:
+                await page.close()
+        except Exception:
+            logger.debug("Could not release page", exc_info=True)
+
+    def _over_memory_limit(self) -> bool:
+        return sum(self._page_memory.values()) > Config.BROWSER_MEMORY_LIMIT_MB * 1024 * 1024
+
+    async def _measure_memory(self) -> None:
+        """Sample each tab's renderer JS heap via CDP ``Performance.getMetrics``."""
+        for page in list(self._context.pages):
+            try:
+                cdp = await self._context.new_cdp_session(page)
+                try:
+                    await cdp.send("Performance.enable")
+                    metrics = await cdp.send("Performance.getMetrics")
+                finally:
+                    await cdp.detach()
+                heap = next((m["value"] for m in metrics["metrics"] if m["name"] == "JSHeapUsedSize"), 0)
+                self._page_memory[page] = int(heap)
+            except Exception:
+                logger.debug("Could not read page metrics", exc_info=True)
+
+    def _is_reapable(self, entry: dict, now: float) -> bool:
+        """An active page nobody will use again: its task finished or is gone, or it went stale.
+
+        Queued pages only go when their task does; waiting rooms can take longer than the TTL.
+        """
+        if entry["state"] not in ("active", "queued"):
+            return False
+        if entry["state"] == "active" and now - entry["updated"] > Config.PAGE_ACTIVE_TTL:
+            return True
+        if self._task_status and entry["owner"]:
+            status = self._task_status(entry["owner"])
+            return status is None or status in FINISHED_TASK_STATUSES
+        return False
+
+    async def reap_pages(self) -> int:
+        """Close leaked grab pages and enforce the page and memory caps.
+
+        Checkout pages, pages of running tasks and the user's own tabs are
+        never closed. Returns the number of pages closed.
+        """
+        if not self._initialized or not self._context:
+            return 0
+        now = time.monotonic()
+        doomed = [p for p, entry in self._pages.items() if self._is_reapable(entry, now)]
+
+        # Over a cap: give up pooled pages too (they are recreated on demand)
+        over_pages = len(self._context.pages) - len(doomed) - Config.BROWSER_MAX_PAGES
+        if over_pages > 0 or self._over_memory_limit():
+            spare = [p for p in self._pool if p not in doomed]
+            doomed += spare if self._over_memory_limit() else spare[:over_pages]
+
+        for page in doomed:
+            entry = self._pages.get(page, {})
+            logger.info(
+                "Reaping %s page of task %s (age %.0fs)",
+                entry.get("state", "?"), entry.get("owner") or "-", now - entry.get("created", now),
+            )
+            try:
+                await page.close()
+            except Exception:
+                logger.debug("Could not close page", exc_info=True)
+            self._forget_page(page)
+        self._reaped += len(doomed)
+
+        if len(self._context.pages) > Config.BROWSER_MAX_PAGES:
+            logger.warning(
+                "Browser has %d pages (max %d) that can't be reaped: checkout or running grabs",
+                len(self._context.pages), Config.BROWSER_MAX_PAGES,
+            )
+        if self._over_memory_limit():
+            logger.warning(
+                "Browser JS heap %.0f MB is over the %d MB limit",
+                sum(self._page_memory.values()) / 1024 / 1024, Config.BROWSER_MEMORY_LIMIT_MB,
+            )
+        return len(doomed)
+
+    async def _reaper_loop(self) -> None:
+        while self._initialized:
+            await asyncio.sleep(Config.PAGE_REAP_INTERVAL)
+            try:
+                await self._measure_memory()
+                await self.reap_pages()
+            except Exception:
+                logger.exception("Page reaper failed")
+
+    def page_report(self) -> dict:
+        """Page count, renderer memory and registry entries for the status API."""
+        if not self._initialized or not self._context:
+            return {"count": 0, "max_pages": Config.BROWSER_MAX_PAGES, "pages": []}
+        now = time.monotonic()
+        by_state = {"user": len(self._user_pages())}
+        pages = []
+        for page, entry in self._pages.items():
+            by_state[entry["state"]] = by_state.get(entry["state"], 0) + 1
+            pages.append({
+                "owner": entry["owner"],
+                "state": entry["state"],
+                "age_s": round(now - entry["created"]),
+                "url": page.url,
+                "js_heap_mb": round(self._page_memory.get(page, 0) / 1024 / 1024, 1),
+            })
+        return {
+            "count": len(self._context.pages),
+            "max_pages": Config.BROWSER_MAX_PAGES,
+            "by_state": by_state,
+            "js_heap_mb": round(sum(self._page_memory.values()) / 1024 / 1024, 1),
+            "memory_limit_mb": Config.BROWSER_MEMORY_LIMIT_MB,
+            "reaped": self._reaped,
+            "pages": pages,
+        }
+
+    def pool_status(self) -> dict:
+        stats = self._page_stats
+        return {
+            "size": Config.PAGE_POOL_SIZE,
+            "ready": len(self._pool),
+            "created": stats["created"],
+            "pool_hits": stats["pool_hits"],
+            "pool_misses": stats["pool_misses"],
+            "create_ms_avg": round(stats["create_ms_total"] / stats["created"], 1) if stats["created"] else None,
+            "create_ms_max": round(stats["create_ms_max"], 1),
+            "create_ms_last": round(stats["create_ms_last"], 1),
+        }
+
     async def open_login_page(self) -> bool:
         """Open Eventim login page for manual user login.
         
@@ -174,7 +661,7 @@ class BrowserManager:
                 return False
             
             # Check if we already have pages open
-            pages = self._context.pages
+            pages = self._user_pages()
             if pages:
                 # Get the first page and bring it to front
                 page = pages[0]
@@ -201,7 +688,8 @@ class BrowserManager:
                 await self._apply_stealth(page)
                 await page.goto(Config.EVENTIM_LOGIN_URL, wait_until="domcontentloaded")
                 logger.info("Created new page and opened Eventim login page")
-            
+
+            self._watch_login_page(page)
             return True
         except Exception:
             logger.exception("Failed to open login page")
@@ -229,60 +717,77 @@ class BrowserManager:
     async def check_session(self) -> dict:
         """Check if the current Eventim session is valid.
         
-        Avoids unnecessary page reloads by checking the current page first.
-        Only navigates if on about:blank or if session status cannot be determined.
+        Reads an open Eventim tab as it is; otherwise loads the login page in
+        a tab of its own, so the user's tabs are never navigated. Concurrent
+        calls wait for each other rather than loading it twice.
         """
+        async with self._session_lock:
+            status = await self._read_session()
+        if self._initialized:
+            self._session_event("session check")
+        return status
+
+    async def _read_session(self) -> dict:
         try:
             if not self._initialized:
                 return {"logged_in": False, "message": "Browser not started"}
 
-            page = await self.get_page()
-            current_url = page.url
-            
-            # If on about:blank, navigate to Eventim to check session
-            if current_url == BLANK_PAGE_URL:
-                await page.goto(Config.EVENTIM_LOGIN_URL, wait_until="domcontentloaded")
-                page_wait = HumanTiming.get_page_wait(1000)
-                await page.wait_for_timeout(page_wait)
-                current_url = page.url
-                logger.info("Navigated from blank page to check session")
-            # If already on Eventim domain, check status from current page without reload
-            elif self._is_eventim_domain(current_url):
+            # An Eventim tab the user has open already shows the session; read it without reload
+            page = next((p for p in self._user_pages() if self._is_eventim_domain(p.url)), None)
+            if page is not None:
                 logger.info("Checking session status from current Eventim page (no reload)")
-            else:
-                # On a different domain, navigate to Eventim to check session
+                return await self._session_from_page(page)
+
+            page = await self._context.new_page()
+            try:
+                await self._apply_stealth(page)
                 await page.goto(Config.EVENTIM_LOGIN_URL, wait_until="domcontentloaded")
                 page_wait = HumanTiming.get_page_wait(1000)
                 await page.wait_for_timeout(page_wait)
-                current_url = page.url
-                logger.info("Navigated from different domain to check session")
-            
-            # Now check login status from the current page
-            url = current_url
-            if "/login" in url.lower() or "/signin" in url.lower():
-                return {"logged_in": False, "message": "Not logged in"}
+                logger.info("Checked session in a separate tab")
+                return await self._session_from_page(page)
+            finally:
+                await page.close()
+        except Exception as e:
+            logger.exception("Failed to check session")
+            return {"logged_in": False, "message": str(e)}
 
-            try:
-                account_el = await page.query_selector(
-                    '[class*="account"], [class*="user"], [class*="profile"]'
-                )
-                if account_el:
-                    return {"logged_in": True, "message": "Session active"}
-            except Exception:
-                pass
+    @staticmethod
+    async def _session_from_page(page: Page) -> dict:
+        url = page.url
+        if "/login" in url.lower() or "/signin" in url.lower():
+            return {"logged_in": False, "message": "Not logged in"}
 
-            if "myaccount" in url.lower() or "account" in url.lower():
+        try:
+            account_el = await page.query_selector(
+                '[class*="account"], [class*="user"], [class*="profile"]'
+            )
+            if account_el:
                 return {"logged_in": True, "message": "Session active"}
+        except Exception:
+            pass
 
-            return {"logged_in": False, "message": "Session status unclear"}
-        except Exception as e:
-            logger.exception("Failed to check session")
-            return {"logged_in": False, "message": str(e)}
+        if "myaccount" in url.lower() or "account" in url.lower():
+            return {"logged_in": True, "message": "Session active"}
+
+        return {"logged_in": False, "message": "Session status unclear"}
 
     async def close(self) -> None:
         """Close the browser and cleanup."""
+        for task in (self._refill_task, self._reaper_task, self._restart_task):
+            if task and not task.done():
+                task.cancel()
+        self._pool.clear()
+        self._pages.clear()
+        self._page_memory.clear()
+        self._login_pages.clear()
+        self._health_page = None
         if self._context:
-            await self._context.close()
+            self._closing = True
+            try:
+                await self._context.close()
+            finally:
+                self._closing = False
             self._context = None
         if self._playwright:
             await self._playwright.stop()
@@ -294,13 +799,48 @@ class BrowserManager:
     def is_initialized(self) -> bool:
         return self._initialized
 
+    @property
+    def context(self):
+        """The persistent browser context, or None while the browser is down."""
+        return self._context
+
 
 class TicketGrabber:
     """Automates the ticket purchasing flow on Eventim using Playwright."""
 
     # Timing constants for smart waits and interactions
     SMART_WAIT_TIMEOUT_MS = 3000  # Maximum time to wait for expected elements/navigation
-    SMART_WAIT_FALLBACK_MS = 1500  # Fallback delay if smart wait times out
+    # Fixed delays (fed through HumanTiming.get_page_wait) the flow slept
+    # before readiness waits replaced them; only used as the baseline of the
+    # time-saved report. Saved time is negative where the old delay let the
+    # flow continue before the page was actually ready.
+    LEGACY_PAGE_WAIT_MS = 1000
+    SMART_WAIT_FALLBACK_MS = 1500
+    MAX_DETECTIONS = 100  # hybrid detection records kept for the report
+    MAX_QUEUE_PASSES = 3  # waiting rooms passed within one purchase attempt
+
+    # Resolves once the condition (substituted for %s) holds: re-checked on
+    # every DOM mutation and readystatechange, which background tabs don't
+    # throttle the way they throttle animation frames and timers. The
+    # interval only catches URL-only changes (pushState), which mutate nothing.
+    JS_WAIT_UNTIL = """([arg, timeout]) => new Promise((resolve) => {
+        const condition = %s;
+        const holds = () => { try { return !!condition(arg); } catch (e) { return false; } };
+        if (holds()) return resolve(true);
+        const finish = (ready) => {
+            observer.disconnect();
+            document.removeEventListener('readystatechange', check);
+            clearInterval(interval);
+            clearTimeout(timer);
+            resolve(ready);
+        };
+        const check = () => { if (holds()) finish(true); };
+        const observer = new MutationObserver(check);
+        observer.observe(document, {childList: true, subtree: true, attributes: true});
+        document.addEventListener('readystatechange', check);
+        const interval = setInterval(check, 100);
+        const timer = setTimeout(() => finish(false), timeout);
+    })"""
 
     # JavaScript function to detect cart/checkout navigation
     JS_WAIT_FOR_CART = """() => {
@@ -326,6 +866,62 @@ class TicketGrabber:
                document.querySelector('[class*="checkout"]');
     }"""
 
+    # JavaScript function to detect that a (re)loaded event page can be acted
+    # on: already on the cart, stepper/cart button or consent banner rendered,
+    # or loading finished with a ticket link in place
+    JS_WAIT_FOR_INTERACTIVE = """() => {
+        const url = window.location.href.toLowerCase();
+        if (url.includes('cart') || url.includes('warenkorb') ||
+            url.includes('basket') || url.includes('checkout')) return true;
+        if (/queue-it\.net|waitingroom|waiting-room|warteraum/.test(url)) return true;
+        if (document.querySelector('button.js-stepper-action, button.js-stepper-more, [data-qa="more-tickets"]') ||
+            document.querySelector('#cmpbntyestxt, #onetrust-accept-btn-handler')) return true;
+        return document.readyState === 'complete' &&
+               Array.from(document.querySelectorAll('a, button')).some(
+                   b => /tickets|karten/i.test(b.textContent || ''));
+    }"""
+
+    # JavaScript function to detect a virtual waiting room (Queue-it or an
+    # Eventim interstitial) by URL, DOM and text; returns null on a normal
+    # page, else the signal that matched and whatever progress is shown.
+    # Text alone only counts on pages without purchase controls.
+    JS_DETECT_QUEUE = """() => {
+        const url = window.location.href.toLowerCase();
+        const urlHit = /queue-it\.net|waitingroom|waiting-room|warteraum|[/?&]queue/.test(url);
+        const domHit = !!document.querySelector(
+            '#MainPart_lbQueueNumber, #lbQueueNumber, #queue-it_log, [class*="queue-it"], #MainPart_divProgressbar');
+        const text = ((document.body && document.body.innerText) || '').slice(0, 5000).toLowerCase();
+        const buyable = !!document.querySelector('button.js-stepper-action, button.js-stepper-more');
+        const textHit = !buyable &&
+            /warteschlange|warteraum|waiting room|you are (now )?in line|ihre wartenummer/.test(text);
+        if (!urlHit && !domHit && !textHit) return null;
+        const pick = sel => {
+            const el = document.querySelector(sel);
+            return el ? el.textContent.trim() || null : null;
+        };
+        let progress = null;
+        const bar = document.querySelector('#MainPart_divProgressbar_Progress, [role="progressbar"]');
+        if (bar) {
+            const value = bar.getAttribute('aria-valuenow') || (bar.style.width || '').replace('%', '');
+            progress = value ? parseFloat(value) : null;
+        }
+        return {
+            signal: urlHit ? 'url' : domHit ? 'dom' : 'text',
+            position: pick('#MainPart_lbQueueNumber, #lbQueueNumber'),
+            ahead: pick('#MainPart_lbUsersInLineAheadOfYou, #lbUsersInLineAheadOfYou'),
+            wait: pick('#MainPart_lbWhichIsIn, #lbWhichIsIn'),
+            progress: Number.isFinite(progress) ? progress : null,
+        };
+    }"""
+
+    # JavaScript function to detect the page after a buy click settled:
+    # URL changed, or a continue/confirm button rendered
+    JS_WAIT_FOR_NEXT_STEP = """(prevUrl) => {
+        if (window.location.href !== prevUrl) return true;
+        return Array.from(document.querySelectorAll('button, a')).some(
+            b => /continue|weiter|next|proceed|fortfahren|confirm|bestätigen/i.test(b.textContent || ''));
+    }"""
+
     # JavaScript function to detect ticket purchase elements
     JS_WAIT_FOR_TICKET_ELEMENTS = """() => {
         return document.querySelector('button.js-stepper-action') ||
@@ -334,16 +930,129 @@ class TicketGrabber:
                 Array.from(document.querySelectorAll('button')).some(b => b.textContent.includes('Ticket')));
     }"""
 
+    # Candidate elements per flow step, checked by JS_PAGE_PROBE in one
+    # round trip. Each entry is (key, css, text, exclude): ``text`` is a
+    # case-insensitive substring the element's text must contain (mirrors
+    # Playwright's :has-text), ``exclude`` a regex its text must not match.
+    # ``key`` is the equivalent Playwright selector, used for logging.
+    PROBE_CANDIDATES = {
+        "consent": [
+            ('#cmpbntyestxt', '#cmpbntyestxt', None, None),  # common Eventim consent button ID
+            ('button[id*="consent"]', 'button[id*="consent"]', None, None),
+            ('button[id*="accept"]', 'button[id*="accept"]', None, None),
+            ('button:has-text("Accept")', 'button', 'Accept', None),
+            ('button:has-text("Akzeptieren")', 'button', 'Akzeptieren', None),
+            ('button:has-text("Accept All")', 'button', 'Accept All', None),
+            ('button:has-text("Alle akzeptieren")', 'button', 'Alle akzeptieren', None),
+            ('button:has-text("Agree")', 'button', 'Agree', None),
+            ('button:has-text("OK")', 'button', 'OK', None),
+            ('[class*="consent"] button', '[class*="consent"] button', None, None),
+            ('[class*="cookie"] button', '[class*="cookie"] button', None, None),
+            ('#onetrust-accept-btn-handler', '#onetrust-accept-btn-handler', None, None),
+        ],
+        "quantity": [
+            ('button.js-stepper-more', 'button.js-stepper-more', None, None),  # Eventim "+" button
+            ('[data-qa="more-tickets"]', '[data-qa="more-tickets"]', None, None),
+            ('button[title*="Increase"]', 'button[title*="Increase"], button[title*="ncrease"]', None, None),
+        ],
+        "buy": [
+            # Only click the cart button once tickets are selected (not "0 Tickets")
+            ('button.js-stepper-action', 'button.js-stepper-action', None, r'(^|\D)0 Ticket'),
+            ('button:has-text("Ticket")', 'button', 'Ticket', r'(^|\D)0 Ticket'),
+            ('button:has-text("In den Warenkorb")', 'button', 'In den Warenkorb', None),
+            ('button:has-text("Add to cart")', 'button', 'Add to cart', None),
+            ('button:has-text("Add to basket")', 'button', 'Add to basket', None),
+            ('button:has-text("Buy tickets")', 'button', 'Buy tickets', None),
+            ('button:has-text("Buy now")', 'button', 'Buy now', None),
+            ('button:has-text("Kaufen")', 'button', 'Kaufen', None),
+        ],
+        "ticket_link": [
+            ('a:has-text("Tickets")', 'a', 'Tickets', None),
+            ('a:has-text("Karten")', 'a', 'Karten', None),
+            ('a:has-text("Book")', 'a', 'Book', None),
+            ('button:has-text("Tickets")', 'button', 'Tickets', None),
+            ('button:has-text("Karten")', 'button', 'Karten', None),
+            ('[class*="ticket-button"]', '[class*="ticket-button"]', None, None),
+            ('[class*="ticketButton"]', '[class*="ticketButton"]', None, None),
+            ('a[href*="ticket"]', 'a[href*="ticket"]', None, None),
+        ],
+        "continue": [
+            ('button:has-text("Continue")', 'button', 'Continue', None),
+            ('button:has-text("Weiter")', 'button', 'Weiter', None),
+            ('button:has-text("Next")', 'button', 'Next', None),
+            ('button:has-text("Proceed")', 'button', 'Proceed', None),
+            ('button:has-text("Fortfahren")', 'button', 'Fortfahren', None),
+            ('a:has-text("Continue")', 'a', 'Continue', None),
+            ('a:has-text("Weiter")', 'a', 'Weiter', None),
+            ('button:has-text("Accept")', 'button', 'Accept', None),
+            ('button:has-text("Confirm")', 'button', 'Confirm', None),
+            ('button:has-text("Bestätigen")', 'button', 'Bestätigen', None),
+        ],
+    }
+    PURCHASE_STEPS = ("consent", "quantity", "buy", "ticket_link")
+
+    # JavaScript page-state probe: checks every candidate of the requested
+    # steps at once and marks the first visible match of each step with a
+    # data-btb-<step> attribute, so acting on it costs a single lookup.
+    JS_PAGE_PROBE = """(groups) => {
+        const visible = (el) => {
+            const r = el.getBoundingClientRect();
+            if (!r.width || !r.height) return false;
+            const st = window.getComputedStyle(el);
+            return st.visibility !== 'hidden' && st.display !== 'none';
+        };
+        const label = (el) => (el.innerText || el.textContent || '').trim().slice(0, 120);
+        const out = {url: window.location.href};
+        for (const [step, candidates] of Object.entries(groups)) {
+            const attr = 'data-btb-' + step;
+            document.querySelectorAll('[' + attr + ']').forEach(el => el.removeAttribute(attr));
+            out[step] = null;
+            for (const [key, css, text, exclude] of candidates) {
+                let els;
+                try { els = document.querySelectorAll(css); } catch (e) { continue; }
+                const needle = text ? text.toLowerCase() : null;
+                const skip = exclude ? new RegExp(exclude, 'i') : null;
+                const el = Array.from(els).find(e => {
+                    if (!visible(e)) return false;
+                    const t = e.textContent || '';
+                    return (!needle || t.toLowerCase().includes(needle)) && !(skip && skip.test(t));
+                });
+                if (el) {
+                    el.setAttribute(attr, '');
+                    out[step] = {key: key, text: label(el)};
+                    break;
+                }
+            }
+        }
+        const cart = document.querySelector('button.js-stepper-action');
+        out.cart_label = cart ? label(cart) : null;
+        out.stepper_rows = Array.from(document.querySelectorAll('button.js-stepper-more')).filter(visible).length;
+        out.ticket_links = Array.from(document.querySelectorAll('a[href*="ticket"]')).filter(visible).length;
+        return out;
+    }"""
+
     def __init__(self, browser_manager: BrowserManager):
         self.browser = browser_manager
         self._last_mouse_x = 640.0  # Start at viewport center
         self._last_mouse_y = 450.0
+        # step -> {"count", "wait_ms", "saved_ms", "timeouts"}
+        self._wait_stats: dict[str, dict] = {}
+        # Hybrid grabs: HTTP detection -> first click in the DOM flow
+        self._detections: deque[dict] = deque(maxlen=self.MAX_DETECTIONS)
+        self._queue_stats = {"entered": 0, "released": 0, "timed_out": 0, "wait_s_total": 0.0}
+
+    @staticmethod
+    def _mark_click() -> None:
+        mark = _first_click.get()
+        if mark is not None and "at" not in mark:
+            mark["at"] = time.perf_counter()
 
     async def _human_click(self, page, element) -> None:
         """Move mouse to element with human-like trajectory, then click."""
         try:
             box = await element.bounding_box()
             if not box:
+                self._mark_click()
                 await element.click()
                 return
             
@@ -365,6 +1074,7 @@ class TicketGrabber:
                 move_delay = HumanTiming.get_mouse_move_delay()
                 await page.wait_for_timeout(move_delay)
             
+            self._mark_click()
             await page.mouse.click(target_x, target_y)
             
             # Track mouse position for next click
@@ -372,12 +1082,219 @@ class TicketGrabber:
             self._last_mouse_y = target_y
         except Exception:
             # Fallback to simple click if mouse movement fails
+            self._mark_click()
             await element.click()
 
+    async def _wait_ready(
+        self, page, condition: str, step: str, arg=None, baseline_ms: float | None = None,
+    ) -> float:
+        """Wait until ``condition`` holds on the page, at most SMART_WAIT_TIMEOUT_MS.
+
+        The condition is re-evaluated on every DOM mutation (JS_WAIT_UNTIL),
+        and again once a navigation has replaced the document, so the flow
+        continues the moment the page is ready instead of after a fixed
+        delay, even in a background tab. There is no
+        extra fallback sleep on timeout; the next probe decides what to do.
+
+        ``baseline_ms`` is the fixed delay this wait replaces (default: the
+        old smart-wait fallback on timeout) and is only used for reporting.
+        Returns the time waited in ms.
+        """
+        start = time.perf_counter()
+        deadline = start + self.SMART_WAIT_TIMEOUT_MS / 1000
+        script = self.JS_WAIT_UNTIL % condition
+        timed_out = False
+        while True:
+            remaining_ms = (deadline - time.perf_counter()) * 1000
+            if remaining_ms <= 0:
+                timed_out = True
+                break
+            try:
+                # The page times itself out; the margin covers a hung renderer
+                ready = await asyncio.wait_for(page.evaluate(script, [arg, remaining_ms]), remaining_ms / 1000 + 0.5)
+                timed_out = not ready
+                break
+            except asyncio.TimeoutError:
+                timed_out = True
+                break
+            except Exception as e:
+                error = str(e).lower()
+                if "timeout" in error:
+                    timed_out = True
+                    break
+                if "destroyed" not in error and "navigat" not in error:
+                    logger.debug("Readiness wait for %s failed: %s", step, e)
+                    break
+                # Execution context destroyed by a navigation: wait for the
+                # new document, then evaluate again
+                try:
+                    await page.wait_for_load_state("domcontentloaded", timeout=remaining_ms)
+                except Exception:
+                    pass
+
+        waited_ms = (time.perf_counter() - start) * 1000
+        if baseline_ms is None:
+            baseline_ms = waited_ms
+            if timed_out:
+                baseline_ms += HumanTiming.get_page_wait(self.SMART_WAIT_FALLBACK_MS)
+        self._record_wait(step, waited_ms, baseline_ms, timed_out)
+        return waited_ms
+
+    def _record_wait(self, step: str, waited_ms: float, baseline_ms: float, timed_out: bool) -> None:
+        stats = self._wait_stats.setdefault(step, {"count": 0, "wait_ms": 0.0, "saved_ms": 0.0, "timeouts": 0})
+        stats["count"] += 1
+        stats["wait_ms"] += waited_ms
+        stats["saved_ms"] += baseline_ms - waited_ms
+        stats["timeouts"] += int(timed_out)
+        if Config.DEBUG_MODE:
+            logger.info(
+                "  → %s ready after %.1fms (saved %.1fms)%s",
+                step, waited_ms, baseline_ms - waited_ms, " [timed out]" if timed_out else "",
+            )
+
+    async def _wait_page_interactive(self, page) -> float:
+        """Readiness wait after goto/reload, replacing the fixed page wait."""
+        return await self._wait_ready(
+            page, self.JS_WAIT_FOR_INTERACTIVE, "page_load",
+            baseline_ms=HumanTiming.get_page_wait(self.LEGACY_PAGE_WAIT_MS),
+        )
+
+    def get_wait_report(self) -> dict:
+        """Per-step readiness wait totals and average time saved vs fixed waits."""
+        return {
+            step: {
+                "count": stats["count"],
+                "timeouts": stats["timeouts"],
+                "avg_wait_ms": round(stats["wait_ms"] / stats["count"], 1),
+                "avg_saved_ms": round(stats["saved_ms"] / stats["count"], 1),
+                "total_saved_ms": round(stats["saved_ms"], 1),
+            }
+            for step, stats in self._wait_stats.items()
+        }
+
+    async def _detect_queue(self, page, default: dict | None = None) -> dict | None:
+        """Waiting-room info if ``page`` is in a queue, else None (``default`` if it can't be evaluated)."""
+        try:
+            return await page.evaluate(self.JS_DETECT_QUEUE)
+        except Exception as e:
+            logger.debug("Queue detection failed: %s", e)
+            return default
+
+    @staticmethod
+    def _queue_message(queue: dict) -> str:
+        parts = ["In Eventim waiting room"]
+        if queue.get("position"):
+            parts.append(f"number {queue['position']}")
+        if queue.get("ahead"):
+            parts.append(f"{queue['ahead']} ahead")
+        if queue.get("wait"):
+            parts.append(f"est. {queue['wait']}")
+        if queue.get("progress") is not None:
+            parts.append(f"{queue['progress']:.0f}%")
+        return ", ".join(parts)
+
+    async def _wait_in_queue(self, page, report, queue: dict) -> bool:
+        """Sit in the waiting room without reloading, until it lets us through.
+
+        Reloading would give up the queue position, so this only watches:
+        main-frame navigations wake it immediately, and the page is
+        re-checked every ``QUEUE_POLL_INTERVAL`` seconds for progress, which
+        is reported as the "queued" status. Returns True the moment the page
+        leaves the queue, False if ``QUEUE_MAX_WAIT`` passes or it closes.
+        """
+        self._queue_stats["entered"] += 1
+        self.browser.mark_queued(page)
+        logger.info("Waiting room detected (%s) at %s", queue.get("signal"), page.url)
+        start = time.monotonic()
+        last_message = None
+        try:
+            while time.monotonic() - start < Config.QUEUE_MAX_WAIT:
+                message = self._queue_message(queue)
+                if message != last_message:
+                    await report("queued", message)
+                    last_message = message
+                try:
+                    await page.wait_for_event(
+                        "framenavigated", predicate=lambda frame: frame == page.main_frame,
+                        timeout=Config.QUEUE_POLL_INTERVAL * 1000,
+                    )
+                    await page.wait_for_load_state("domcontentloaded", timeout=Config.QUEUE_POLL_INTERVAL * 1000)
+                except Exception:
+                    if page.is_closed():
+                        return False
+                queue = await self._detect_queue(page, default=queue)
+                if queue is None:
+                    waited = time.monotonic() - start
+                    self._queue_stats["released"] += 1
+                    self._queue_stats["wait_s_total"] += waited
+                    await self._wait_page_interactive(page)
+                    await report("grabbing", f"Waiting room released after {waited:.0f}s, buying...")
+                    return True
+            self._queue_stats["timed_out"] += 1
+            return False
+        finally:
+            if not page.is_closed():
+                self.browser.mark_queued(page, False)
+
+    async def _purchase(self, page, task: GrabTask, report) -> dict:
+        """Run the purchase flow on the current page, passing any waiting room first.
+
+        A flow step can land in a queue too (e.g. after the buy click), so
+        the queue check repeats after a failed flow. A result with "queued"
+        set means the waiting room never released; don't reload after it.
+        """
+        result = {"success": False, "message": "Purchase flow not run"}
+        for _ in range(self.MAX_QUEUE_PASSES):
+            queue = await self._detect_queue(page)
+            if queue is not None and not await self._wait_in_queue(page, report, queue):
+                return {"success": False, "queued": True,
+                        "message": "Still in the Eventim waiting room when it timed out"}
+            result = await self._eventim_purchase_flow(page, task.ticket_count, report)
+            if result["success"] or await self._detect_queue(page) is None:
+                return result
+        return result
+
+    def get_queue_report(self) -> dict:
+        stats = self._queue_stats
+        return {
+            **stats,
+            "wait_s_total": round(stats["wait_s_total"], 1),
+            "avg_wait_s": round(stats["wait_s_total"] / stats["released"], 1) if stats["released"] else None,
+        }
+
+    async def _open_event_page(self, page, task: GrabTask, report=None) -> None:
+        """Navigate to the event page.
+
+        Goes straight to the landing URL pre-resolved at warmup (skipping
+        the affiliate/noapp redirect chain) when one is cached, and falls
+        back to ``task.eventim_url`` if that navigation fails or errors.
+        """
+        landing = event_urls.get(task)
+        if landing:
+            try:
+                response = await page.goto(landing, wait_until="domcontentloaded", timeout=15000)
+                if response is None or response.ok:
+                    event_urls.record_hit(task)
+                    return
+                logger.warning("Landing URL for %s returned HTTP %d", task.ext_id_screening, response.status)
+            except Exception as e:
+                logger.warning("Landing URL for %s failed: %s", task.ext_id_screening, e)
+            event_urls.record_fallback(task)
+
+        try:
+            await page.goto(task.eventim_url, wait_until="domcontentloaded", timeout=30000)
+        except Exception:
+            # Eventim sometimes blocks; retry with commit
+            if report:
+                await report("grabbing", "Retrying navigation...")
+            await page.goto(task.eventim_url, wait_until="commit", timeout=30000)
+
     async def grab_ticket(self, task: GrabTask, on_status=None) -> dict:
         """Execute the full ticket grabbing flow.
 
-        Returns dict with "success" bool, "message" string, and "page" (kept open on success).
+        Returns dict with "success" bool and "message" string. The page is
+        kept open on success (for payment) and released back to the browser
+        otherwise.
         """
         if not task.eventim_url:
             return {"success": False, "message": "No Eventim URL available"}
@@ -397,38 +1314,29 @@ class TicketGrabber:
             logger.info(log_msg)
 
         page = None
+        result = {"success": False}
         try:
             step_start = time.time() if Config.DEBUG_MODE else None
             await _report("grabbing", "Opening Eventim page...")
-            page = await self.browser.new_page()
+            page = await self.browser.acquire_page(owner=task.id)
 
-            # Navigate to the event URL
-            try:
-                await page.goto(task.eventim_url, wait_until="domcontentloaded", timeout=30000)
-            except Exception:
-                # Eventim sometimes blocks; retry with commit
-                await _report("grabbing", "Retrying navigation...")
-                await page.goto(task.eventim_url, wait_until="commit", timeout=30000)
+            await self._open_event_page(page, task, _report)
 
             if Config.DEBUG_MODE and step_start:
                 elapsed_step = (time.time() - step_start) * 1000
                 logger.info("  → Page loaded (took %.1fms)", elapsed_step)
             
-            page_wait = HumanTiming.get_page_wait(1000)
-            await page.wait_for_timeout(page_wait)
+            await self._wait_page_interactive(page)
             await _report("grabbing", "Page loaded, handling consent & finding tickets...")
 
-            # Step 0: Dismiss cookie consent banner if present
-            step_start = time.time() if Config.DEBUG_MODE else None
-            await self._dismiss_cookie_banner(page)
-            if Config.DEBUG_MODE and step_start:
-                elapsed_step = (time.time() - step_start) * 1000
-                logger.info("  → Cookie banner handled (took %.1fms)", elapsed_step)
-
-            # Step 1: Try the Eventim purchase flow
-            result = await self._eventim_purchase_flow(page, task.ticket_count, _report)
+            # Step 1: Try the Eventim purchase flow (dismisses the consent banner too)
+            result = await self._purchase(page, task, _report)
             if result["success"]:
                 # Don't close the page - let user complete payment
+                self.browser.mark_checkout(page)
+                return result
+            if result.get("queued"):
+                await _report("failed", result["message"])
                 return result
 
             # Step 2: Retry
@@ -440,12 +1348,14 @@ class TicketGrabber:
                     await page.reload(wait_until="domcontentloaded", timeout=15000)
                 except Exception:
                     await page.reload(wait_until="commit", timeout=15000)
-                page_wait = HumanTiming.get_page_wait(1000)
-                await page.wait_for_timeout(page_wait)
-                await self._dismiss_cookie_banner(page)
+                await self._wait_page_interactive(page)
 
-                result = await self._eventim_purchase_flow(page, task.ticket_count, _report)
+                result = await self._purchase(page, task, _report)
                 if result["success"]:
+                    self.browser.mark_checkout(page)
+                    return result
+                if result.get("queued"):
+                    await _report("failed", result["message"])
                     return result
 
             await _report("failed", "Could not complete purchase after all retries")
@@ -455,78 +1365,125 @@ class TicketGrabber:
             logger.exception("Grab error for %s", task.ext_id_screening)
             await _report("failed", str(e))
             return {"success": False, "message": str(e)}
+        finally:
+            selector_stats.flush()
+            if page is not None and not result["success"]:
+                await self.browser.release_page(page)
+
+    async def _probe(self, page, steps: tuple[str, ...] = PURCHASE_STEPS, exclude: set[str] | None = None) -> dict:
+        """Snapshot the page state for ``steps`` in a single round trip.
+
+        Returns a dict with one entry per step (``{"key", "text"}`` of the
+        first visible candidate, or None), plus ``url``, ``cart_label``,
+        ``stepper_rows`` and ``ticket_links``. Candidates whose key is in
+        ``exclude`` are skipped. Selectors that won before are tried first.
+        Returns an empty dict if the page can't be evaluated (e.g.
+        mid-navigation).
+        """
+        groups = {
+            step: selector_stats.order(
+                step,
+                [c for c in self.PROBE_CANDIDATES[step] if not exclude or c[0] not in exclude],
+            )
+            for step in steps
+        }
+        try:
+            return await page.evaluate(self.JS_PAGE_PROBE, groups)
+        except Exception as e:
+            logger.debug("Page probe failed: %s", e)
+            return {}
 
-    async def _dismiss_cookie_banner(self, page) -> None:
-        """Dismiss Eventim cookie/consent banner if present."""
-        consent_selectors = [
-            '#cmpbntyestxt',  # common Eventim consent button ID
-            'button[id*="consent"]',
-            'button[id*="accept"]',
-            'button:has-text("Accept")',
-            'button:has-text("Akzeptieren")',
-            'button:has-text("Accept All")',
-            'button:has-text("Alle akzeptieren")',
-            'button:has-text("Agree")',
-            'button:has-text("OK")',
-            '[class*="consent"] button',
-            '[class*="cookie"] button',
-            '#onetrust-accept-btn-handler',
-        ]
-        for sel in consent_selectors:
-            try:
-                btn = await page.query_selector(sel)
-                if btn and await btn.is_visible():
-                    await self._human_click(page, btn)
-                    logger.info("Dismissed consent banner: %s", sel)
-                    ui_delay = HumanTiming.get_ui_interaction_delay()
-                    await page.wait_for_timeout(ui_delay)
-                    return
-            except Exception:
-                continue
+    async def _click_probed(self, page, step: str, hit: dict, scroll: bool = False):
+        """Click the element the last probe marked for ``step``.
+
+        Records the winning selector so the next grab tries it first.
+        Returns the element handle, or None if it is gone.
+        """
+        el = await page.query_selector(f"[data-btb-{step}]")
+        if not el:
+            return None
+        if scroll:
+            await el.scroll_into_view_if_needed()
+        await self._human_click(page, el)
+        selector_stats.record(step, hit["key"], self._strategy(step, hit["key"]))
+        return el
+
+    def _strategy(self, step: str, key: str) -> str:
+        """How a candidate matches: by CSS alone or by CSS plus text."""
+        for candidate_key, _css, text, _exclude in self.PROBE_CANDIDATES[step]:
+            if candidate_key == key:
+                return "text" if text else "css"
+        return "css"
+
+    async def _dismiss_cookie_banner(self, page, snapshot: dict | None = None) -> bool:
+        """Dismiss Eventim cookie/consent banner if present.
+
+        Returns True if a banner button was clicked.
+        """
+        if snapshot is None:
+            snapshot = await self._probe(page, ("consent",))
+        hit = snapshot.get("consent")
+        if not hit:
+            return False
+        try:
+            if await self._click_probed(page, "consent", hit):
+                logger.info("Dismissed consent banner: %s", hit["key"])
+                ui_delay = HumanTiming.get_ui_interaction_delay()
+                await page.wait_for_timeout(ui_delay)
+                return True
+        except Exception:
+            logger.debug("Consent click failed: %s", hit["key"])
+        return False
 
     async def _eventim_purchase_flow(self, page, ticket_count: int, report) -> dict:
         """Handle Eventim's actual purchase flow.
 
         The /noapp/event/{ID}/ URL leads to the Eventim event page.
         Flow: Event page -> Select tickets -> Add to cart -> Cart page
+
+        Each decision is taken from a page-state probe rather than walking
+        the selector lists one CDP round trip at a time.
         """
         current_url = page.url
         await report("grabbing", f"On page: {current_url[:80]}...")
 
-        # Take a screenshot for debugging
-        try:
-            await page.screenshot(path="data/eventim_debug.png")
-        except Exception:
-            pass
-
-        # --- Phase 1: Find and click the main ticket/buy action ---
-        # Eventim pages may show: a direct ticket selector, or a "Tickets" button to reveal it
+        # Debug screenshot per SCREENSHOT_POLICY; never awaited here
+        screenshots.checkpoint(page, "eventim_debug")
 
         # Check if we're already on a ticket selection / seat map page
         if any(kw in current_url.lower() for kw in ["cart", "warenkorb", "basket", "checkout"]):
             await report("success", "Already on cart/checkout page!")
             return {"success": True, "message": "Reached cart/checkout page"}
 
+        snapshot = await self._probe(page)
+        if Config.DEBUG_MODE:
+            logger.info(
+                "  → Probe: consent=%s stepper_rows=%s cart=%r buy=%s ticket_link=%s",
+                bool(snapshot.get("consent")), snapshot.get("stepper_rows"), snapshot.get("cart_label"),
+                bool(snapshot.get("buy")), bool(snapshot.get("ticket_link")),
+            )
+        if await self._dismiss_cookie_banner(page, snapshot):
+            snapshot = await self._probe(page, ("quantity", "buy", "ticket_link"))
+
+        # --- Phase 1: Find and click the main ticket/buy action ---
+        # Eventim pages may show: a direct ticket selector, or a "Tickets" button to reveal it
+
         # Look for ticket quantity selectors (Eventim uses <select> or +/- buttons)
-        qty_set = await self._set_ticket_quantity(page, ticket_count)
+        qty_set = await self._set_ticket_quantity(page, ticket_count, snapshot)
         if qty_set:
             await report("grabbing", f"Set quantity to {ticket_count}")
 
-        # Look for the main action button to buy/reserve/add to cart
-        buy_clicked = await self._click_buy_button(page)
+        # Look for the main action button to buy/reserve/add to cart.
+        # The cart button label changes with the quantity, so re-probe it.
+        buy_snapshot = await self._probe(page, ("buy",)) if qty_set else snapshot
+        pre_buy_url = page.url
+        buy_clicked = await self._click_buy_button(page, buy_snapshot)
 
         if buy_clicked:
+            screenshots.after_click(page, "eventim_after_buy")
             await report("grabbing", "Clicked buy button, waiting for next page...")
-            # Smart wait: try to wait for URL change or cart-related elements
-            try:
-                await page.wait_for_function(
-                    self.JS_WAIT_FOR_CART_ELEMENTS,
-                    timeout=self.SMART_WAIT_TIMEOUT_MS
-                )
-            except Exception:
-                # Fallback to minimal wait if no cart elements detected
-                fallback_wait = HumanTiming.get_page_wait(self.SMART_WAIT_FALLBACK_MS)
-                await page.wait_for_timeout(fallback_wait)
+            # Wait for cart elements to render
+            await self._wait_ready(page, self.JS_WAIT_FOR_CART_ELEMENTS, "after_buy")
 
             # Check where we ended up
             new_url = page.url
@@ -537,52 +1494,38 @@ class TicketGrabber:
             # We might be on a seat selection or intermediate page
             # Try to find and click through additional steps
             await report("grabbing", "Navigating through additional steps...")
-            result = await self._handle_intermediate_steps(page, ticket_count, report)
+            result = await self._handle_intermediate_steps(page, ticket_count, report, pre_buy_url)
             if result:
                 return result
 
             # Even if we're not sure, if we clicked the button, report semi-success
-            try:
-                await page.screenshot(path="data/eventim_after_buy.png")
-            except Exception:
-                pass
             await report("success", "Buy button clicked - check browser to complete purchase")
             return {"success": True, "message": "Buy button clicked - check browser window to continue"}
 
         # --- Phase 2: Maybe we need to click a "Tickets" link first ---
-        ticket_link_clicked = await self._click_ticket_link(page)
+        ticket_link_clicked = await self._click_ticket_link(page, snapshot)
         if ticket_link_clicked:
             await report("grabbing", "Clicked ticket link, waiting...")
-            # Smart wait with fallback - check for ticket purchase elements
-            try:
-                await page.wait_for_function(
-                    self.JS_WAIT_FOR_TICKET_ELEMENTS,
-                    timeout=self.SMART_WAIT_TIMEOUT_MS
-                )
-            except Exception:
-                fallback_wait = HumanTiming.get_page_wait(self.SMART_WAIT_FALLBACK_MS)
-                await page.wait_for_timeout(fallback_wait)
-            await self._dismiss_cookie_banner(page)
-
-            qty_set = await self._set_ticket_quantity(page, ticket_count)
-            buy_clicked = await self._click_buy_button(page)
+            # Wait for ticket purchase elements
+            await self._wait_ready(page, self.JS_WAIT_FOR_TICKET_ELEMENTS, "after_ticket_link")
+            snapshot = await self._probe(page, ("consent", "quantity", "buy"))
+            if await self._dismiss_cookie_banner(page, snapshot):
+                snapshot = await self._probe(page, ("quantity", "buy"))
+
+            qty_set = await self._set_ticket_quantity(page, ticket_count, snapshot)
+            buy_snapshot = await self._probe(page, ("buy",)) if qty_set else snapshot
+            buy_clicked = await self._click_buy_button(page, buy_snapshot)
             if buy_clicked:
-                # Smart wait with fallback
-                try:
-                    await page.wait_for_function(
-                        self.JS_WAIT_FOR_CART,
-                        timeout=self.SMART_WAIT_TIMEOUT_MS
-                    )
-                except Exception:
-                    fallback_wait = HumanTiming.get_page_wait(self.SMART_WAIT_FALLBACK_MS)
-                    await page.wait_for_timeout(fallback_wait)
+                screenshots.after_click(page, "eventim_after_buy")
+                await self._wait_ready(page, self.JS_WAIT_FOR_CART, "after_buy")
                 await report("success", "Buy button clicked - check browser to complete")
                 return {"success": True, "message": "Ticket process started - check browser window"}
 
+        screenshots.on_failure(page, "eventim_failed")
         await report("grabbing", "Could not find purchase elements on page")
         return {"success": False, "message": "No purchase elements found on page"}
 
-    async def _set_ticket_quantity(self, page, count: int) -> bool:
+    async def _set_ticket_quantity(self, page, count: int, snapshot: dict | None = None) -> bool:
         """Set ticket quantity using Eventim's stepper UI.
 
         Eventim Berlinale uses:
@@ -592,70 +1535,40 @@ class TicketGrabber:
         The first stepper row is for full-price tickets.
         """
         step_start = time.time() if Config.DEBUG_MODE else None
-        
-        # Primary: Eventim's js-stepper-more button (the "+" button)
-        plus_buttons = await page.query_selector_all('button.js-stepper-more')
-        for btn in plus_buttons:
-            try:
-                if await btn.is_visible():
-                    for i in range(count):
-                        click_start = time.time() if Config.DEBUG_MODE else None
-                        await self._human_click(page, btn)
-                        if Config.DEBUG_MODE and click_start:
-                            click_time = (time.time() - click_start) * 1000
-                            logger.info("    → Clicked js-stepper-more (%.1fms)", click_time)
-                        click_delay = HumanTiming.get_click_delay(TimingConfig.TIMING_MODE)
-                        if Config.DEBUG_MODE:
-                            logger.info("    → Click delay: %dms", click_delay)
-                        await page.wait_for_timeout(click_delay)
-                    if Config.DEBUG_MODE and step_start:
-                        elapsed = (time.time() - step_start) * 1000
-                        logger.info("  ✓ Quantity set to %d (took %.1fms)", count, elapsed)
-                    else:
-                        logger.info("Clicked js-stepper-more %d times", count)
-                    return True
-            except Exception:
-                continue
 
-        # Fallback: data-qa="more-tickets" button
-        btn = await page.query_selector('[data-qa="more-tickets"]')
-        if btn:
-            try:
-                if await btn.is_visible():
-                    for _ in range(count):
-                        await self._human_click(page, btn)
-                        click_delay = HumanTiming.get_click_delay(TimingConfig.TIMING_MODE)
-                        await page.wait_for_timeout(click_delay)
-                    if Config.DEBUG_MODE and step_start:
-                        elapsed = (time.time() - step_start) * 1000
-                        logger.info("  ✓ Quantity set to %d (took %.1fms)", count, elapsed)
-                    else:
-                        logger.info("Clicked more-tickets %d times", count)
-                    return True
-            except Exception:
-                pass
+        if snapshot is None:
+            snapshot = await self._probe(page, ("quantity",))
+        hit = snapshot.get("quantity")
+        if not hit:
+            return False
 
-        # Fallback: title="Increase amount" button
-        btn = await page.query_selector('button[title*="Increase"], button[title*="ncrease"]')
-        if btn:
-            try:
-                if await btn.is_visible():
-                    for _ in range(count):
-                        await self._human_click(page, btn)
-                        click_delay = HumanTiming.get_click_delay(TimingConfig.TIMING_MODE)
-                        await page.wait_for_timeout(click_delay)
-                    if Config.DEBUG_MODE and step_start:
-                        elapsed = (time.time() - step_start) * 1000
-                        logger.info("  ✓ Quantity set to %d (took %.1fms)", count, elapsed)
-                    else:
-                        logger.info("Clicked increase-amount %d times", count)
-                    return True
-            except Exception:
-                pass
+        btn = await page.query_selector("[data-btb-quantity]")
+        if not btn:
+            return False
+        try:
+            for i in range(count):
+                click_start = time.time() if Config.DEBUG_MODE else None
+                await self._human_click(page, btn)
+                if Config.DEBUG_MODE and click_start:
+                    click_time = (time.time() - click_start) * 1000
+                    logger.info("    → Clicked %s (%.1fms)", hit["key"], click_time)
+                click_delay = HumanTiming.get_click_delay(TimingConfig.TIMING_MODE)
+                if Config.DEBUG_MODE:
+                    logger.info("    → Click delay: %dms", click_delay)
+                await page.wait_for_timeout(click_delay)
+        except Exception:
+            logger.debug("Quantity click failed: %s", hit["key"])
+            return False
+        selector_stats.record("quantity", hit["key"], self._strategy("quantity", hit["key"]))
 
-        return False
+        if Config.DEBUG_MODE and step_start:
+            elapsed = (time.time() - step_start) * 1000
+            logger.info("  ✓ Quantity set to %d (took %.1fms)", count, elapsed)
+        else:
+            logger.info("Clicked %s %d times", hit["key"], count)
+        return True
 
-    async def _click_buy_button(self, page) -> bool:
+    async def _click_buy_button(self, page, snapshot: dict | None = None) -> bool:
         """Click the cart/checkout button on Eventim.
 
         Eventim Berlinale uses:
@@ -663,151 +1576,81 @@ class TicketGrabber:
         This button submits the form to checkout.html.
         """
         step_start = time.time() if Config.DEBUG_MODE else None
-        
-        # Priority 1: Eventim's js-stepper-action button (the cart button)
-        btn = await page.query_selector('button.js-stepper-action')
-        if btn:
-            try:
-                if await btn.is_visible():
-                    text = (await btn.inner_text()).strip()
-                    # Only click if tickets have been selected (not "0 Tickets")
-                    if "0 Ticket" not in text:
-                        await btn.scroll_into_view_if_needed()
-                        await self._human_click(page, btn)
-                        if Config.DEBUG_MODE and step_start:
-                            elapsed = (time.time() - step_start) * 1000
-                            logger.info("  ✓ Buy button clicked (took %.1fms)", elapsed)
-                        else:
-                            logger.info("Clicked js-stepper-action: '%s'", text)
-                        return True
-                    else:
-                        logger.warning("Cart button shows 0 tickets: '%s'", text)
-            except Exception:
-                pass
 
-        # Priority 2: Any button with "Ticket" in text and non-zero count
+        if snapshot is None:
+            snapshot = await self._probe(page, ("buy",))
+        hit = snapshot.get("buy")
+        if not hit:
+            if snapshot.get("cart_label"):
+                logger.warning("Cart button shows 0 tickets: '%s'", snapshot["cart_label"])
+            return False
+
         try:
-            ticket_btn = await page.query_selector('button:has-text("Ticket")')
-            if ticket_btn and await ticket_btn.is_visible():
-                text = (await ticket_btn.inner_text()).strip()
-                if "0 Ticket" not in text and "Ticket" in text:
-                    await ticket_btn.scroll_into_view_if_needed()
-                    await self._human_click(page, ticket_btn)
-                    if Config.DEBUG_MODE and step_start:
-                        elapsed = (time.time() - step_start) * 1000
-                        logger.info("  ✓ Buy button clicked (took %.1fms)", elapsed)
-                    else:
-                        logger.info("Clicked ticket button: '%s'", text)
-                    return True
+            if not await self._click_probed(page, "buy", hit, scroll=True):
+                return False
         except Exception:
-            pass
-
-        # Priority 3: Standard selectors
-        selectors = [
-            'button:has-text("In den Warenkorb")',
-            'button:has-text("Add to cart")',
-            'button:has-text("Add to basket")',
-            'button:has-text("Buy tickets")',
-            'button:has-text("Buy now")',
-            'button:has-text("Kaufen")',
-        ]
-        for sel in selectors:
-            try:
-                b = await page.query_selector(sel)
-                if b and await b.is_visible():
-                    await b.scroll_into_view_if_needed()
-                    await self._human_click(page, b)
-                    if Config.DEBUG_MODE and step_start:
-                        elapsed = (time.time() - step_start) * 1000
-                        logger.info("  ✓ Buy button clicked (took %.1fms)", elapsed)
-                    else:
-                        logger.info("Clicked buy button: %s", sel)
-                    return True
-            except Exception:
-                continue
+            logger.debug("Buy click failed: %s", hit["key"])
+            return False
 
-        return False
+        if Config.DEBUG_MODE and step_start:
+            elapsed = (time.time() - step_start) * 1000
+            logger.info("  ✓ Buy button clicked (took %.1fms)", elapsed)
+        else:
+            logger.info("Clicked buy button %s: '%s'", hit["key"], hit["text"])
+        return True
 
-    async def _click_ticket_link(self, page) -> bool:
+    async def _click_ticket_link(self, page, snapshot: dict | None = None) -> bool:
         """Click a "Tickets" link that may reveal the purchase section."""
-        selectors = [
-            'a:has-text("Tickets")',
-            'a:has-text("Karten")',
-            'a:has-text("Book")',
-            'button:has-text("Tickets")',
-            'button:has-text("Karten")',
-            '[class*="ticket-button"]',
-            '[class*="ticketButton"]',
-            'a[href*="ticket"]',
-        ]
-        for sel in selectors:
-            try:
-                el = await page.query_selector(sel)
-                if el and await el.is_visible():
-                    await self._human_click(page, el)
-                    logger.info("Clicked ticket link: %s", sel)
-                    return True
-            except Exception:
-                continue
+        if snapshot is None:
+            snapshot = await self._probe(page, ("ticket_link",))
+        hit = snapshot.get("ticket_link")
+        if not hit:
+            return False
+        try:
+            if await self._click_probed(page, "ticket_link", hit):
+                logger.info("Clicked ticket link: %s", hit["key"])
+                return True
+        except Exception:
+            logger.debug("Ticket link click failed: %s", hit["key"])
         return False
 
-    async def _handle_intermediate_steps(self, page, ticket_count: int, report) -> dict | None:
+    async def _handle_intermediate_steps(
+        self, page, ticket_count: int, report, prev_url: str = "",
+    ) -> dict | None:
         """Handle seat selection or other intermediate steps after initial buy click."""
-        # Wait for possible page transition
-        page_wait = HumanTiming.get_page_wait(1000)
-        await page.wait_for_timeout(page_wait)
-        current_url = page.url
+        # Wait for the page transition: URL change away from ``prev_url``
+        # or a continue button rendered
+        await self._wait_ready(
+            page, self.JS_WAIT_FOR_NEXT_STEP, "intermediate",
+            arg=prev_url or page.url, baseline_ms=HumanTiming.get_page_wait(self.LEGACY_PAGE_WAIT_MS),
+        )
 
         # Check if we're now on a seat map / selection page
-        # Try to find "continue" or "next" or "weiter" button
-        continue_selectors = [
-            'button:has-text("Continue")',
-            'button:has-text("Weiter")',
-            'button:has-text("Next")',
-            'button:has-text("Proceed")',
-            'button:has-text("Fortfahren")',
-            'a:has-text("Continue")',
-            'a:has-text("Weiter")',
-            'button:has-text("Accept")',
-            'button:has-text("Confirm")',
-            'button:has-text("Bestätigen")',
-        ]
-
-        for sel in continue_selectors:
+        # Try to find "continue" or "next" or "weiter" button, never the same one twice
+        clicked: set[str] = set()
+        for _ in range(len(self.PROBE_CANDIDATES["continue"])):
+            snapshot = await self._probe(page, ("continue",), exclude=clicked)
+            hit = snapshot.get("continue")
+            if not hit:
+                break
+            clicked.add(hit["key"])
             try:
-                btn = await page.query_selector(sel)
-                if btn and await btn.is_visible():
-                    await self._human_click(page, btn)
-                    logger.info("Clicked continue: %s", sel)
-                    # Smart wait with fallback
-                    try:
-                        await page.wait_for_function(
-                            self.JS_WAIT_FOR_CART_EXTENDED,
-                            timeout=self.SMART_WAIT_TIMEOUT_MS
-                        )
-                    except Exception:
-                        fallback_wait = HumanTiming.get_page_wait(self.SMART_WAIT_FALLBACK_MS)
-                        await page.wait_for_timeout(fallback_wait)
-
-                    new_url = page.url
-                    if any(kw in new_url.lower() for kw in ["cart", "warenkorb", "basket", "checkout", "order"]):
-                        await report("success", "Reached checkout!")
-                        return {"success": True, "message": "Reached checkout - complete payment in browser"}
+                if not await self._click_probed(page, "continue", hit):
+                    continue
+                logger.info("Clicked continue: %s", hit["key"])
+                await self._wait_ready(page, self.JS_WAIT_FOR_CART_EXTENDED, "after_continue")
+
+                new_url = page.url
+                if any(kw in new_url.lower() for kw in ["cart", "warenkorb", "basket", "checkout", "order"]):
+                    await report("success", "Reached checkout!")
+                    return {"success": True, "message": "Reached checkout - complete payment in browser"}
             except Exception:
                 continue
 
         # Try another round of buy button clicks (new page might have different structure)
         buy_clicked = await self._click_buy_button(page)
         if buy_clicked:
-            # Smart wait with fallback
-            try:
-                await page.wait_for_function(
-                    self.JS_WAIT_FOR_CART,
-                    timeout=self.SMART_WAIT_TIMEOUT_MS
-                )
-            except Exception:
-                fallback_wait = HumanTiming.get_page_wait(self.SMART_WAIT_FALLBACK_MS)
-                await page.wait_for_timeout(fallback_wait)
+            await self._wait_ready(page, self.JS_WAIT_FOR_CART, "after_buy")
             new_url = page.url
             if any(kw in new_url.lower() for kw in ["cart", "warenkorb", "basket", "checkout"]):
                 return {"success": True, "message": "Ticket added to cart"}
@@ -818,18 +1661,21 @@ class TicketGrabber:
         """Open the Eventim page ahead of time to warm up."""
         if not task.eventim_url:
             return None
+        page = None
         try:
-            page = await self.browser.new_page()
-            try:
-                await page.goto(task.eventim_url, wait_until="domcontentloaded", timeout=30000)
-            except Exception:
-                await page.goto(task.eventim_url, wait_until="commit", timeout=30000)
+            page = await self.browser.acquire_page(owner=task.id)
+            await self._open_event_page(page, task)
+            await self._wait_page_interactive(page)
             await self._dismiss_cookie_banner(page)
             logger.info("Preheated page for %s", task.ext_id_screening)
             return page
         except Exception:
             logger.exception("Preheat failed for %s", task.ext_id_screening)
+            if page is not None:
+                await self.browser.release_page(page)
             return None
+        finally:
+            selector_stats.flush()
 
     async def grab_with_refresh(self, page, task: GrabTask, on_status=None) -> dict:
         """Grab ticket by refreshing a preheated page at sale time."""
@@ -837,18 +1683,31 @@ class TicketGrabber:
             if on_status:
                 await on_status(status, msg)
 
+        result = {"success": False}
         try:
-            await _report("grabbing", "Refreshing page at sale time...")
-            try:
-                await page.reload(wait_until="domcontentloaded", timeout=15000)
-            except Exception:
-                await page.reload(wait_until="commit", timeout=15000)
-            page_wait = HumanTiming.get_page_wait(1000)
-            await page.wait_for_timeout(page_wait)
-            await self._dismiss_cookie_banner(page)
+            landing = event_urls.get(task)
+            if await self._detect_queue(page) is not None:
+                # Queued since preheat: a refresh would give up the position
+                pass
+            elif landing and page.url != landing:
+                # Preheat didn't end up on the landing page; go there instead of reloading
+                await _report("grabbing", "Refreshing page at sale time...")
+                await self._open_event_page(page, task)
+                await self._wait_page_interactive(page)
+            else:
+                await _report("grabbing", "Refreshing page at sale time...")
+                try:
+                    await page.reload(wait_until="domcontentloaded", timeout=15000)
+                except Exception:
+                    await page.reload(wait_until="commit", timeout=15000)
+                await self._wait_page_interactive(page)
 
-            result = await self._eventim_purchase_flow(page, task.ticket_count, _report)
+            result = await self._purchase(page, task, _report)
             if result["success"]:
+                self.browser.mark_checkout(page)
+                return result
+            if result.get("queued"):
+                await _report("failed", result["message"])
                 return result
 
             for attempt in range(Config.GRAB_RETRY_COUNT):
@@ -859,11 +1718,14 @@ class TicketGrabber:
                     await page.reload(wait_until="domcontentloaded", timeout=15000)
                 except Exception:
                     await page.reload(wait_until="commit", timeout=15000)
-                page_wait = HumanTiming.get_page_wait(1000)
-                await page.wait_for_timeout(page_wait)
+                await self._wait_page_interactive(page)
 
-                result = await self._eventim_purchase_flow(page, task.ticket_count, _report)
+                result = await self._purchase(page, task, _report)
                 if result["success"]:
+                    self.browser.mark_checkout(page)
+                    return result
+                if result.get("queued"):
+                    await _report("failed", result["message"])
                     return result
 
             await _report("failed", "All retries exhausted")
@@ -872,6 +1734,56 @@ class TicketGrabber:
             logger.exception("grab_with_refresh error")
             await _report("failed", str(e))
             return {"success": False, "message": str(e)}
+        finally:
+            selector_stats.flush()
+            if not result["success"]:
+                await self.browser.release_page(page)
+
+    async def grab_detected(self, page, task: GrabTask, detection: dict, on_status=None) -> dict:
+        """Hybrid mode: run the DOM purchase flow once HTTP polling saw tickets open.
+
+        Refreshes the preheated ``page`` once (or opens the event page if
+        there is none) and records the time from detection to the first
+        click. ``detection`` is what ``APIGrabber.wait_for_availability``
+        returned.
+        """
+        mark: dict = {}
+        token = _first_click.set(mark)
+        try:
+            if page is not None and not page.is_closed():
+                result = await self.grab_with_refresh(page, task, on_status=on_status)
+            else:
+                result = await self.grab_ticket(task, on_status=on_status)
+        finally:
+            _first_click.reset(token)
+
+        click_ms = round((mark["at"] - detection["detected_at"]) * 1000, 1) if "at" in mark else None
+        result["detect_to_click_ms"] = click_ms
+        self._detections.append({
+            "task_id": task.id,
+            "source": detection["source"],
+            "polls": detection["polls"],
+            "detected_at": detection["detected_ts"],
+            "preheated": page is not None,
+            "detect_to_click_ms": click_ms,
+            "success": result["success"],
+        })
+        logger.info(
+            "Hybrid grab [%s]: first click %s after detection (%s, %d polls)",
+            task.ext_id_screening, f"{click_ms:.1f}ms" if click_ms is not None else "never",
+            detection["source"], detection["polls"],
+        )
+        return result
+
+    def get_detection_report(self) -> dict:
+        """Hybrid grabs: detection-to-first-click latency, recent and p50/max."""
+        clicks = sorted(d["detect_to_click_ms"] for d in self._detections if d["detect_to_click_ms"] is not None)
+        return {
+            "count": len(self._detections),
+            "p50_ms": clicks[len(clicks) // 2] if clicks else None,
+            "max_ms": clicks[-1] if clicks else None,
+            "recent": list(self._detections)[-20:],
+        }
 
 
 # Global singletons
@@ -3,8 +3,10 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
+import time
 from contextlib import asynccontextmanager
 from datetime import datetime
+from typing import Optional
 from zoneinfo import ZoneInfo
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
@@ -13,7 +15,8 @@ from fastapi.staticfiles import StaticFiles
 
 from app import berlinale_api, scheduler
 from app.config import Config
-from app.models import GrabTask, StatusMessage, TaskCreate
+from app.grab_slots import grab_slots
+from app.models import GrabTask, StatusMessage, TaskCreate, TaskPriority
 from app.monitor import ticket_monitor
 from app.storage import TaskStorage
 from app.time_sync import init_time_sync, get_time_sync
@@ -70,6 +73,19 @@ async def on_task_update(task_id: str, status: str, message: str):
     })
 
 
+async def on_timeline_update(task_id: str, stages: list[dict]):
+    """Callback from scheduler when a pre-sale timeline stage changes."""
+    await ws_manager.broadcast({
+        "type": "timeline",
+        "data": {"task_id": task_id, "stages": stages},
+    })
+
+
+async def on_slots_update(status: dict):
+    """Callback from grab slots when a task starts waiting, is admitted or lets go."""
+    await ws_manager.broadcast({"type": "grab_slots", "data": scheduler.get_slot_queue()})
+
+
 async def on_monitor_change(task_id: str, new_state: str, ticket_url: str):
     """Callback from monitor when a watched screening becomes available."""
     task = storage.get_task(task_id)
@@ -105,29 +121,86 @@ async def on_monitor_change(task_id: str, new_state: str, ticket_url: str):
     })
 
 
+def _task_status(task_id: str) -> str | None:
+    """Status of a stored task, or None if it no longer exists."""
+    task = storage.get_task(task_id)
+    return task.status if task else None
+
+
 # --- Lifespan ---
 
+# Startup timing breakdown, exposed at /api/startup
+startup_report: dict = {"steps": {}, "ready_ms": None}
+
+
+async def _timed_step(name: str, fn, t0: float) -> None:
+    """Run one startup step (sync or async) and record its timing."""
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        result = fn()
+        if asyncio.iscoroutine(result):
+            await result
+    except Exception:
+        logger.exception("Startup step %s failed", name)
+        status = "failed"
+    end = time.perf_counter()
+    startup_report["steps"][name] = {
+        "status": status,
+        "duration_ms": round((end - start) * 1000, 1),
+        "finished_at_ms": round((end - t0) * 1000, 1),
+    }
+    logger.info("Startup step %s %s in %.1fms", name, status, (end - start) * 1000)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting Berlinale Ticket Buyer...")
-    
-    # Initialize time synchronization
-    await init_time_sync()
-    
+    t0 = time.perf_counter()
+    startup_report["steps"] = {}
+    startup_report["ready_ms"] = None
+
+    # Time sync runs in the background; triggers wait on its readiness
+    # event instead of the server waiting for slow or unreachable sources
+    time_sync_task = asyncio.create_task(_timed_step("time_sync", init_time_sync, t0))
+
     scheduler.set_storage(storage)
     scheduler.set_on_task_update(on_task_update)
-    scheduler.start_scheduler()
-    scheduler.reschedule_pending_tasks(storage)
-    ticket_monitor.start(storage, on_monitor_change)
-    logger.info("Server ready at http://%s:%s", Config.SERVER_HOST, Config.SERVER_PORT)
+    scheduler.set_on_timeline_update(on_timeline_update)
+    grab_slots.set_on_change(on_slots_update)
+    from app.grabber import browser_manager
+    browser_manager.set_task_status_lookup(_task_status)
+    from app.cookie_bridge import cookie_bridge
+    browser_manager.set_on_session_event(cookie_bridge.request_sync)
+    cookie_bridge.start()
+    # Quick and bound to the event loop (APScheduler, monitor task), so
+    # they run in order rather than in threads
+    await _timed_step("scheduler_start", scheduler.start_scheduler, t0)
+    await _timed_step("reschedule_tasks", lambda: scheduler.reschedule_pending_tasks(storage), t0)
+    await _timed_step("monitor_start", lambda: ticket_monitor.start(storage, on_monitor_change), t0)
+    startup_report["ready_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+    logger.info(
+        "Server ready at http://%s:%s in %.1fms (%s)",
+        Config.SERVER_HOST, Config.SERVER_PORT, startup_report["ready_ms"],
+        ", ".join(f"{name} {step['duration_ms']}ms" for name, step in startup_report["steps"].items()),
+    )
     yield
     # Shutdown
     logger.info("Shutting down...")
+    if not time_sync_task.done():
+        time_sync_task.cancel()
+    get_time_sync().stop()
     ticket_monitor.stop()
     scheduler.shutdown_scheduler()
+    from app.screenshots import screenshots
+    await screenshots.drain()
     from app.grabber import browser_manager
     await browser_manager.close()
+    from app.conn_warmer import connection_warmer
+    connection_warmer.stop()
+    from app.cookie_bridge import cookie_bridge
+    cookie_bridge.stop()
     from app.api_grabber import api_grabber
     await api_grabber.close()
     await berlinale_api.close()
@@ -185,6 +258,7 @@ async def get_config():
     """Get frontend configuration values."""
     return {
         "ticket_count": Config.TICKET_COUNT,
+        "grab_mode": Config.GRAB_MODE,
         "festival_start_date": Config.FESTIVAL_START_DATE,
         "festival_end_date": Config.FESTIVAL_END_DATE,
     }
@@ -194,7 +268,43 @@ async def get_config():
 async def get_tasks():
     """Get all grab tasks."""
     tasks = storage.get_all_tasks()
-    return {"tasks": [t.model_dump() for t in tasks]}
+    return {
+        "tasks": [t.model_dump() for t in tasks],
+        "timelines": scheduler.get_timelines(),
+        "slots": scheduler.get_slot_queue(),
+    }
+
+
+@app.get("/api/tasks/{task_id}/timeline")
+async def get_task_timeline(task_id: str):
+    """Get the pre-sale timeline (stages, deadlines, latencies) of a task."""
+    return {"task_id": task_id, "stages": scheduler.get_timeline(task_id)}
+
+
+@app.post("/api/tasks/{task_id}/priority")
+async def set_task_priority(task_id: str, req: TaskPriority):
+    """Change a task's priority; a task waiting for a grab slot moves in line."""
+    task = storage.update_task(task_id, priority=req.priority)
+    if not task:
+        return {"error": "Task not found"}
+    scheduler.update_priority(task)
+    await ws_manager.broadcast({
+        "type": "task_update",
+        "data": {"task_id": task.id, "status": task.status, "message": task.result_message or "", "task": task.model_dump()},
+    })
+    return {"task": task.model_dump()}
+
+
+@app.get("/api/scheduler/slots")
+async def get_grab_slots():
+    """Get grab slot capacity, running and waiting tasks, and wait statistics."""
+    return grab_slots.status()
+
+
+@app.get("/api/scheduler/orders")
+async def get_orders():
+    """Get coalesced same-screening orders: leader, member tasks and merged ticket count."""
+    return {"max_tickets_per_order": Config.MAX_TICKETS_PER_ORDER, "orders": scheduler.get_orders()}
 
 
 @app.post("/api/tasks")
@@ -211,6 +321,7 @@ async def create_task(req: TaskCreate):
         eventim_url=req.eventim_url,
         mode=req.mode,
         ticket_count=req.ticket_count,
+        priority=req.priority,
         status="pending",
         created_at=now,
         updated_at=now,
@@ -276,12 +387,12 @@ async def run_task_now(task_id: str):
     if not task:
         return {"error": "Task not found"}
 
-    # Run in background
-    if task.mode == "browser":
-        asyncio.create_task(scheduler._run_browser_grab(task))
-    else:
-        asyncio.create_task(scheduler._run_api_grab(task))
-
+    # Runs in the background, under the task's order
+    leader = await scheduler.run_now(task)
+    if leader is None:
+        return {"message": f"The order of task {task_id} is already buying"}
+    if leader != task_id:
+        return {"message": f"Task {task_id} triggered (order of task {leader})"}
     return {"message": f"Task {task_id} triggered"}
 
 
@@ -297,10 +408,72 @@ async def browser_login():
 async def browser_status():
     """Check browser session status."""
     from app.grabber import browser_manager
+    from app.cookie_bridge import cookie_bridge
+    from app.request_filter import request_filter
     if not browser_manager.is_initialized:
-        return {"initialized": False, "logged_in": False, "message": "Browser not started"}
+        return {
+            "initialized": False, "logged_in": False, "message": "Browser not started",
+            "pages": browser_manager.page_report(), "page_pool": browser_manager.pool_status(),
+            "request_filter": request_filter.status(), "health": browser_manager.health_status(),
+            "cookie_sync": cookie_bridge.status(),
+        }
     status = await browser_manager.check_session()
-    return {"initialized": True, **status}
+    return {
+        "initialized": True, **status,
+        "pages": browser_manager.page_report(), "page_pool": browser_manager.pool_status(),
+        "request_filter": request_filter.status(), "health": browser_manager.health_status(),
+        "cookie_sync": cookie_bridge.status(),
+    }
+
+
+@app.get("/api/grabber/selectors")
+async def grabber_selectors():
+    """Get learned selector ordering per purchase-flow step."""
+    from app.selector_stats import selector_stats
+    return {"steps": selector_stats.report()}
+
+
+@app.delete("/api/grabber/selectors")
+async def reset_grabber_selectors(step: Optional[str] = None):
+    """Forget learned selector ordering (for one step, or all)."""
+    from app.selector_stats import selector_stats
+    selector_stats.reset(step)
+    return {"reset": step or "all"}
+
+
+@app.get("/api/grabber/waits")
+async def grabber_waits():
+    """Get per-step page readiness waits and time saved vs the old fixed waits."""
+    from app.grabber import ticket_grabber
+    return {"steps": ticket_grabber.get_wait_report()}
+
+
+@app.get("/api/http/status")
+async def http_status():
+    """Get HTTP connection pool warmth: reuse and handshake time per host."""
+    from app.conn_warmer import connection_warmer
+    return connection_warmer.status()
+
+
+@app.get("/api/grabber/queue")
+async def grabber_queue():
+    """Get Eventim waiting-room encounters and time spent queued."""
+    from app.grabber import ticket_grabber
+    return ticket_grabber.get_queue_report()
+
+
+@app.get("/api/grabber/hybrid")
+async def grabber_hybrid():
+    """Get hybrid-mode latency from HTTP detection to the first click."""
+    from app.grabber import ticket_grabber
+    return ticket_grabber.get_detection_report()
+
+
+@app.get("/api/grabber/urls")
+async def grabber_urls():
+    """Get pre-resolved Eventim landing URLs and redirect time saved per task."""
+    from app.event_urls import event_urls
+    return {"tasks": event_urls.report()}
 
 
 @app.get("/api/time/status")
@@ -321,6 +494,25 @@ async def force_time_sync():
     }
 
 
+@app.get("/api/startup")
+async def startup_status():
+    """Get the startup timing breakdown."""
+    return {
+        **startup_report,
+        "time_sync_ready": get_time_sync().is_ready,
+    }
+
+
+@app.get("/api/time/triggers")
+async def time_triggers():
+    """Get precise trigger accuracy, grouped by sale time."""
+    from app.trigger import precise_trigger
+    return {
+        "tolerance_ms": Config.TRIGGER_TOLERANCE_MS,
+        "sales": precise_trigger.get_report(),
+    }
+
+
 # --- WebSocket ---
 
 @app.websocket("/ws/status")
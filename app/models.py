@@ -53,12 +53,13 @@ class GrabTask(BaseModel):
     screening_time: str = ""
     sale_time: str = ""
     eventim_url: Optional[str] = None
-    status: str = "pending"  # pending / watching / grabbing / success / failed / cancelled
-    mode: str = "browser"  # browser / api
+    status: str = "pending"  # pending / watching / grabbing / queued / success / failed / cancelled
+    mode: str = "browser"  # browser / api / hybrid
     created_at: str = ""
     updated_at: str = ""
     result_message: Optional[str] = None
     ticket_count: int = Config.TICKET_COUNT
+    priority: int = 0  # higher grabs first when grab slots are scarce
 
 
 class DayProgramme(BaseModel):
@@ -76,10 +77,40 @@ class TaskCreate(BaseModel):
     screening_time: str = ""
     sale_time: str = ""
     eventim_url: Optional[str] = None
-    mode: str = "browser"
+    mode: str = Config.GRAB_MODE
     ticket_count: int = Config.TICKET_COUNT
+    priority: int = 0
+
+
+class TaskPriority(BaseModel):
+    priority: int = 0
+
+
+class TriggerRecord(BaseModel):
+    task_id: str = ""
+    label: str = ""  # which wait fired, e.g. "sale"
+    target: str = ""  # ISO target time
+    fired_at: str = ""  # ISO fire time on the synced clock
+    skew_ms: float = 0.0  # fired - target; positive means late
+    tolerance_ms: float = 0.0
+    within_tolerance: bool = True
+    clock: str = "system"  # clock the deadline was anchored to
+
+
+class TimelineStage(BaseModel):
+    name: str  # warmup / open_page / fire (hybrid: detect)
+    offset_s: int = 0  # seconds relative to the sale time (T-60 -> -60)
+    planned_at: str = ""  # ISO time the stage is due to start
+    deadline: str = ""  # ISO time the stage must be done by
+    status: str = "scheduled"  # scheduled / running / done / failed / skipped
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    latency_ms: Optional[float] = None  # start lateness vs planned_at (fire: trigger skew; detect: detection to first click)
+    duration_ms: Optional[float] = None
+    met_deadline: Optional[bool] = None
+    message: str = ""
 
 
 class StatusMessage(BaseModel):
-    type: str  # ticket_status / task_update / grab_result
+    type: str  # ticket_status / task_update / grab_result / timeline
     data: dict = {}
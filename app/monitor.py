@@ -5,8 +5,10 @@ import logging
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
+from app.clock import get_clock
 from app.config import Config
 from app.models import GrabTask
+from app.time_sync import get_time_sync
 
 logger = logging.getLogger(__name__)
 
@@ -65,7 +67,7 @@ class TicketMonitor:
                 logger.exception("Monitor poll error")
 
             interval = self._next_interval()
-            await asyncio.sleep(interval)
+            await get_clock().sleep(interval)
 
     async def _poll_once(self) -> None:
         if not self._watches:
@@ -118,7 +120,7 @@ class TicketMonitor:
         if not self._watches:
             return Config.MONITOR_POLL_INTERVAL
 
-        now = datetime.now(ZoneInfo(Config.TIMEZONE))
+        now = get_time_sync().now(ZoneInfo(Config.TIMEZONE))
         golden = timedelta(minutes=Config.MONITOR_GOLDEN_HOUR_MINUTES)
 
         for task in self._watches.values():
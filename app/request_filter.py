@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def _host_matches(host: str, patterns: list[str]) -> bool:
+    """True if ``host`` is one of ``patterns`` or a subdomain of one."""
+    return any(host == p or host.endswith("." + p) for p in patterns)
+
+
+class RequestFilter:
+    """Opt-in request blocking for grab pages (``Config.REQUEST_FILTER_ENABLED``).
+
+    Requests are aborted when their resource type is in
+    ``REQUEST_FILTER_BLOCK_TYPES`` or their host matches
+    ``REQUEST_FILTER_BLOCK_HOSTS``; hosts in ``REQUEST_FILTER_ALLOW_HOSTS``
+    are never blocked. Blocked requests are never downloaded, so the bytes
+    saved are estimated from Content-Length values learned on responses
+    that did load (same URL first, else the average for its resource type).
+
+    Note that Playwright disables the HTTP cache for routed pages, so
+    allowed resources are re-fetched on every reload; whether filtering
+    pays off depends on the page and is what the benchmark compares.
+    """
+
+    MAX_LEARNED_URLS = 2000
+
+    def __init__(self) -> None:
+        self.enabled = Config.REQUEST_FILTER_ENABLED
+        self.block_types = set(Config.REQUEST_FILTER_BLOCK_TYPES)
+        self.block_hosts = [h.lower() for h in Config.REQUEST_FILTER_BLOCK_HOSTS]
+        self.allow_hosts = [h.lower() for h in Config.REQUEST_FILTER_ALLOW_HOSTS]
+        self._sizes: OrderedDict[str, int] = OrderedDict()  # url without query -> bytes
+        self._type_sizes: dict[str, list[int]] = {}  # resource type -> [total bytes, responses]
+        self._totals = {"loads": 0, "blocked": 0, "allowed": 0, "bytes_saved": 0}
+
+    def is_blocked(self, resource_type: str, url: str) -> bool:
+        host = (urlparse(url).hostname or "").lower()
+        if not host or _host_matches(host, self.allow_hosts):
+            return False
+        return resource_type in self.block_types or _host_matches(host, self.block_hosts)
+
+    @staticmethod
+    def _url_key(url: str) -> str:
+        return url.split("?", 1)[0]
+
+    def learn(self, response) -> None:
+        """Context ``response`` listener: remember sizes of loaded resources."""
+        try:
+            length = int(response.headers.get("content-length", ""))
+        except (TypeError, ValueError):
+            return
+        key = self._url_key(response.url)
+        self._sizes[key] = length
+        self._sizes.move_to_end(key)
+        if len(self._sizes) > self.MAX_LEARNED_URLS:
+            self._sizes.popitem(last=False)
+        total = self._type_sizes.setdefault(response.request.resource_type, [0, 0])
+        total[0] += length
+        total[1] += 1
+
+    def estimate_size(self, resource_type: str, url: str) -> int:
+        size = self._sizes.get(self._url_key(url))
+        if size is not None:
+            return size
+        total, count = self._type_sizes.get(resource_type, (0, 0))
+        return total // count if count else 0
+
+    async def attach(self, page) -> None:
+        """Route ``page`` through the filter; no-op unless enabled."""
+        if not self.enabled:
+            return
+        load = {"blocked": 0, "allowed": 0, "bytes_saved": 0}
+
+        async def _route(route):
+            request = route.request
+            if self.is_blocked(request.resource_type, request.url):
+                load["blocked"] += 1
+                load["bytes_saved"] += self.estimate_size(request.resource_type, request.url)
+                await route.abort("blockedbyclient")
+            else:
+                load["allowed"] += 1
+                await route.continue_()
+
+        def _on_load(_page) -> None:
+            logger.info(
+                "Request filter on %s: blocked %d of %d requests (~%.1f KB saved)",
+                self._url_key(page.url), load["blocked"], load["blocked"] + load["allowed"],
+                load["bytes_saved"] / 1024,
+            )
+            self._totals["loads"] += 1
+            for k in ("blocked", "allowed", "bytes_saved"):
+                self._totals[k] += load[k]
+                load[k] = 0
+
+        await page.route("**/*", _route)
+        page.on("load", _on_load)
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "block_types": sorted(self.block_types),
+            "block_hosts": self.block_hosts,
+            "allow_hosts": self.allow_hosts,
+            **self._totals,
+            "learned_sizes": len(self._sizes),
+        }
+
+
+request_filter = RequestFilter()
@@ -3,14 +3,17 @@ from __future__ import annotations
 import asyncio
 import logging
 import re
+import time
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
+from app.clock import get_clock
 from app.config import Config
-from app.models import GrabTask
+from app.models import GrabTask, TimelineStage
 from app.storage import TaskStorage
+from app.time_sync import get_time_sync
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +31,15 @@ def get_scheduler() -> AsyncIOScheduler:
     return _scheduler
 
 
+def _run_date(dt: datetime) -> datetime:
+    """APScheduler run date for ``dt`` on the app clock.
+
+    APScheduler waits on the real clock; under a simulation's virtual
+    clock the date is mapped onto the real timeline.
+    """
+    return get_clock().to_real(dt)
+
+
 def set_storage(storage: TaskStorage):
     global _storage
     _storage = storage
@@ -46,13 +58,190 @@ def _sanitize(text: str) -> str:
     return text
 
 
+# --- Screening coalescing ---
+# Tasks for the same screening in the same mode are bought in one order.
+# The first task scheduled leads it and owns the jobs, the preheated page,
+# the polling and the purchase attempt; tasks scheduled later only add
+# their ticket_count (while the total stays within MAX_TICKETS_PER_ORDER)
+# and receive every status update of the leader, including the outcome.
+
+# leader task id -> {"screening", "mode", "members": {task_id: ticket_count}, "started", "cancelled"}
+_orders: dict[str, dict] = {}
+_order_of: dict[str, str] = {}  # task id -> leader task id
+
+
+def _order_members(task_id: str) -> list[str]:
+    """Task ids whose status follows ``task_id`` (itself first)."""
+    order = _orders.get(task_id)
+    return list(order["members"]) if order else [task_id]
+
+
+def _join_order(task: GrabTask) -> str | None:
+    """Add ``task`` to an open order for its screening and mode.
+
+    Returns the leader's task id, or None if ``task`` has to lead an order
+    of its own: no screening id, no order in its mode that hasn't started
+    buying yet, or its tickets would push the order past
+    ``MAX_TICKETS_PER_ORDER``.
+    """
+    leader = _order_of.get(task.id)
+    if leader is not None:
+        return None if leader == task.id else leader
+    if not task.ext_id_screening:
+        return None
+    for leader, order in _orders.items():
+        if order["screening"] != task.ext_id_screening or order["started"]:
+            continue
+        if order["mode"] != task.mode:
+            logger.warning(
+                "Task %s targets screening %s like task %s, but in %s mode (not %s); it gets an order of its own",
+                task.id, task.ext_id_screening, leader, task.mode, order["mode"],
+            )
+            continue
+        if sum(order["members"].values()) + task.ticket_count > Config.MAX_TICKETS_PER_ORDER:
+            continue
+        order["members"][task.id] = task.ticket_count
+        _order_of[task.id] = leader
+        return leader
+    return None
+
+
+def _lead_order(task: GrabTask) -> None:
+    order = _orders.setdefault(task.id, {
+        "screening": task.ext_id_screening, "mode": task.mode, "members": {}, "started": False, "cancelled": False,
+    })
+    order["members"][task.id] = task.ticket_count
+    _order_of[task.id] = task.id
+
+
+def _order_task(task: GrabTask) -> GrabTask:
+    """The task to buy with: the leader carrying its order's merged ticket_count.
+
+    Closes the order to new members, since the count is fixed from here on.
+    """
+    order = _orders.get(task.id)
+    if order is None:
+        return task
+    order["started"] = True
+    count = sum(order["members"].values())
+    if len(order["members"]) > 1:
+        logger.info(
+            "Task %s buys %d tickets for %d tasks on screening %s",
+            task.id, count, len(order["members"]), task.ext_id_screening,
+        )
+    return task.model_copy(update={"ticket_count": count}) if count != task.ticket_count else task
+
+
+def _close_order(task_id: str) -> None:
+    """The leader's attempt is over; its members stop following it and its timeline is dropped.
+
+    If the leader was cancelled while the attempt ran, the members still
+    waiting for tickets are handed on only now, so no second purchase for
+    the screening overlaps the one that was in flight.
+    """
+    order = _orders.pop(task_id, None)
+    _timelines.pop(task_id, None)
+    if order is None:
+        return
+    if order["cancelled"]:
+        _hand_off(task_id, order)
+        return
+    for member_id in order["members"]:
+        if _order_of.get(member_id) == task_id:
+            del _order_of[member_id]
+
+
+def _hand_off(leader_id: str, order: dict) -> None:
+    """Schedule a cancelled leader's remaining members again; they re-form the order under the next of them."""
+    remaining = [m for m in order["members"] if m != leader_id]
+    for member_id in remaining:
+        if _order_of.get(member_id) == leader_id:
+            del _order_of[member_id]
+    for member_id in remaining:
+        member = _storage.get_task(member_id) if _storage else None
+        if member and member.status not in ("success", "failed", "cancelled"):
+            schedule_grab(member)
+
+
+def _order_priority(task: GrabTask) -> int:
+    """An order queues for a grab slot at its most important task's priority."""
+    order = _orders.get(task.id)
+    if order is None or _storage is None:
+        return task.priority
+    members = (_storage.get_task(member_id) for member_id in order["members"])
+    return max([task.priority] + [member.priority for member in members if member])
+
+
+async def _acquire_slot(task: GrabTask, timeout: float | None = None) -> bool:
+    """Wait for a grab slot; False on timeout or if the task was cancelled meanwhile."""
+    from app.grab_slots import grab_slots
+
+    if grab_slots.holds(task.id):
+        return True
+    acquiring = asyncio.ensure_future(grab_slots.acquire(task.id, _order_priority(task), timeout))
+    # Free slots are handed out once the arrivals have settled; only report a wait beyond that
+    settle = (Config.GRAB_SLOT_SETTLE_MS + 10) / 1000 / get_clock().speed
+    await asyncio.wait([acquiring], timeout=settle)
+    if not acquiring.done():
+        position = grab_slots.position(task.id)
+        await _notify(task.id, "grabbing", f"Waiting for a grab slot (#{position} in line)...")
+    return await acquiring
+
+
+def _end_attempt(task_id: str) -> None:
+    """A purchase attempt is over: free its grab slot and close its order."""
+    from app.grab_slots import grab_slots
+
+    grab_slots.release(task_id)
+    _close_order(task_id)
+
+
+def get_orders() -> list[dict]:
+    return [
+        {"leader": leader, "screening": order["screening"], "mode": order["mode"],
+         "members": dict(order["members"]), "ticket_count": sum(order["members"].values()),
+         "started": order["started"], "cancelled": order["cancelled"]}
+        for leader, order in _orders.items()
+    ]
+
+
+def get_slot_queue() -> dict:
+    """Grab slot use per task; tasks following an order share their leader's place."""
+    from app.grab_slots import grab_slots
+
+    status = grab_slots.status()
+    return {
+        "capacity": status["capacity"],
+        "running": [member_id for leader in status["running"] for member_id in _order_members(leader)],
+        "waiting": {
+            member_id: position
+            for position, leader in enumerate(status["waiting"], start=1)
+            for member_id in _order_members(leader)
+        },
+    }
+
+
+def update_priority(task: GrabTask) -> None:
+    """Re-queue a task (or the order it follows) after its priority changed."""
+    from app.grab_slots import grab_slots
+
+    leader_id = _order_of.get(task.id, task.id)
+    leader = _storage.get_task(leader_id) if _storage and leader_id != task.id else task
+    if leader:
+        grab_slots.reprioritize(leader_id, _order_priority(leader))
+
+
 async def _notify(task_id: str, status: str, message: str):
-    """Update task in storage and notify via callback."""
+    """Update task in storage and notify via callback, for every task of its order."""
     message = _sanitize(message)
-    if _storage:
-        _storage.update_task(task_id, status=status, result_message=message)
-    if _on_task_update:
-        await _on_task_update(task_id, status, message)
+    members = _order_members(task_id)
+    if len(members) > 1 and status in ("success", "failed"):
+        message = f"{message} (shared order for {len(members)} tasks)"
+    for member_id in members:
+        if _storage:
+            _storage.update_task(member_id, status=status, result_message=message)
+        if _on_task_update:
+            await _on_task_update(member_id, status, message)
 
 
 async def _run_browser_grab(task: GrabTask):
@@ -60,6 +249,7 @@ async def _run_browser_grab(task: GrabTask):
     from app.grabber import browser_manager, ticket_grabber
 
     task_id = task.id
+    task = _order_task(task)
     await _notify(task_id, "grabbing", "Starting browser grab...")
 
     try:
@@ -67,6 +257,8 @@ async def _run_browser_grab(task: GrabTask):
         if not browser_manager.is_initialized:
             await _notify(task_id, "grabbing", "Starting browser...")
             await browser_manager.init_browser()
+        if not await _acquire_slot(task):
+            return
 
         async def on_status(status, msg):
             await _notify(task_id, status, msg)
@@ -79,6 +271,22 @@ async def _run_browser_grab(task: GrabTask):
     except Exception as e:
         logger.exception("Browser grab error for task %s", task_id)
         await _notify(task_id, "failed", str(e))
+    finally:
+        _end_attempt(task_id)
+
+
+async def _warm_connections(task: GrabTask):
+    """API mode pre-sale warmup: sync cookies, warm the HTTP pools past T-0, resolve redirects."""
+    from app.conn_warmer import connection_warmer
+    from app.cookie_bridge import cookie_bridge
+    from app.event_urls import event_urls
+
+    try:
+        await cookie_bridge.sync("sale warmup")
+        await connection_warmer.hold(datetime.fromisoformat(task.sale_time), task.eventim_url)
+        await event_urls.resolve(task)
+    except Exception:
+        logger.exception("Connection warm-up failed for task %s", task.id)
 
 
 async def _run_api_grab(task: GrabTask):
@@ -86,6 +294,7 @@ async def _run_api_grab(task: GrabTask):
     from app.api_grabber import api_grabber
 
     task_id = task.id
+    task = _order_task(task)
     await _notify(task_id, "grabbing", "Starting API grab...")
 
     try:
@@ -100,52 +309,329 @@ async def _run_api_grab(task: GrabTask):
     except Exception as e:
         logger.exception("API grab error for task %s", task_id)
         await _notify(task_id, "failed", str(e))
+    finally:
+        _end_attempt(task_id)
+
+
+# --- Pre-sale timeline ---
+# Browser tasks run three tracked stages, each as its own scheduler job:
+#   warmup     T-PRE_SALE_WARMUP    launch/verify the browser, warm the session, prewarm DNS/TLS
+#   open_page  T-PRE_SALE_OPEN_PAGE open and preheat the event page
+#   fire       T-0                  precise trigger, then refresh and grab
+# Hybrid tasks replace fire with:
+#   detect     T-PRE_SALE_POLL      HTTP polling until tickets open, then refresh and grab
+
+_timelines: dict[str, list[TimelineStage]] = {}
+_preheated_pages: dict = {}  # task_id -> page opened by the open_page stage
+_session_checks: dict[str, asyncio.Future] = {}  # sale_time -> the warmup session check shared by its tasks
+_on_timeline_update = None  # async callback(task_id, stages)
+
+
+def set_on_timeline_update(callback):
+    """Set callback for timeline changes: async fn(task_id, stages as dicts)."""
+    global _on_timeline_update
+    _on_timeline_update = callback
+
+
+def get_timeline(task_id: str) -> list[dict]:
+    """Stages of a task, or of the order leader it follows."""
+    leader = _order_of.get(task_id, task_id)
+    return [stage.model_dump() for stage in _timelines.get(leader, [])]
+
+
+def get_timelines() -> dict[str, list[dict]]:
+    return {member_id: get_timeline(member_id) for leader in _timelines for member_id in _order_members(leader)}
+
+
+def _build_timeline(task: GrabTask, sale_dt: datetime, now: datetime) -> list[TimelineStage]:
+    """Plan the stages of a task; a stage whose time has passed starts right away."""
+    warmup_at = sale_dt - timedelta(seconds=Config.PRE_SALE_WARMUP)
+    open_at = sale_dt - timedelta(seconds=Config.PRE_SALE_OPEN_PAGE)
+    stages = [
+        TimelineStage(name="warmup", offset_s=-Config.PRE_SALE_WARMUP,
+                      planned_at=max(warmup_at, now).isoformat(), deadline=open_at.isoformat()),
+        TimelineStage(name="open_page", offset_s=-Config.PRE_SALE_OPEN_PAGE,
+                      planned_at=open_at.isoformat(), deadline=sale_dt.isoformat()),
+    ]
+    if task.mode == "hybrid":
+        detect_at = sale_dt - timedelta(seconds=Config.PRE_SALE_POLL)
+        stages.append(TimelineStage(name="detect", offset_s=-Config.PRE_SALE_POLL, planned_at=detect_at.isoformat(),
+                                    deadline=(sale_dt + timedelta(seconds=Config.HYBRID_DETECT_TIMEOUT)).isoformat()))
+    else:
+        stages.append(TimelineStage(name="fire", offset_s=0,
+                                    planned_at=sale_dt.isoformat(), deadline=sale_dt.isoformat()))
+    return stages
+
+
+def _get_stage(task_id: str, name: str) -> TimelineStage | None:
+    return next((st for st in _timelines.get(task_id, []) if st.name == name), None)
+
+
+async def _emit_timeline(task_id: str, members: list[str] | None = None, timeline: list | None = None):
+    """Send the timeline to every order member; pass both once the order has closed and dropped it."""
+    if _on_timeline_update:
+        stages = get_timeline(task_id) if timeline is None else [stage.model_dump() for stage in timeline]
+        for member_id in members or _order_members(task_id):
+            await _on_timeline_update(member_id, stages)
+
+
+async def _run_stage(task: GrabTask, name: str, fn):
+    """Run one timeline stage, recording start latency, duration and deadline."""
+    stage = _get_stage(task.id, name)
+    if stage is None:
+        return
+    # The last stage ends the attempt, and closing the order drops the timeline
+    members, timeline = _order_members(task.id), _timelines[task.id]
+    tz = ZoneInfo(Config.TIMEZONE)
+    started = get_time_sync().now(tz)
+    stage.status = "running"
+    stage.started_at = started.isoformat()
+    stage.latency_ms = round((started - datetime.fromisoformat(stage.planned_at)).total_seconds() * 1000, 1)
+    await _emit_timeline(task.id)
+
+    t0 = time.perf_counter()
+    try:
+        stage.message = await fn(task, stage) or ""
+        stage.status = "done"
+    except Exception as e:
+        logger.warning("Timeline stage %s failed for task %s: %s", name, task.id, e)
+        stage.status = "failed"
+        stage.message = _sanitize(str(e))
+    finished = get_time_sync().now(tz)
+    stage.finished_at = finished.isoformat()
+    if stage.duration_ms is None:
+        stage.duration_ms = round((time.perf_counter() - t0) * 1000, 1)
+    if stage.met_deadline is None:
+        stage.met_deadline = finished <= datetime.fromisoformat(stage.deadline)
+    if not stage.met_deadline:
+        logger.warning("Timeline stage %s for task %s missed its deadline %s", name, task.id, stage.deadline)
+    if task.id in _timelines:
+        await _emit_timeline(task.id)
+    else:
+        await _emit_timeline(task.id, members, timeline)
+
+
+async def _stage_warmup(task: GrabTask, stage: TimelineStage) -> str:
+    """T-60: launch or verify the browser, warm the session and connections, resolve redirects."""
+    from app.conn_warmer import connection_warmer
+    from app.event_urls import event_urls
+    from app.grabber import browser_manager
+
+    if not await browser_manager.ensure_healthy():
+        raise RuntimeError("Browser restart failed")
+    session = await _check_session(task.sale_time)
+    prewarm_ms = await browser_manager.prewarm(task.eventim_url) if task.eventim_url else None
+    warmed = await connection_warmer.hold(datetime.fromisoformat(task.sale_time), task.eventim_url)
+    resolved = await event_urls.resolve(task)
+    parts = ["browser ok", session.get("message", "")]
+    if prewarm_ms is not None:
+        parts.append(f"prewarmed in {prewarm_ms:.0f}ms")
+    parts.append(f"{sum(ms is not None for ms in warmed.values())}/{len(warmed)} HTTP pools warm")
+    if resolved and resolved["hops"]:
+        parts.append(f"skipping {resolved['hops']} redirect(s), ~{resolved['redirect_ms']:.0f}ms")
+    return ", ".join(p for p in parts if p)
+
+
+async def _check_session(sale_time: str) -> dict:
+    """Check the session once for all tasks of a sale time; checks of past sale times are dropped."""
+    from app.grabber import browser_manager
+
+    now = get_time_sync().now(ZoneInfo(Config.TIMEZONE))
+    for key in [key for key in _session_checks if datetime.fromisoformat(key) < now]:
+        del _session_checks[key]
+    check = _session_checks.get(sale_time)
+    if check is None:
+        check = _session_checks[sale_time] = asyncio.ensure_future(browser_manager.check_session())
+    # Shielded: one waiting task being cancelled doesn't cancel the check for the others
+    return await asyncio.shield(check)
+
+
+async def _stage_open_page(task: GrabTask, stage: TimelineStage) -> str:
+    """T-15: open the event page so only a refresh is left at T-0."""
+    from app.grabber import browser_manager, ticket_grabber
+
+    # A slot covers the preheated page until the purchase ends; without one
+    # by the fire job, the page is opened once a slot frees up
+    fire_at = datetime.fromisoformat(task.sale_time) - timedelta(seconds=Config.PRE_SALE_FIRE_LEAD)
+    wait_s = (fire_at - get_time_sync().now(ZoneInfo(Config.TIMEZONE))).total_seconds()
+    if not await _acquire_slot(task, timeout=max(0.0, wait_s)):
+        raise RuntimeError("No grab slot free before sale time, the page opens when one frees up")
+    await _notify(task.id, "grabbing", "Preheating browser...")
+    # Liveness check; restarts a dead browser (or waits for a restart in progress)
+    await browser_manager.ensure_healthy()
+    page = await ticket_grabber.preheat(task)
+    if not page:
+        raise RuntimeError("Preheat failed, will open the page at sale time")
+    _preheated_pages[task.id] = page
+    await _notify(task.id, "grabbing", "Page preheated, waiting for sale time...")
+    return "page open"
+
+
+async def _stage_fire(task: GrabTask, stage: TimelineStage) -> str:
+    """T-0: fire on the precise trigger, then refresh the preheated page and grab."""
+    from app.trigger import precise_trigger
+
+    record = await precise_trigger.wait_until(datetime.fromisoformat(task.sale_time), task_id=task.id)
+    fired = time.perf_counter()
+    # The job started early on purpose; time this stage from the fire
+    stage.started_at = record.fired_at
+    stage.latency_ms = record.skew_ms
+    stage.met_deadline = record.within_tolerance
+    try:
+        return await _grab_after_fire(_order_task(task))
+    finally:
+        stage.duration_ms = round((time.perf_counter() - fired) * 1000, 1)
+        _end_attempt(task.id)
 
 
-async def _preheat_browser(task: GrabTask):
-    """Open Eventim page ahead of sale time to warm up connection."""
+async def _stage_detect(task: GrabTask, stage: TimelineStage) -> str:
+    """Hybrid T-5: poll over HTTP until tickets open, then refresh the preheated page and grab.
+
+    Like ``_run_hybrid_grab``, a timeout or error marks the task failed
+    (the stage record alone would leave it "grabbing") and gives back the
+    preheated page before the error is re-raised for the stage.
+    """
+    from app.api_grabber import api_grabber
     from app.grabber import browser_manager, ticket_grabber
 
-    await _notify(task.id, "grabbing", "Preheating browser...")
+    task = _order_task(task)
+    await _notify(task.id, "grabbing", "Watching for tickets to open...")
+    page = None
+    notified = False
+    try:
+        detection = await api_grabber.wait_for_availability(task)
+        if detection is None:
+            raise RuntimeError("Tickets did not open before the detection timeout")
+        page = _preheated_pages.pop(task.id, None)
+        if _storage and _storage.get_task(task.id) is None:
+            return "task was deleted before tickets opened"
+        if detection["url"] and detection["url"] != task.eventim_url and (page is None or page.is_closed()):
+            task = task.model_copy(update={"eventim_url": detection["url"]})
+        if not await _acquire_slot(task):
+            return "task was cancelled while waiting for a grab slot"
 
+        async def on_status(status, msg):
+            await _notify(task.id, status, msg)
+
+        # From here the grabber owns the page: kept open for payment, released on failure
+        grab_page, page = page, None
+        result = await ticket_grabber.grab_detected(grab_page, task, detection, on_status=on_status)
+        stage.latency_ms = result["detect_to_click_ms"]  # detection -> first click
+        final_status = "success" if result["success"] else "failed"
+        await _notify(task.id, final_status, result["message"])
+        notified = True
+        if not result["success"]:
+            raise RuntimeError(result["message"])
+        return result["message"]
+    except Exception as e:
+        if not notified:
+            await _notify(task.id, "failed", str(e))
+        raise
+    finally:
+        page = page or _preheated_pages.pop(task.id, None)
+        if page is not None:
+            await browser_manager.release_page(page)
+        _end_attempt(task.id)
+
+
+async def _run_hybrid_grab(task: GrabTask):
+    """Hybrid grab without a timeline (sale imminent or Run Now): detect, then grab."""
+    from app.api_grabber import api_grabber
+    from app.grabber import browser_manager, ticket_grabber
+
+    task_id = task.id
+    task = _order_task(task)
+    await _notify(task_id, "grabbing", "Watching for tickets to open...")
     try:
         if not browser_manager.is_initialized:
             await browser_manager.init_browser()
+        detection = await api_grabber.wait_for_availability(task)
+        if detection is None:
+            await _notify(task_id, "failed", "Tickets did not open before the detection timeout")
+            return
+        if detection["url"]:
+            task = task.model_copy(update={"eventim_url": detection["url"]})
+        if not await _acquire_slot(task):
+            return
 
-        page = await ticket_grabber.preheat(task)
-        if page:
-            await _notify(task.id, "grabbing", "Page preheated, waiting for sale time...")
-
-            # Wait until exact sale time, then refresh and grab
-            if task.sale_time:
-                sale_dt = datetime.fromisoformat(task.sale_time)
-                now = datetime.now(ZoneInfo(Config.TIMEZONE))
-                wait_seconds = (sale_dt - now).total_seconds()
-                if wait_seconds > 0:
-                    logger.info("Waiting %.1f seconds until sale time", wait_seconds)
-                    await asyncio.sleep(max(0, wait_seconds))
-
-            # Now grab
-            async def on_status(status, msg):
-                await _notify(task.id, status, msg)
-
-            result = await ticket_grabber.grab_with_refresh(page, task, on_status=on_status)
-            final_status = "success" if result["success"] else "failed"
-            await _notify(task.id, final_status, result["message"])
-        else:
-            # Fall back to regular grab
-            await _run_browser_grab(task)
+        async def on_status(status, msg):
+            await _notify(task_id, status, msg)
 
+        result = await ticket_grabber.grab_detected(None, task, detection, on_status=on_status)
+        await _notify(task_id, "success" if result["success"] else "failed", result["message"])
     except Exception as e:
-        logger.exception("Preheat/grab error for task %s", task.id)
-        await _notify(task.id, "failed", str(e))
+        logger.exception("Hybrid grab error for task %s", task_id)
+        await _notify(task_id, "failed", str(e))
+    finally:
+        _end_attempt(task_id)
+
+
+async def _grab_after_fire(task: GrabTask) -> str:
+    """Grab on the page the open_page stage preheated, or open it now if there is none."""
+    from app.grabber import ticket_grabber
+
+    page = _preheated_pages.pop(task.id, None)
+    if _storage and _storage.get_task(task.id) is None:
+        return "task was deleted before sale time"
+    if not await _acquire_slot(task):
+        return "task was cancelled while waiting for a grab slot"
+
+    async def on_status(status, msg):
+        await _notify(task.id, status, msg)
+
+    if page is not None and not page.is_closed():
+        result = await ticket_grabber.grab_with_refresh(page, task, on_status=on_status)
+    else:
+        await _notify(task.id, "grabbing", "No preheated page, opening it now...")
+        result = await ticket_grabber.grab_ticket(task, on_status=on_status)
+    final_status = "success" if result["success"] else "failed"
+    await _notify(task.id, final_status, result["message"])
+    if not result["success"]:
+        raise RuntimeError(result["message"])
+    return result["message"]
+
+
+async def _run_timeline_stage(task: GrabTask, name: str):
+    """Scheduler job entry point for one timeline stage."""
+    stage_fns = {"warmup": _stage_warmup, "open_page": _stage_open_page, "fire": _stage_fire, "detect": _stage_detect}
+    await _run_stage(task, name, stage_fns[name])
+
+
+def _schedule_timeline(task: GrabTask, sale_dt: datetime, now: datetime):
+    scheduler = get_scheduler()
+    _timelines[task.id] = _build_timeline(task, sale_dt, now)
+    # The fire job starts a little early; the precise trigger aims at T-0
+    last = "detect" if task.mode == "hybrid" else "fire"
+    run_dates = {
+        "warmup": datetime.fromisoformat(_timelines[task.id][0].planned_at),
+        "open_page": sale_dt - timedelta(seconds=Config.PRE_SALE_OPEN_PAGE),
+        last: (sale_dt - timedelta(seconds=Config.PRE_SALE_POLL) if last == "detect"
+               else sale_dt - timedelta(seconds=Config.PRE_SALE_FIRE_LEAD)),
+    }
+    for name, job_prefix in (("warmup", "warmup_"), ("open_page", "preheat_"), (last, "fire_")):
+        scheduler.add_job(
+            _run_timeline_stage,
+            "date",
+            run_date=_run_date(run_dates[name]),
+            args=[task, name],
+            id=f"{job_prefix}{task.id}",
+            replace_existing=True,
+            misfire_grace_time=60,
+        )
+    logger.info(
+        "Scheduled timeline for task %s: warmup %s, open page %s, %s %s",
+        task.id, run_dates["warmup"], run_dates["open_page"], last, run_dates[last],
+    )
 
 
 def schedule_grab(task: GrabTask) -> bool:
     """Schedule a grab task based on its sale_time.
 
-    For browser mode: schedules preheat 30s before sale, then grab at sale time.
-    For API mode: schedules poll+grab at sale time.
+    For browser mode: schedules the pre-sale timeline (warmup, open page, fire).
+    For hybrid mode: the same timeline, with HTTP detection in place of the fire.
+    For API mode: warms the HTTP pools at T-60 and schedules poll+grab at sale time.
+    A task for a screening that already has an open order joins that order
+    instead of getting jobs of its own.
     """
     scheduler = get_scheduler()
 
@@ -159,42 +645,52 @@ def schedule_grab(task: GrabTask) -> bool:
         logger.error("Invalid sale_time format: %s", task.sale_time)
         return False
 
-    now = datetime.now(ZoneInfo(Config.TIMEZONE))
+    leader = _join_order(task)
+    if leader is not None:
+        logger.info(
+            "Task %s joins the order of task %s for screening %s (%d tickets)",
+            task.id, leader, task.ext_id_screening, sum(_orders[leader]["members"].values()),
+        )
+        return True
+    _lead_order(task)
 
-    if task.mode == "browser":
-        # Schedule preheat (opens page before sale time)
+    now = get_time_sync().now(ZoneInfo(Config.TIMEZONE))
+
+    if task.mode in ("browser", "hybrid"):
         preheat_time = sale_dt - timedelta(seconds=Config.PRE_SALE_OPEN_PAGE)
         if preheat_time > now:
-            scheduler.add_job(
-                _preheat_browser,
-                "date",
-                run_date=preheat_time,
-                args=[task],
-                id=f"preheat_{task.id}",
-                replace_existing=True,
-                misfire_grace_time=60,
-            )
-            logger.info("Scheduled preheat for task %s at %s", task.id, preheat_time)
+            _schedule_timeline(task, sale_dt, now)
         else:
             # Sale time already passed or imminent, run immediately
             scheduler.add_job(
-                _run_browser_grab,
+                _run_hybrid_grab if task.mode == "hybrid" else _run_browser_grab,
                 "date",
-                run_date=now + timedelta(seconds=2),
+                run_date=_run_date(now + timedelta(seconds=2)),
                 args=[task],
                 id=f"grab_{task.id}",
                 replace_existing=True,
                 misfire_grace_time=300,
             )
-            logger.info("Scheduled immediate browser grab for task %s", task.id)
+            logger.info("Scheduled immediate %s grab for task %s", task.mode, task.id)
     else:
         # API mode: start polling slightly before sale time
         poll_time = sale_dt - timedelta(seconds=Config.PRE_SALE_POLL)
+        warm_time = sale_dt - timedelta(seconds=Config.PRE_SALE_WARMUP)
+        if warm_time > now:
+            scheduler.add_job(
+                _warm_connections,
+                "date",
+                run_date=_run_date(warm_time),
+                args=[task],
+                id=f"warm_{task.id}",
+                replace_existing=True,
+                misfire_grace_time=30,
+            )
         if poll_time > now:
             scheduler.add_job(
                 _run_api_grab,
                 "date",
-                run_date=poll_time,
+                run_date=_run_date(poll_time),
                 args=[task],
                 id=f"api_grab_{task.id}",
                 replace_existing=True,
@@ -205,7 +701,7 @@ def schedule_grab(task: GrabTask) -> bool:
             scheduler.add_job(
                 _run_api_grab,
                 "date",
-                run_date=now + timedelta(seconds=2),
+                run_date=_run_date(now + timedelta(seconds=2)),
                 args=[task],
                 id=f"api_grab_{task.id}",
                 replace_existing=True,
@@ -217,18 +713,86 @@ def schedule_grab(task: GrabTask) -> bool:
 
 
 def cancel_grab(task_id: str) -> bool:
-    """Cancel scheduled jobs for a task."""
+    """Cancel scheduled jobs for a task.
+
+    A task following an order just leaves it. Cancelling a leader hands
+    its order to the remaining tasks, which are scheduled again and so
+    re-form the order under the next of them. If the leader's purchase
+    attempt is already running, the hand-off waits until it has ended
+    (the members keep following it meanwhile, outcome included).
+    """
+    leader = _order_of.pop(task_id, None)
+    if leader is not None and leader != task_id:
+        _orders[leader]["members"].pop(task_id, None)
+        logger.info("Task %s left the order of task %s", task_id, leader)
+        return True
+    order = _orders.get(task_id)
+    in_flight = order is not None and order["started"]
+    if in_flight:
+        # The running attempt still holds the slot and closes the order when it ends
+        order["cancelled"] = True
+        logger.info("Task %s cancelled during its attempt; its order is handed on once the attempt ends", task_id)
+    else:
+        _orders.pop(task_id, None)
+        from app.grab_slots import grab_slots
+        grab_slots.release(task_id)
+
+    # A page opened by the open_page stage is left to the browser's page reaper
+    _preheated_pages.pop(task_id, None)
+    _timelines.pop(task_id, None)
+    from app.event_urls import event_urls
+    event_urls.forget(task_id)
+    cancelled = _remove_jobs(task_id)
+
+    if order is not None and not in_flight:
+        _hand_off(task_id, order)
+    return cancelled
+
+
+def _remove_jobs(task_id: str) -> bool:
+    """Remove the pending jobs of a task; True if there were any."""
     scheduler = get_scheduler()
-    cancelled = False
-    for prefix in ("preheat_", "grab_", "api_grab_"):
+    removed = False
+    for prefix in ("warmup_", "preheat_", "fire_", "grab_", "warm_", "api_grab_"):
         job_id = f"{prefix}{task_id}"
         try:
             scheduler.remove_job(job_id)
-            cancelled = True
+            removed = True
             logger.info("Cancelled job %s", job_id)
         except Exception:
             pass
-    return cancelled
+    return removed
+
+
+async def run_now(task: GrabTask) -> str | None:
+    """Start the purchase for ``task``'s order right away (Run Now).
+
+    The order's pending jobs are removed, so the purchase isn't attempted
+    again at sale time. A task following an order starts its leader's
+    purchase, and one not scheduled joins or leads an order first. Returns
+    the leader's task id, or None if that order is already buying.
+    """
+    from app.grabber import browser_manager
+
+    leader = _order_of.get(task.id) or _join_order(task)
+    if leader is None:
+        _lead_order(task)
+        leader = task.id
+    order = _orders[leader]
+    if order["started"]:
+        logger.info("Run Now for task %s: the order of task %s is already buying", task.id, leader)
+        return None
+    leader_task = task if leader == task.id else (_storage.get_task(leader) if _storage else None) or task
+    _remove_jobs(leader)
+    _timelines.pop(leader, None)
+    page = _preheated_pages.pop(leader, None)
+    if page is not None:
+        await browser_manager.release_page(page)
+
+    run = {"browser": _run_browser_grab, "hybrid": _run_hybrid_grab}.get(leader_task.mode, _run_api_grab)
+    asyncio.create_task(run(leader_task))
+    logger.info("Run Now: started the %s purchase of task %s for task %s", leader_task.mode, leader, task.id)
+    return leader
 
 
 def start_scheduler():
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from pathlib import Path
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ("off", "on-failure", "async", "ring")
+
+
+class ScreenshotRecorder:
+    """Debug screenshots that never sit on the grab's critical path.
+
+    Policies (``Config.SCREENSHOT_POLICY``):
+        off         never capture
+        on-failure  capture once a flow attempt has failed
+        async       capture after clicks, in the background
+        ring        keep the last ``SCREENSHOT_RING_SIZE`` frames in memory
+                    (JPEG, no disk I/O) and write them out on failure
+
+    Every capture runs as a background task: callers never await the PNG
+    encode or the disk write, so the next click is never delayed by it.
+    """
+
+    def __init__(self, policy: str | None = None, ring_size: int | None = None):
+        self.policy = policy or Config.SCREENSHOT_POLICY
+        if self.policy not in POLICIES:
+            logger.warning("Unknown screenshot policy %r, using 'off'", self.policy)
+            self.policy = "off"
+        self._ring: deque[tuple[str, float, bytes]] = deque(maxlen=ring_size or Config.SCREENSHOT_RING_SIZE)
+        self._tasks: set[asyncio.Task] = set()
+        self._by_page: dict[object, set[asyncio.Task]] = {}  # page -> its pending captures
+        self._dir = Path(Config.SCREENSHOT_DIR)
+
+    def checkpoint(self, page, name: str) -> None:
+        """A notable page state (e.g. page loaded); kept only in ring mode."""
+        if self.policy == "ring":
+            self._spawn(page, self._capture_to_ring(page, name))
+
+    def after_click(self, page, name: str) -> None:
+        """The flow just clicked something."""
+        if self.policy == "async":
+            self._spawn(page, self._capture_to_disk(page, name))
+        elif self.policy == "ring":
+            self._spawn(page, self._capture_to_ring(page, name))
+
+    def on_failure(self, page, name: str) -> None:
+        """A flow attempt failed; persist whatever evidence the policy keeps."""
+        if self.policy in ("on-failure", "async"):
+            self._spawn(page, self._capture_to_disk(page, name))
+        elif self.policy == "ring":
+            self._spawn(page, self._dump_ring(page, name))
+
+    async def drain(self) -> None:
+        """Wait for pending captures (shutdown and benchmarks only)."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def drain_page(self, page) -> None:
+        """Wait for pending captures of ``page`` only, e.g. before it is reused or closed."""
+        pending = self._by_page.get(page)
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    # ── internal ────────────────────────────────────────────────
+
+    def _spawn(self, page, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        self._by_page.setdefault(page, set()).add(task)
+        task.add_done_callback(lambda t: self._done(page, t))
+
+    def _done(self, page, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        pending = self._by_page.get(page)
+        if pending is not None:
+            pending.discard(task)
+            if not pending:
+                del self._by_page[page]
+
+    async def _capture_to_disk(self, page, name: str) -> None:
+        try:
+            data = await page.screenshot(type="png")
+            await asyncio.to_thread(self._write, f"{name}.png", data)
+        except Exception as e:
+            logger.debug("Screenshot %s failed: %s", name, e)
+
+    async def _capture_to_ring(self, page, name: str) -> None:
+        try:
+            data = await page.screenshot(type="jpeg", quality=60)
+            self._ring.append((name, time.time(), data))
+        except Exception as e:
+            logger.debug("Ring screenshot %s failed: %s", name, e)
+
+    async def _dump_ring(self, page, name: str) -> None:
+        await self._capture_to_ring(page, name)
+        frames = list(self._ring)
+        try:
+            for i, (label, _ts, data) in enumerate(frames):
+                await asyncio.to_thread(self._write, f"ring_{i:02d}_{label}.jpg", data)
+            logger.info("Wrote %d ring screenshots after %s", len(frames), name)
+        except Exception as e:
+            logger.debug("Writing ring screenshots failed: %s", e)
+
+    def _write(self, filename: str, data: bytes) -> None:
+        self._dir.mkdir(parents=True, exist_ok=True)
+        (self._dir / filename).write_bytes(data)
+
+
+screenshots = ScreenshotRecorder()
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class SelectorStats:
+    """Remembers which selector won each purchase-flow step.
+
+    Eventim's Berlinale pages use the same template every day, so the
+    selector that worked last time is almost always the one that works
+    next time. Hits are kept in memory and persisted by ``flush()`` once a
+    grab is over, so recording never costs a disk write mid-flow. A hit's
+    weight halves every SELECTOR_STATS_HALF_LIFE_DAYS since the selector
+    last won, so after a template change the new winner overtakes a long
+    history of the old one within days.
+
+    File format: ``{step: {key: {"hits", "strategy", "last_success"}}}``
+    """
+
+    def __init__(self, file_path: str = Config.SELECTOR_STATS_FILE):
+        self.file_path = Path(file_path)
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        self.stats: dict[str, dict[str, dict]] = self._load()
+        self._dirty = False
+
+    def _load(self) -> dict[str, dict[str, dict]]:
+        if not self.file_path.exists():
+            return {}
+        try:
+            data = json.loads(self.file_path.read_text(encoding="utf-8"))
+            return data if isinstance(data, dict) else {}
+        except (json.JSONDecodeError, ValueError):
+            return {}
+
+    def _save(self) -> None:
+        self.file_path.write_text(
+            json.dumps(self.stats, indent=2, ensure_ascii=False),
+            encoding="utf-8",
+        )
+
+    def record(self, step: str, key: str, strategy: str) -> None:
+        """Count a successful use of selector ``key`` at ``step``."""
+        entry = self.stats.setdefault(step, {}).setdefault(key, {"hits": 0})
+        entry["hits"] += 1
+        entry["strategy"] = strategy
+        entry["last_success"] = datetime.now(ZoneInfo(Config.TIMEZONE)).isoformat()
+        self._dirty = True
+
+    def order(self, step: str, candidates: list) -> list:
+        """Return ``candidates`` with historical winners first.
+
+        Candidates are sequences whose first item is the selector key.
+        Winners are ranked by decayed hit count, then recency; never-seen
+        candidates keep their hard-coded priority order after them.
+        """
+        seen = self.stats.get(step)
+        if not seen:
+            return candidates
+        now = datetime.now(ZoneInfo(Config.TIMEZONE)).timestamp()
+
+        def rank(item: tuple[int, tuple]) -> tuple:
+            index, candidate = item
+            entry = seen.get(candidate[0])
+            if not entry:
+                return (1, 0.0, 0.0, index)
+            return (0, -_score(entry, now), _newest_first(entry), index)
+
+        return [c for _, c in sorted(enumerate(candidates), key=rank)]
+
+    def flush(self) -> None:
+        """Persist pending hits, if any."""
+        if not self._dirty:
+            return
+        try:
+            self._save()
+            self._dirty = False
+        except OSError:
+            logger.exception("Failed to save selector stats")
+
+    def reset(self, step: str | None = None) -> None:
+        """Forget learned ordering for one step, or for all steps."""
+        if step is None:
+            self.stats = {}
+        else:
+            self.stats.pop(step, None)
+        try:
+            self._save()
+            self._dirty = False
+        except OSError:
+            logger.exception("Failed to save selector stats")
+            self._dirty = True
+
+    def report(self) -> dict:
+        """Per-step selectors sorted the way the next grab will try them."""
+        now = datetime.now(ZoneInfo(Config.TIMEZONE)).timestamp()
+        return {
+            step: [
+                {"key": key, **entry, "score": round(_score(entry, now), 2)}
+                for key, entry in sorted(
+                    entries.items(),
+                    key=lambda kv: (-_score(kv[1], now), _newest_first(kv[1])),
+                )
+            ]
+            for step, entries in self.stats.items()
+        }
+
+
+def _score(entry: dict, now: float) -> float:
+    """Hit count, halved for every SELECTOR_STATS_HALF_LIFE_DAYS since the last success."""
+    last_success = -_newest_first(entry)
+    age_days = max(0.0, now - last_success) / 86400 if last_success else 0.0
+    return entry["hits"] * 0.5 ** (age_days / Config.SELECTOR_STATS_HALF_LIFE_DAYS)
+
+
+def _newest_first(entry: dict) -> float:
+    """Sort key that orders entries by last success, newest first."""
+    try:
+        return -datetime.fromisoformat(entry["last_success"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return 0.0
+
+
+selector_stats = SelectorStats()
@@ -1,12 +1,19 @@
 """Atomic clock synchronization with NTP and HTTP fallback support."""
 import asyncio
 import logging
+import math
 import socket
+import statistics
+import time
 from abc import ABC, abstractmethod
-from datetime import datetime, timedelta, timezone
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from typing import Optional
 from urllib.parse import urlparse
+from zoneinfo import ZoneInfo
 import httpx
+from app.clock import get_clock
 from app.config import Config
 
 logger = logging.getLogger(__name__)
@@ -28,10 +35,20 @@ class TimeSyncProvider(ABC):
     def name(self) -> str:
         """Provider name for logging."""
         pass
+    
+    def status(self) -> dict:
+        """Details of the last successful sync, for ``get_status()``."""
+        return {}
 
 
 class NTPTimeSyncProvider(TimeSyncProvider):
-    """NTP-based atomic clock synchronization (highest precision)."""
+    """NTP-based atomic clock synchronization (highest precision).
+
+    All servers are queried in parallel with several samples each, then
+    combined with an NTP-style clock filter: per server only the lowest
+    round-trip samples are trusted, servers disagreeing with the median are
+    rejected as outliers, and the survivors are combined weighted by delay.
+    """
     
     NTP_SERVERS = [
         "time.google.com",           # Google's NTP (stratum 1)
@@ -39,12 +56,19 @@ class NTPTimeSyncProvider(TimeSyncProvider):
         "ptbtime1.ptb.de",          # German atomic clock (PTB Braunschweig)
         "pool.ntp.org",             # NTP pool
     ]
+    NTP_PORT = 123
+    TIMEOUT = 5.0                # budget for the whole sync, not per server
+    SAMPLES_PER_SERVER = 4
+    SAMPLE_SPACING = 0.05        # seconds between samples to the same server
+    FILTER_KEEP = 2              # lowest-delay samples kept per server
+    OUTLIER_MIN_SECONDS = 0.010  # never reject servers closer than this to the median
     
     def __init__(self):
         self._ntp_available = False
+        self._last_result: dict = {}
         try:
             import ntplib
-            self._ntp_client = ntplib.NTPClient()
+            self._ntplib = ntplib
             self._ntp_available = True
             logger.info("NTP provider initialized (ntplib available)")
         except ImportError:
@@ -53,75 +77,166 @@ class NTPTimeSyncProvider(TimeSyncProvider):
     def name(self) -> str:
         return "NTP"
     
+    def status(self) -> dict:
+        return dict(self._last_result)
+    
     async def sync(self) -> tuple[bool, Optional[float]]:
         """Sync using NTP protocol."""
         if not self._ntp_available:
             return False, None
         
-        # Configure proxy for NTP if needed
-        original_socket = None
-        if Config.PROXY_URL:
-            original_socket = socket.socket
-            if not self._configure_socks_proxy():
-                logger.warning("SOCKS proxy configuration failed, trying direct NTP")
+        # Proxy settings are applied per socket, never to the global socket module
+        proxy = self._socks_proxy() if Config.PROXY_URL else None
         
-        try:
-            for server in self.NTP_SERVERS:
-                try:
-                    logger.info(f"Syncing with NTP server: {server}")
-                    
-                    # Run blocking NTP call in executor
-                    loop = asyncio.get_event_loop()
-                    response = await loop.run_in_executor(
-                        None,
-                        lambda s=server: self._ntp_client.request(s, version=3, timeout=5)
-                    )
-                    
-                    offset = response.offset
-                    logger.info(
-                        f"✓ NTP sync successful | "
-                        f"Server: {server} | "
-                        f"Offset: {offset*1000:.2f}ms | "
-                        f"Stratum: {response.stratum}"
-                    )
-                    return True, offset
-                    
-                except Exception as e:
-                    logger.debug(f"NTP server {server} failed: {e}")
-                    continue
-            
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + self.TIMEOUT
+        logger.info(f"Syncing with {len(self.NTP_SERVERS)} NTP servers in parallel")
+        per_server = await asyncio.gather(*(
+            loop.run_in_executor(None, self._sample_server, server, proxy, deadline)
+            for server in self.NTP_SERVERS
+        ))
+        samples = [sample for server_samples in per_server for sample in server_samples]
+        
+        result = self._clock_filter(samples)
+        if result is None:
             logger.warning("All NTP servers failed")
             return False, None
-            
-        finally:
-            # Restore original socket if we modified it
-            if original_socket:
-                socket.socket = original_socket
+        
+        self._last_result = result
+        logger.info(
+            f"✓ NTP sync successful | "
+            f"Source: {result['source']} | "
+            f"Offset: {result['offset_ms']:.2f}ms | "
+            f"Dispersion: {result['dispersion_ms']:.2f}ms | "
+            f"Servers: {len(result['survivors'])}/{len(self.NTP_SERVERS)}"
+        )
+        return True, result["offset_ms"] / 1000
     
-    def _configure_socks_proxy(self) -> bool:
-        """Configure SOCKS proxy for NTP traffic."""
+    def _sample_server(self, server: str, proxy: Optional[dict], deadline: float) -> list[dict]:
+        """Take up to SAMPLES_PER_SERVER samples from one server (runs in a thread)."""
+        ntplib = self._ntplib
+        samples = []
+        try:
+            if proxy:
+                import socks
+                family, sockaddr = socket.AF_INET, (server, self.NTP_PORT)
+            else:
+                addrinfo = socket.getaddrinfo(server, self.NTP_PORT, type=socket.SOCK_DGRAM)[0]
+                family, sockaddr = addrinfo[0], addrinfo[4]
+        except Exception as e:
+            logger.debug(f"NTP server {server} failed: {e}")
+            return samples
+        
+        for i in range(self.SAMPLES_PER_SERVER):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if proxy:
+                sock = socks.socksocket(family, socket.SOCK_DGRAM)
+                sock.set_proxy(**proxy)
+            else:
+                sock = socket.socket(family, socket.SOCK_DGRAM)
+            try:
+                sock.settimeout(remaining)
+                query = ntplib.NTPPacket(
+                    mode=3, version=3, tx_timestamp=ntplib.system_to_ntp_time(time.time())
+                )
+                sock.sendto(query.to_data(), sockaddr)
+                data, _ = sock.recvfrom(256)
+                dest_timestamp = ntplib.system_to_ntp_time(time.time())
+                
+                stats = ntplib.NTPStats()
+                stats.from_data(data)
+                stats.dest_timestamp = dest_timestamp
+                if stats.stratum == 0 or stats.delay < 0:
+                    # Kiss-o'-death or nonsensical timestamps
+                    break
+                samples.append({
+                    "server": server,
+                    "offset": stats.offset,
+                    "delay": stats.delay,
+                    "stratum": stats.stratum,
+                })
+            except Exception as e:
+                logger.debug(f"NTP server {server} sample {i + 1} failed: {e}")
+                break
+            finally:
+                sock.close()
+            time.sleep(self.SAMPLE_SPACING)
+        return samples
+    
+    def _clock_filter(self, samples: list[dict]) -> Optional[dict]:
+        """Combine raw samples into one offset estimate.
+        
+        Returns None if there are no usable samples.
+        """
+        by_server: dict[str, list[dict]] = {}
+        for sample in samples:
+            by_server.setdefault(sample["server"], []).append(sample)
+        if not by_server:
+            return None
+        
+        # Per server: trust only the lowest round-trip samples
+        candidates = []
+        for server, server_samples in by_server.items():
+            best = sorted(server_samples, key=lambda s: s["delay"])[:self.FILTER_KEEP]
+            candidates.append({
+                "server": server,
+                "offset": statistics.median(s["offset"] for s in best),
+                "delay": best[0]["delay"],
+                "stratum": best[0]["stratum"],
+                "samples": len(server_samples),
+            })
+        
+        # Across servers: reject those too far from the median
+        median = statistics.median(c["offset"] for c in candidates)
+        mad = statistics.median(abs(c["offset"] - median) for c in candidates)
+        threshold = max(self.OUTLIER_MIN_SECONDS, 3 * mad)
+        survivors = [c for c in candidates if abs(c["offset"] - median) <= threshold]
+        
+        # Combine survivors weighted by inverse delay; lowest delay is the source
+        weights = [1 / max(c["delay"], 1e-4) for c in survivors]
+        offset = sum(w * c["offset"] for w, c in zip(weights, survivors)) / sum(weights)
+        source = min(survivors, key=lambda c: c["delay"])
+        if len(survivors) > 1:
+            dispersion = math.sqrt(sum((c["offset"] - offset) ** 2 for c in survivors) / len(survivors))
+        else:
+            dispersion = source["delay"] / 2
+        
+        return {
+            "offset_ms": offset * 1000,
+            "dispersion_ms": dispersion * 1000,
+            "source": source["server"],
+            "source_delay_ms": source["delay"] * 1000,
+            "source_stratum": source["stratum"],
+            "survivors": [c["server"] for c in survivors],
+            "rejected": [c["server"] for c in candidates if c not in survivors],
+            "samples": len(samples),
+        }
+    
+    def _socks_proxy(self) -> Optional[dict]:
+        """Build per-socket SOCKS proxy settings for NTP traffic."""
         try:
             import socks
             proxy_url = urlparse(Config.PROXY_URL)
             
             if proxy_url.scheme in ("socks5", "socks5h"):
-                socks.set_default_proxy(
-                    socks.SOCKS5,
-                    proxy_url.hostname,
-                    proxy_url.port or 1080,
-                    username=proxy_url.username,
-                    password=proxy_url.password
-                )
-                socket.socket = socks.socksocket
-                logger.info(f"Configured SOCKS5 proxy for NTP: {proxy_url.hostname}:{proxy_url.port}")
-                return True
+                logger.info(f"Using SOCKS5 proxy for NTP: {proxy_url.hostname}:{proxy_url.port}")
+                return {
+                    "proxy_type": socks.SOCKS5,
+                    "addr": proxy_url.hostname,
+                    "port": proxy_url.port or 1080,
+                    "rdns": proxy_url.scheme == "socks5h",
+                    "username": proxy_url.username,
+                    "password": proxy_url.password,
+                }
             else:
-                logger.warning(f"NTP requires SOCKS proxy, got {proxy_url.scheme}")
-                return False
+                logger.warning(f"NTP requires SOCKS proxy, got {proxy_url.scheme}, trying direct NTP")
+                return None
                 
         except ImportError:
-            logger.warning("PySocks not installed, cannot use proxy with NTP")
-            return False
+            logger.warning("PySocks not installed, cannot use proxy with NTP, trying direct NTP")
+            return None
 
 
 class HTTPTimeSyncProvider(TimeSyncProvider):
@@ -135,15 +250,18 @@ class HTTPTimeSyncProvider(TimeSyncProvider):
     TIME_APIS = [
         {
             "url": "https://timeapi.io/api/time/current/zone?timeZone=Europe/Berlin",
-            "parser": lambda r: HTTPTimeSyncProvider._parse_datetime_with_z(r, "dateTime")
+            "parser": lambda r: HTTPTimeSyncProvider._parse_datetime_with_z(r, "dateTime"),
+            "tz": "Europe/Berlin",
         },
         {
             "url": "https://worldtimeapi.org/api/timezone/Europe/Berlin",
-            "parser": lambda r: datetime.fromisoformat(r["datetime"])
+            "parser": lambda r: datetime.fromisoformat(r["datetime"]),
+            "tz": "Europe/Berlin",
         },
         {
             "url": "https://timeapi.io/api/time/current/zone?timeZone=UTC",
-            "parser": lambda r: HTTPTimeSyncProvider._parse_datetime_with_z(r, "dateTime")
+            "parser": lambda r: HTTPTimeSyncProvider._parse_datetime_with_z(r, "dateTime"),
+            "tz": "UTC",
         },
     ]
     
@@ -160,60 +278,270 @@ class HTTPTimeSyncProvider(TimeSyncProvider):
             client_kwargs["proxy"] = Config.PROXY_URL
             logger.info(f"Using proxy for HTTP time sync: {Config.PROXY_URL}")
         
+        # Query all APIs at once and take the first good answer, so a dead
+        # network costs one timeout instead of one per API
         async with httpx.AsyncClient(**client_kwargs) as client:
-            for api in self.TIME_APIS:
-                try:
-                    logger.info(f"Syncing with HTTP API: {api['url']}")
-                    
-                    # Measure round-trip time
-                    before = datetime.now(timezone.utc)
-                    response = await client.get(api["url"])
-                    after = datetime.now(timezone.utc)
-                    
-                    if response.status_code != 200:
-                        logger.debug(f"HTTP time API returned {response.status_code}")
-                        continue
-                    
-                    # Parse atomic time
-                    atomic_time = api["parser"](response.json())
-                    
-                    # Calculate offset with network latency compensation
-                    network_delay = (after - before).total_seconds() / 2
-                    local_time_mid = before + (after - before) / 2
-                    # Ensure atomic_time has timezone info for proper comparison
-                    if atomic_time.tzinfo is None:
-                        atomic_time = atomic_time.replace(tzinfo=timezone.utc)
-                    offset = (atomic_time - local_time_mid).total_seconds()
-                    
-                    logger.info(
-                        f"✓ HTTP sync successful | "
-                        f"Offset: {offset*1000:.1f}ms | "
-                        f"Latency: {network_delay*1000:.1f}ms"
-                    )
-                    return True, offset
-                    
-                except Exception as e:
-                    logger.debug(f"HTTP time API failed: {e}")
-                    continue
+            pending = [asyncio.ensure_future(self._query(client, api)) for api in self.TIME_APIS]
+            try:
+                for next_done in asyncio.as_completed(pending):
+                    offset = await next_done
+                    if offset is not None:
+                        return True, offset
+            finally:
+                for future in pending:
+                    future.cancel()
         
         logger.warning("All HTTP time APIs failed")
         return False, None
+    
+    async def _query(self, client: httpx.AsyncClient, api: dict) -> Optional[float]:
+        """Query one time API; returns the offset in seconds or None."""
+        try:
+            logger.info(f"Syncing with HTTP API: {api['url']}")
+            
+            # Measure round-trip time
+            before = datetime.now(timezone.utc)
+            response = await client.get(api["url"])
+            after = datetime.now(timezone.utc)
+            
+            if response.status_code != 200:
+                logger.debug(f"HTTP time API returned {response.status_code}")
+                return None
+            
+            # Parse atomic time
+            atomic_time = api["parser"](response.json())
+            
+            # Calculate offset with network latency compensation
+            network_delay = (after - before).total_seconds() / 2
+            local_time_mid = before + (after - before) / 2
+            # Naive times are local to the API's zone
+            if atomic_time.tzinfo is None:
+                atomic_time = atomic_time.replace(tzinfo=ZoneInfo(api["tz"]))
+            offset = (atomic_time - local_time_mid).total_seconds()
+            
+            logger.info(
+                f"✓ HTTP sync successful | "
+                f"Offset: {offset*1000:.1f}ms | "
+                f"Latency: {network_delay*1000:.1f}ms"
+            )
+            return offset
+            
+        except Exception as e:
+            logger.debug(f"HTTP time API failed: {e}")
+            return None
+
+
+class _SuspendDetector:
+    """Notices time the monotonic clock missed while the machine slept.
+    
+    ``time.monotonic()`` stops during system sleep (macOS, Linux), so
+    anything anchored to it runs late by the length of the sleep after a
+    wake. The time slept is read from a clock that keeps counting through
+    suspend (``asleep_ns()`` on the app clock), so a stepped system clock
+    is never mistaken for sleep. Where no such clock exists, wall minus
+    monotonic moving by more than TIME_SYNC_SUSPEND_THRESHOLD_MS is only
+    a hint (it may just as well be a clock step): nothing is shifted, the
+    caller should re-sync.
+    """
+    
+    JITTER_NS = 1_000_000  # the two clocks aren't read at the same instant
+    
+    def __init__(self):
+        self._asleep_ns: Optional[int] = None
+        self._gap_ns: Optional[int] = None
+        self.poll()
+    
+    def poll(self) -> tuple[int, bool]:
+        """(nanoseconds slept since the last poll, whether a jump was seen that couldn't be measured)."""
+        clock = get_clock()
+        asleep = clock.asleep_ns()
+        if asleep is not None:
+            missed = asleep - self._asleep_ns if self._asleep_ns is not None else 0
+            self._asleep_ns = asleep
+            return (missed if missed > self.JITTER_NS else 0), False
+        gap = clock.time_ns() - clock.monotonic_ns()
+        jumped = (
+            self._gap_ns is not None
+            and abs(gap - self._gap_ns) > Config.TIME_SYNC_SUSPEND_THRESHOLD_MS * 1_000_000
+        )
+        self._gap_ns = gap
+        return 0, jumped
+
+
+class ServerClockTimeSyncProvider(TimeSyncProvider):
+    """Measures the target servers' own clocks from their HTTP ``Date`` header.
+    
+    What matters at sale time is when berlinale.de and eventim.de think it
+    is 10:00. ``Date`` only has one-second resolution, so a single request
+    bounds the server clock to a window of 1 s plus the round trip. Each
+    further HEAD request is timed so the server stamps it right at a second
+    boundary predicted from the current estimate; whether the returned
+    second rolled over tells which half of the window the offset lies in.
+    A few rounds narrow it to roughly the round-trip time.
+    
+    Offsets are kept relative to the app clock's ``monotonic()``
+    (``host_base``) so a stepped system clock doesn't invalidate them;
+    after a system sleep ``AtomicTimeSync`` shifts them by the time the
+    monotonic clock missed.
+    """
+    
+    TIMEOUT = 5.0
+    BOUNDARY_MARGIN = 0.05  # never aim at a boundary closer than this
+    
+    def __init__(self, hosts: Optional[list[str]] = None):
+        self._hosts = hosts or Config.SERVER_CLOCK_HOSTS
+        self._results: dict[str, dict] = {}
+        self._bases: dict[str, float] = {}
+    
+    def name(self) -> str:
+        return "SERVER"
+    
+    def status(self) -> dict:
+        return {"hosts": {host: dict(r) for host, r in self._results.items()}}
+    
+    def host_base(self, host: str) -> Optional[float]:
+        """Server time minus the app clock's ``monotonic()`` for ``host``, if measured."""
+        return self._bases.get(_host_key(host))
+    
+    def shift(self, seconds: float) -> None:
+        """The monotonic clock missed ``seconds`` (system sleep); move every host base by them."""
+        self._bases = {key: base + seconds for key, base in self._bases.items()}
+    
+    async def sync(self) -> tuple[bool, Optional[float]]:
+        """Measure every host; the offset returned is the sale clock host's."""
+        client_kwargs = {
+            "timeout": self.TIMEOUT,
+            "follow_redirects": False,
+        }
+        if Config.PROXY_URL:
+            client_kwargs["proxy"] = Config.PROXY_URL
+        
+        async with httpx.AsyncClient(**client_kwargs) as client:
+            results = await asyncio.gather(*(self._measure_host(client, url) for url in self._hosts))
+        
+        for url, result in zip(self._hosts, results):
+            if result is None:
+                continue
+            key = _host_key(url)
+            base = result.pop("base")
+            self._bases[key] = base
+            self._results[key] = result
+            logger.info(
+                f"✓ Server clock measured | "
+                f"Host: {key} | "
+                f"Skew: {result['skew_ms']:+.1f}ms | "
+                f"±{result['uncertainty_ms']:.1f}ms | "
+                f"RTT: {result['rtt_ms']:.1f}ms"
+            )
+        
+        preferred = _host_key(Config.SALE_CLOCK_HOST) if Config.SALE_CLOCK_HOST else None
+        key = preferred if preferred in self._bases else next(iter(self._bases), None)
+        if key is None:
+            logger.warning("Could not measure any server clock")
+            return False, None
+        return True, self._results[key]["skew_ms"] / 1000
+    
+    async def _measure_host(self, client: httpx.AsyncClient, url: str) -> Optional[dict]:
+        """Bisect the host's sub-second offset using Date second boundaries."""
+        clock = get_clock()
+        lo, hi = -math.inf, math.inf  # bounds on server time minus monotonic
+        best_rtt = math.inf
+        rounds = 0
+        try:
+            for _ in range(Config.SERVER_CLOCK_ROUNDS):
+                if math.isfinite(lo):
+                    # Aim the request so the server stamps it at the next
+                    # whole second according to the midpoint estimate.
+                    mid = (lo + hi) / 2
+                    now = clock.monotonic()
+                    boundary = math.ceil(now + mid + best_rtt / 2 + self.BOUNDARY_MARGIN)
+                    await clock.sleep(boundary - mid - best_rtt / 2 - now)
+                
+                t0 = clock.monotonic()
+                response = await client.head(url)
+                t1 = clock.monotonic()
+                date_header = response.headers.get("date")
+                if not date_header:
+                    logger.debug(f"No Date header from {url}")
+                    return None
+                server_second = parsedate_to_datetime(date_header).timestamp()
+                
+                # The server stamped the reply somewhere in [t0, t1]
+                new_lo = max(lo, server_second - t1)
+                new_hi = min(hi, server_second + 1 - t0)
+                if new_lo > new_hi:
+                    # Inconsistent with earlier rounds (e.g. a cached Date); skip it
+                    continue
+                lo, hi = new_lo, new_hi
+                best_rtt = min(best_rtt, t1 - t0)
+                rounds += 1
+                if hi - lo <= best_rtt:
+                    break
+        except Exception as e:
+            logger.debug(f"Server clock measurement for {url} failed: {e}")
+            if not rounds:
+                return None
+        
+        if not rounds:
+            return None
+        base = (lo + hi) / 2
+        mono = clock.monotonic()
+        return {
+            "base": base,
+            "skew_ms": (base + mono - clock.time_ns() / 1e9) * 1000,
+            "uncertainty_ms": (hi - lo) / 2 * 1000,
+            "rtt_ms": best_rtt * 1000,
+            "rounds": rounds,
+            "measured_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+
+def _host_key(url_or_host: str) -> str:
+    """Normalize a URL or bare host to ``example.com`` form."""
+    host = urlparse(url_or_host).netloc if "://" in url_or_host else url_or_host
+    host = host.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return host
 
 
 class AtomicTimeSync:
-    """Main time synchronization manager with multiple provider support."""
+    """Main time synchronization manager with multiple provider support.
+    
+    Each successful sync is stored as a ``(monotonic, base)`` sample, where
+    ``base`` is atomic time minus ``time.monotonic()``. A least-squares fit
+    over the recent samples gives the drift rate of the local monotonic
+    clock, so between syncs the offset is predicted rather than assumed
+    constant. ``now_ns()`` is then just the monotonic clock plus that
+    prediction, with no datetime arithmetic and no re-sync checks. The
+    monotonic clock stops while the machine sleeps, so each read also
+    asks the app clock how long the machine was suspended; after a wake
+    the model is shifted by the time slept and a re-sync is forced.
+    """
+    
+    MAX_DRIFT = 500e-6  # fits beyond ±500 ppm are measurement noise, not drift
     
     def __init__(self, method: str = "auto"):
-        self._offset: Optional[float] = None
         self._last_sync: Optional[datetime] = None
-        self._sync_interval = Config.TIME_SYNC_INTERVAL
         self._method = method.lower()
         self._active_provider: Optional[str] = None
         
+        # Drift model: anchor is the latest sample, drift the fitted slope
+        self._samples: deque[tuple[float, float]] = deque(maxlen=Config.TIME_SYNC_HISTORY)
+        self._anchor_mono_ns: Optional[int] = None
+        self._base_ns = 0
+        self._drift = 0.0
+        self._residual_rate: Optional[float] = None  # unmodeled drift seen at last sync
+        self._resync_task: Optional[asyncio.Task] = None
+        self._resync_now: Optional[asyncio.Event] = None  # wakes the re-sync loop early
+        self._suspend = _SuspendDetector()
+        self._ready: Optional[asyncio.Event] = None  # set once the first sync attempt has finished
+        
         # Initialize providers
         self._providers: dict[str, TimeSyncProvider] = {
             "ntp": NTPTimeSyncProvider(),
             "http": HTTPTimeSyncProvider(),
+            "server": ServerClockTimeSyncProvider(),
         }
         
         logger.info(f"AtomicTimeSync initialized with method: {self._method}")
@@ -221,13 +549,24 @@ class AtomicTimeSync:
     async def sync(self) -> bool:
         """Synchronize with atomic clock using configured method.
         
+        When ``SALE_CLOCK_HOST`` is set, the target servers' clocks are
+        measured alongside so sale triggers can aim at the host's clock.
+        
         Returns:
             True if sync successful, False otherwise.
         """
+        if Config.SALE_CLOCK_HOST and self._method != "server":
+            success, _ = await asyncio.gather(self._sync_atomic(), self._providers["server"].sync())
+            return success
+        return await self._sync_atomic()
+    
+    async def _sync_atomic(self) -> bool:
         if self._method == "ntp":
             return await self._sync_with_provider("ntp")
         elif self._method == "http":
             return await self._sync_with_provider("http")
+        elif self._method == "server":
+            return await self._sync_with_provider("server")
         elif self._method == "auto":
             # Try NTP first (more accurate), fall back to HTTP
             if await self._sync_with_provider("ntp"):
@@ -245,14 +584,92 @@ class AtomicTimeSync:
         
         success, offset = await provider.sync()
         if success and offset is not None:
-            self._offset = offset
+            clock = get_clock()
+            mono = clock.monotonic()
+            self._add_sample(mono, clock.time_ns() / 1e9 + offset - mono)
             self._last_sync = datetime.now(timezone.utc)
             self._active_provider = provider_name
             return True
         return False
     
+    def _add_sample(self, mono: float, base: float) -> None:
+        """Record a sync result and refit the drift model."""
+        if self._anchor_mono_ns is not None:
+            # How far off was the prediction? That is the drift we failed to model.
+            elapsed = mono - self._anchor_mono_ns / 1e9
+            if elapsed > 0:
+                predicted = self._base_ns / 1e9 + self._drift * elapsed
+                self._residual_rate = abs(base - predicted) / elapsed
+        
+        self._samples.append((mono, base))
+        self._drift = self._fit_drift()
+        self._anchor_mono_ns = int(mono * 1e9)
+        self._base_ns = int(base * 1e9)
+    
+    def _check_suspend(self) -> None:
+        """After a system sleep, shift the model (and server clocks) by the time slept and re-sync."""
+        missed, jumped = self._suspend.poll()
+        if missed:
+            logger.warning(f"Machine slept for {missed / 1e9:.1f}s, shifting the synced clock and re-syncing")
+            # The sleep is a step in base, not drift: shift the whole history so the fit is unaffected
+            self._base_ns += missed
+            self._samples = deque(
+                ((mono, base + missed / 1e9) for mono, base in self._samples), maxlen=self._samples.maxlen,
+            )
+            self._providers["server"].shift(missed / 1e9)
+        elif jumped:
+            logger.warning("System clock jumped against the monotonic clock (step or unmeasured sleep), re-syncing")
+        if (missed or jumped) and self._resync_now is not None:
+            self._resync_now.set()
+    
+    def _fit_drift(self) -> float:
+        """Least-squares slope of base over monotonic time (seconds per second)."""
+        if len(self._samples) < 2:
+            return 0.0
+        monos = [m for m, _ in self._samples]
+        if monos[-1] - monos[0] < Config.TIME_SYNC_MIN_INTERVAL:
+            return self._drift
+        mean_m = sum(monos) / len(monos)
+        mean_b = sum(b for _, b in self._samples) / len(self._samples)
+        num = sum((m - mean_m) * (b - mean_b) for m, b in self._samples)
+        den = sum((m - mean_m) ** 2 for m in monos)
+        if den == 0:
+            return 0.0
+        return max(-self.MAX_DRIFT, min(self.MAX_DRIFT, num / den))
+    
+    def now_ns(self) -> int:
+        """Get current atomic time as integer nanoseconds since the epoch.
+        
+        Hot-path clock: monotonic time plus the predicted offset. Reads the
+        app clock (``app.clock``), which is virtual under simulation.
+        """
+        clock = get_clock()
+        if self._anchor_mono_ns is None:
+            return clock.time_ns()
+        self._check_suspend()
+        mono = clock.monotonic_ns()
+        return mono + self._base_ns + int((mono - self._anchor_mono_ns) * self._drift)
+    
+    def timestamp(self) -> float:
+        """Get current atomic time as a POSIX timestamp (seconds)."""
+        return self.now_ns() / 1e9
+    
+    def has_host_clock(self, host: str) -> bool:
+        return self._providers["server"].host_base(host) is not None
+    
+    def host_timestamp(self, host: str) -> float:
+        """Get the current time according to ``host``'s own clock.
+        
+        Falls back to atomic time if the host hasn't been measured.
+        """
+        self._check_suspend()
+        base = self._providers["server"].host_base(host)
+        if base is None:
+            return self.timestamp()
+        return get_clock().monotonic() + base
+    
     def now(self, tz=None) -> datetime:
-        """Get current atomic time (corrected for offset).
+        """Get current atomic time (corrected for offset and drift).
         
         Args:
             tz: Optional timezone, defaults to local
@@ -260,49 +677,93 @@ class AtomicTimeSync:
         Returns:
             datetime with atomic clock precision.
         """
-        if self._offset is None:
-            logger.debug("No time sync, using system time")
-            return datetime.now(tz)
-        
-        # Check if we need to re-sync
-        if self._should_resync():
-            logger.info("Time sync expired, re-syncing in background")
-            # Create background task but don't await it
-            task = asyncio.create_task(self.sync())
-            # Add callback to log any exceptions
-            def log_exception(t):
-                if not t.cancelled():
-                    exc = t.exception()
-                    if exc:
-                        logger.error(f"Background sync failed: {exc}")
-            task.add_done_callback(log_exception)
-        
-        # Return system time corrected by offset
-        if tz:
-            base_time = datetime.now(timezone.utc)
-            corrected = base_time + timedelta(seconds=self._offset)
-            return corrected.astimezone(tz)
-        else:
-            # For naive datetime (local time), use local clock with offset
-            base_time = datetime.now()
-            return base_time + timedelta(seconds=self._offset)
+        return datetime.fromtimestamp(self.now_ns() / 1e9, tz)
+    
+    def _ready_event(self) -> asyncio.Event:
+        # Created lazily so it binds to the running loop, not the import-time one
+        if self._ready is None:
+            self._ready = asyncio.Event()
+        return self._ready
+    
+    def mark_ready(self) -> None:
+        self._ready_event().set()
+    
+    @property
+    def is_ready(self) -> bool:
+        """Whether the first sync attempt has finished (successfully or not)."""
+        return self._ready is not None and self._ready.is_set()
     
-    def _should_resync(self) -> bool:
-        """Check if re-sync is needed."""
-        if not self._last_sync:
+    async def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the first sync attempt; returns False on timeout."""
+        event = self._ready_event()
+        if event.is_set():
+            return True
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
             return True
-        elapsed = (datetime.now(timezone.utc) - self._last_sync).total_seconds()
-        return elapsed > self._sync_interval
+        except asyncio.TimeoutError:
+            return False
+    
+    # ── background re-sync ──────────────────────────────────────
+    
+    def start(self) -> None:
+        """Start the background re-sync loop."""
+        if self._resync_task is None or self._resync_task.done():
+            self._resync_task = asyncio.create_task(self._resync_loop())
+    
+    def stop(self) -> None:
+        if self._resync_task and not self._resync_task.done():
+            self._resync_task.cancel()
+        self._resync_task = None
+    
+    def next_resync_interval(self) -> float:
+        """Seconds until the next re-sync.
+        
+        Long enough that the unmodeled drift seen at the last sync stays
+        below TIME_SYNC_MAX_ERROR_MS, clamped to the configured bounds.
+        Until the model has been checked against a second sync, re-sync at
+        the minimum interval.
+        """
+        if self._residual_rate is None:
+            return Config.TIME_SYNC_MIN_INTERVAL
+        if self._residual_rate == 0:
+            return Config.TIME_SYNC_INTERVAL
+        interval = Config.TIME_SYNC_MAX_ERROR_MS / 1000 / self._residual_rate
+        return max(Config.TIME_SYNC_MIN_INTERVAL, min(Config.TIME_SYNC_INTERVAL, interval))
+    
+    async def _resync_loop(self) -> None:
+        self._resync_now = asyncio.Event()
+        while True:
+            interval = self.next_resync_interval() if self.is_synced else Config.TIME_SYNC_MIN_INTERVAL
+            try:
+                await asyncio.wait_for(self._resync_now.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+            self._resync_now.clear()
+            try:
+                if not await self.sync():
+                    logger.warning("Background time re-sync failed, keeping drift prediction")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Background time re-sync error")
     
     @property
     def offset_ms(self) -> Optional[float]:
-        """Get current time offset in milliseconds."""
-        return self._offset * 1000 if self._offset is not None else None
+        """Get current predicted offset from the system clock in milliseconds."""
+        if not self.is_synced:
+            return None
+        return (self.now_ns() - get_clock().time_ns()) / 1e6
+    
+    @property
+    def drift_ppm(self) -> float:
+        """Fitted drift of the local monotonic clock in parts per million."""
+        return self._drift * 1e6
     
     @property
     def is_synced(self) -> bool:
         """Check if time is currently synced."""
-        return self._offset is not None
+        return self._anchor_mono_ns is not None
     
     @property
     def provider(self) -> Optional[str]:
@@ -315,8 +776,17 @@ class AtomicTimeSync:
             "enabled": Config.TIME_SYNC_ENABLED,
             "method": self._method,
             "active_provider": self._active_provider,
+            "ready": self.is_ready,
             "synced": self.is_synced,
             "offset_ms": self.offset_ms,
+            "drift_ppm": round(self.drift_ppm, 3),
+            "history": len(self._samples),
+            "next_resync_s": round(self.next_resync_interval(), 1) if self.is_synced else None,
+            "provider_status": (
+                self._providers[self._active_provider].status() if self._active_provider else {}
+            ),
+            "sale_clock_host": Config.SALE_CLOCK_HOST or None,
+            "server_clocks": self._providers["server"].status()["hosts"],
             "last_sync": self._last_sync.isoformat() if self._last_sync else None,
             "atomic_time": self.now().isoformat() if self.is_synced else None,
             "system_time": datetime.now(timezone.utc).isoformat(),
@@ -337,17 +807,22 @@ def get_time_sync() -> AtomicTimeSync:
 
 
 async def init_time_sync() -> bool:
-    """Initialize and perform first sync.
+    """Initialize, perform first sync and start the background re-sync loop.
     
     Returns:
         True if sync successful or disabled, False if enabled but failed.
     """
+    time_sync = get_time_sync()
     if not Config.TIME_SYNC_ENABLED:
         logger.info("⏰ Time sync disabled")
+        time_sync.mark_ready()
         return True
     
-    time_sync = get_time_sync()
-    success = await time_sync.sync()
+    try:
+        success = await time_sync.sync()
+    finally:
+        time_sync.mark_ready()
+    time_sync.start()
     
     if success:
         logger.info(
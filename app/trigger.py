@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from app.clock import get_clock
+from app.config import Config
+from app.models import TriggerRecord
+from app.time_sync import get_time_sync
+
+logger = logging.getLogger(__name__)
+
+
+class PreciseTrigger:
+    """Fires at an exact wall-clock moment on the synced (atomic) clock.
+
+    The wait is split in two phases: a coarse sleep against the app
+    clock's monotonic time (``get_clock()``, virtual under simulation)
+    until ``TRIGGER_SPIN_WINDOW_MS`` before the target, then a short
+    final phase that re-anchors to the synced clock (it may have been
+    re-synced meanwhile) and yields until the deadline. Every fire is
+    recorded so trigger accuracy can be reported per sale.
+    """
+
+    MAX_RECORDS = 500
+
+    def __init__(self) -> None:
+        self._records: list[TriggerRecord] = []
+
+    @staticmethod
+    def _clock(host: str):
+        time_sync = get_time_sync()
+        if host:
+            return lambda: time_sync.host_timestamp(host)
+        return time_sync.timestamp
+
+    def _deadline(self, target_ts: float, clock) -> float:
+        """Map a timestamp on ``clock`` onto the monotonic clock."""
+        return get_clock().monotonic() + (target_ts - clock())
+
+    async def wait_until(
+        self, target: datetime, task_id: str = "", label: str = "sale", host: str | None = None,
+    ) -> TriggerRecord:
+        """Sleep until ``target`` on the synced clock and record the fire.
+
+        Args:
+            host: Aim at this server's own clock instead of atomic time.
+                  Defaults to ``Config.SALE_CLOCK_HOST``.
+
+        Returns immediately (recording a late fire) if the target has
+        already passed.
+        """
+        host = Config.SALE_CLOCK_HOST if host is None else host
+        tolerance_s = Config.TRIGGER_TOLERANCE_MS / 1000
+        # The window absorbs the loop's real timer granularity, so it is
+        # measured in real time (longer in app-clock terms under simulation)
+        spin_window_s = Config.TRIGGER_SPIN_WINDOW_MS / 1000 * get_clock().speed
+        target_ts = target.timestamp()
+
+        # Startup doesn't block on time sync; wait for the first sync here,
+        # but never past the point where the final phase must begin
+        time_sync = get_time_sync()
+        if not time_sync.is_ready:
+            budget = min(Config.TIME_SYNC_READY_TIMEOUT, target_ts - time_sync.timestamp() - spin_window_s)
+            if budget > 0 and not await time_sync.wait_ready(budget):
+                logger.warning("Time sync not ready for task %s, triggering on system time", task_id or "-")
+        clock = self._clock(host)
+        app_clock = get_clock()
+        monotonic = app_clock.monotonic
+
+        # Coarse phase: plain sleep until the spin window opens
+        deadline = self._deadline(target_ts, clock)
+        coarse = deadline - monotonic() - spin_window_s
+        if coarse > 0:
+            await app_clock.sleep(coarse)
+
+        # Final phase: re-anchor, yield to the loop until half the tolerance
+        # remains, then spin without yielding so another callback can't
+        # push the fire past the deadline.
+        deadline = self._deadline(target_ts, clock)
+        while deadline - monotonic() > tolerance_s / 2:
+            await asyncio.sleep(0)
+        while monotonic() < deadline:
+            pass
+
+        fired = monotonic()
+        fired_ts = clock()
+        record = self._record(
+            task_id, label, target, fired_ts, (fired - deadline) * 1000, tolerance_s * 1000, host,
+        )
+        logger.info(
+            "Trigger fired for task %s (%s): skew %+.3fms (tolerance ±%.3fms)",
+            task_id or "-", label, record.skew_ms, record.tolerance_ms,
+        )
+        return record
+
+    def _record(
+        self, task_id: str, label: str, target: datetime,
+        fired_ts: float, skew_ms: float, tolerance_ms: float, host: str,
+    ) -> TriggerRecord:
+        time_sync = get_time_sync()
+        clock = host if host and time_sync.has_host_clock(host) else (time_sync.provider or "system")
+        record = TriggerRecord(
+            task_id=task_id,
+            label=label,
+            target=target.isoformat(),
+            fired_at=datetime.fromtimestamp(fired_ts, tz=timezone.utc).astimezone(target.tzinfo).isoformat(),
+            skew_ms=round(skew_ms, 3),
+            tolerance_ms=tolerance_ms,
+            within_tolerance=abs(skew_ms) <= tolerance_ms,
+            clock=clock,
+        )
+        self._records.append(record)
+        if len(self._records) > self.MAX_RECORDS:
+            del self._records[: len(self._records) - self.MAX_RECORDS]
+        return record
+
+    def get_records(self, task_id: str | None = None) -> list[TriggerRecord]:
+        if task_id is None:
+            return list(self._records)
+        return [r for r in self._records if r.task_id == task_id]
+
+    def get_report(self) -> list[dict]:
+        """Summarize trigger accuracy grouped by sale (target time)."""
+        by_target: dict[str, list[TriggerRecord]] = defaultdict(list)
+        for record in self._records:
+            by_target[record.target].append(record)
+
+        report = []
+        for target in sorted(by_target):
+            records = by_target[target]
+            skews = [abs(r.skew_ms) for r in records]
+            report.append({
+                "target": target,
+                "fires": len(records),
+                "within_tolerance": sum(1 for r in records if r.within_tolerance),
+                "max_abs_skew_ms": max(skews),
+                "mean_abs_skew_ms": round(sum(skews) / len(skews), 3),
+                "records": [r.model_dump() for r in records],
+            })
+        return report
+
+
+precise_trigger = PreciseTrigger()
@@ -0,0 +1,553 @@
+"""Festival-day replay on a virtual clock.
+
+Runs the real scheduler (pre-sale timeline, screening coalescing, grab
+slots), precise trigger and ticket monitor on an accelerated
+``VirtualClock``, with in-process stand-ins for the Berlinale ticket JS,
+the browser, both grabbers and the pre-sale network warm-up. One day of
+sales is replayed: the 10:00 rush for screenings ``SALE_ADVANCE_DAYS``
+ahead, then returns released through the day to watched screenings::
+
+    python -m bench.festival_day
+    python -m bench.festival_day --tasks 20 --shared 0.3 --watches 10 --speed 600
+    python -m bench.festival_day --grab-slots 2 --until 10:10 --speed 30 --json rush.json
+
+The report covers trigger accuracy, timeline stage latencies, monitor
+interval transitions, scheduler job overlap and resource peaks (pages,
+grab slots, event-loop lag, RSS). Latencies are in festival (virtual)
+time, so real scheduling jitter shows up multiplied by ``--speed``: use
+a low speed around the rush for trigger accuracy, a high one to get
+through the whole day. Nothing touches the network, a real browser or
+``data/``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED, EVENT_JOB_MISSED, EVENT_JOB_SUBMITTED
+
+from app.clock import VirtualClock, get_clock, set_clock
+from app.config import Config
+from app.models import GrabTask, TicketInfo
+
+from bench.probes import LoopLagProbe, stats
+
+logger = logging.getLogger("bench")
+
+TZ = ZoneInfo(Config.TIMEZONE)
+
+# Stand-in durations, in festival seconds
+PAGE_LOAD = 2.5  # open and render the event page
+REFRESH_TO_CLICK = 0.4  # refresh/detection to the first click on the page
+BROWSER_PURCHASE = 4.0  # first click to checkout
+API_PURCHASE = 1.0  # cart POST round trips
+PREWARM = 0.3
+OPENING_JITTER = 1.5  # tickets open up to this long after the sale time
+
+
+def _now() -> float:
+    """Festival time as a POSIX timestamp."""
+    return get_clock().time_ns() / 1e9
+
+
+def _fmt(ts: float) -> str:
+    return datetime.fromtimestamp(ts, TZ).strftime("%H:%M:%S.%f")[:-3]
+
+
+class SaleBoard:
+    """Ticket states over festival time; stands in for ``fetch_ticket_status``."""
+
+    def __init__(self) -> None:
+        self.opens_at: dict[str, float] = {}  # ext id -> timestamp it turns available
+        self.urls: dict[str, str] = {}
+        self.polls = 0
+
+    def state(self, ext_id: str) -> str:
+        opens = self.opens_at.get(ext_id)
+        return "available" if opens is not None and _now() >= opens else "sold_out"
+
+    async def fetch_ticket_status(self) -> dict[str, TicketInfo]:
+        self.polls += 1
+        return {
+            ext_id: TicketInfo(ext_id_screening=ext_id, state=self.state(ext_id), url=self.urls.get(ext_id))
+            for ext_id in self.opens_at
+        }
+
+
+class Resources:
+    """Pages and purchases in flight, with their peaks."""
+
+    def __init__(self) -> None:
+        self.pages = 0
+        self.peak_pages = 0
+        self.purchases = 0
+        self.peak_purchases = 0
+        self.first_clicks: dict[str, float] = {}  # task id -> festival timestamp
+
+    def open_page(self) -> "SimPage":
+        self.pages += 1
+        self.peak_pages = max(self.peak_pages, self.pages)
+        return SimPage(self)
+
+
+class SimPage:
+    def __init__(self, resources: Resources) -> None:
+        self._resources = resources
+        self._closed = False
+
+    def is_closed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._resources.pages -= 1
+
+
+class SimBrowser:
+    """Stands in for ``BrowserManager``."""
+
+    is_initialized = True
+
+    async def init_browser(self) -> None:
+        pass
+
+    async def ensure_healthy(self) -> bool:
+        return True
+
+    async def check_session(self) -> dict:
+        return {"logged_in": True, "message": "session ok"}
+
+    async def prewarm(self, url: str) -> float:
+        await get_clock().sleep(PREWARM)
+        return PREWARM * 1000
+
+
+class SimGrabber:
+    """Stands in for ``TicketGrabber``: page loads and purchases take festival time."""
+
+    def __init__(self, resources: Resources, rng: random.Random, success_rate: float) -> None:
+        self.resources = resources
+        self.rng = rng
+        self.success_rate = success_rate
+
+    async def preheat(self, task: GrabTask) -> SimPage:
+        page = self.resources.open_page()
+        await get_clock().sleep(PAGE_LOAD)
+        return page
+
+    async def _purchase(self, page: SimPage, task: GrabTask, on_status, load: float) -> dict:
+        clock = get_clock()
+        self.resources.purchases += 1
+        self.resources.peak_purchases = max(self.resources.peak_purchases, self.resources.purchases)
+        try:
+            await clock.sleep(load + REFRESH_TO_CLICK)
+            self.resources.first_clicks[task.id] = _now()
+            if on_status:
+                await on_status("grabbing", "Clicking through the purchase flow...")
+            await clock.sleep(BROWSER_PURCHASE)
+        finally:
+            self.resources.purchases -= 1
+            page.close()
+        if self.rng.random() < self.success_rate:
+            return {"success": True, "message": f"{task.ticket_count} ticket(s) in the cart"}
+        return {"success": False, "message": "Sold out before checkout"}
+
+    async def grab_with_refresh(self, page: SimPage, task: GrabTask, on_status=None) -> dict:
+        return await self._purchase(page, task, on_status, load=0.0)
+
+    async def grab_ticket(self, task: GrabTask, on_status=None) -> dict:
+        return await self._purchase(self.resources.open_page(), task, on_status, load=PAGE_LOAD)
+
+    async def grab_detected(self, page: SimPage | None, task: GrabTask, detection: dict, on_status=None) -> dict:
+        if page is not None and not page.is_closed():
+            result = await self.grab_with_refresh(page, task, on_status)
+        else:
+            result = await self.grab_ticket(task, on_status)
+        click = self.resources.first_clicks.get(task.id)
+        result["detect_to_click_ms"] = round((click - detection["detected_ts"]) * 1000, 1) if click else None
+        return result
+
+
+class SimApiGrabber:
+    """Stands in for ``APIGrabber``: polls the sale board on festival time."""
+
+    def __init__(self, board: SaleBoard, resources: Resources) -> None:
+        self.board = board
+        self.resources = resources
+
+    async def wait_for_availability(self, task: GrabTask, timeout: float | None = None) -> dict | None:
+        clock = get_clock()
+        deadline = _now() + (Config.HYBRID_DETECT_TIMEOUT if timeout is None else timeout)
+        polls = 0
+        while _now() < deadline:
+            polls += 1
+            info = (await self.board.fetch_ticket_status()).get(task.ext_id_screening)
+            if info and info.state == "available":
+                return {"url": self.board.urls.get(task.ext_id_screening) or task.eventim_url,
+                        "source": "ticket_js", "polls": polls,
+                        "detected_at": time.perf_counter(), "detected_ts": _now()}
+            await clock.sleep(Config.HYBRID_POLL_INTERVAL)
+        return None
+
+    async def poll_and_grab(self, task: GrabTask, on_status=None) -> dict:
+        detection = await self.wait_for_availability(task, timeout=300)
+        if detection is None:
+            return {"success": False, "message": "Polling timeout after 5 minutes"}
+        self.resources.first_clicks[task.id] = _now()
+        await get_clock().sleep(API_PURCHASE)
+        return {"success": True, "message": f"{task.ticket_count} ticket(s) added via API"}
+
+
+class SimWarmer:
+    async def hold(self, sale_dt: datetime, url: str | None = None) -> dict:
+        await get_clock().sleep(0.2)
+        return {"www.berlinale.de": 40.0, "www.eventim.de": 60.0}
+
+
+class SimEventUrls:
+    async def resolve(self, task: GrabTask) -> None:
+        return None
+
+    def get(self, task: GrabTask) -> None:
+        return None
+
+    def forget(self, task_id: str) -> None:
+        pass
+
+
+class SimCookieBridge:
+    async def sync(self, reason: str = "manual") -> bool:
+        return True
+
+    async def ensure_fresh(self, max_age: float | None = None) -> bool:
+        return True
+
+
+def install_standins(board: SaleBoard, resources: Resources, rng: random.Random, success_rate: float) -> None:
+    """Swap the network- and browser-facing singletons for stand-ins.
+
+    The scheduler and monitor import these at call time, so replacing the
+    module attributes is enough.
+    """
+    import app.api_grabber
+    import app.berlinale_api
+    import app.conn_warmer
+    import app.cookie_bridge
+    import app.event_urls
+    import app.grabber
+
+    app.grabber.browser_manager = SimBrowser()
+    app.grabber.ticket_grabber = SimGrabber(resources, rng, success_rate)
+    app.api_grabber.api_grabber = SimApiGrabber(board, resources)
+    app.berlinale_api.fetch_ticket_status = board.fetch_ticket_status
+    app.conn_warmer.connection_warmer = SimWarmer()
+    app.event_urls.event_urls = SimEventUrls()
+    app.cookie_bridge.cookie_bridge = SimCookieBridge()
+
+
+def build_day(args, board: SaleBoard, rng: random.Random) -> list[GrabTask]:
+    """The 10:00 sale tasks plus watched screenings that get returns later in the day."""
+    day = date.fromisoformat(args.day)
+    sale_dt = datetime(day.year, day.month, day.day, Config.SALE_TIME_HOUR, Config.SALE_TIME_MINUTE, tzinfo=TZ)
+    screening_day = day + timedelta(days=Config.SALE_ADVANCE_DAYS)
+    tasks = []
+
+    ext_ids: list[str] = []
+    for i in range(args.tasks):
+        if ext_ids and rng.random() < args.shared:
+            ext_id = rng.choice(ext_ids)
+        else:
+            ext_id = f"sim-{i:03d}"
+            ext_ids.append(ext_id)
+            board.opens_at[ext_id] = sale_dt.timestamp() + rng.uniform(0, OPENING_JITTER)
+        screening = datetime.combine(screening_day, datetime.min.time(), TZ) + timedelta(hours=rng.randint(10, 22))
+        tasks.append(GrabTask(
+            film_title=f"Film {ext_id}",
+            ext_id_screening=ext_id,
+            screening_time=screening.isoformat(),
+            sale_time=sale_dt.isoformat(),
+            eventim_url=f"https://www.eventim.de/event/{ext_id}/",
+            mode=args.modes[i % len(args.modes)],
+            ticket_count=rng.choice([1, 2]),
+            priority=rng.choice([0, 0, 1, 2]),
+        ))
+
+    until = _at(day, args.until)
+    for i in range(args.watches):
+        ext_id = f"sim-watch-{i:03d}"
+        screening = datetime.combine(day, datetime.min.time(), TZ) + timedelta(minutes=rng.randint(12 * 60, 22 * 60 + 30))
+        release = screening - timedelta(minutes=rng.randint(10, 90))
+        if release.timestamp() > until.timestamp():
+            release = until - timedelta(minutes=1)
+        board.opens_at[ext_id] = release.timestamp()
+        board.urls[ext_id] = f"https://www.eventim.de/event/{ext_id}/"
+        tasks.append(GrabTask(
+            film_title=f"Film {ext_id}",
+            ext_id_screening=ext_id,
+            screening_time=screening.isoformat(),
+            # Sale opened days ago; a return is grabbed immediately
+            sale_time=(sale_dt - timedelta(days=Config.SALE_ADVANCE_DAYS)).isoformat(),
+            mode=args.modes[i % len(args.modes)],
+            status="watching",
+        ))
+    return tasks
+
+
+def _at(day: date, hhmm: str) -> datetime:
+    hour, minute = (int(x) for x in hhmm.split(":"))
+    return datetime(day.year, day.month, day.day, hour, minute, tzinfo=TZ)
+
+
+class JobLog:
+    """APScheduler listener: festival-time start and end of every job run."""
+
+    def __init__(self) -> None:
+        self.running: dict[str, float] = {}
+        self.runs: list[tuple[str, float, float]] = []  # (job id, start, end)
+        self.missed: list[str] = []
+        self.errors: list[str] = []
+
+    def __call__(self, event) -> None:
+        if event.code == EVENT_JOB_SUBMITTED:
+            self.running[event.job_id] = _now()
+        elif event.code == EVENT_JOB_MISSED:
+            self.missed.append(event.job_id)
+        else:
+            start = self.running.pop(event.job_id, _now())
+            self.runs.append((event.job_id, start, _now()))
+            if event.code == EVENT_JOB_ERROR:
+                self.errors.append(f"{event.job_id}: {event.exception!r}")
+
+    def overlap(self) -> dict:
+        """Peak concurrency of all jobs and of page-heavy jobs (open page, fire, immediate grabs)."""
+        def peak(runs):
+            edges = sorted([(s, 1, j) for j, s, _ in runs] + [(e, -1, j) for j, _, e in runs], key=lambda x: (x[0], x[1]))
+            current = best = 0
+            best_at = None
+            for at, delta, _ in edges:
+                current += delta
+                if current > best:
+                    best, best_at = current, at
+            return best, best_at
+
+        heavy = [r for r in self.runs if r[0].startswith(("preheat_", "fire_", "grab_"))]
+        overlapping_pairs = sum(
+            1 for i, a in enumerate(heavy) for b in heavy[i + 1:] if a[1] < b[2] and b[1] < a[2]
+        )
+        jobs_peak, jobs_at = peak(self.runs)
+        heavy_peak, heavy_at = peak(heavy)
+        return {
+            "jobs_run": len(self.runs),
+            "peak_concurrent_jobs": jobs_peak,
+            "peak_jobs_at": _fmt(jobs_at) if jobs_at else None,
+            "peak_concurrent_page_jobs": heavy_peak,
+            "peak_page_jobs_at": _fmt(heavy_at) if heavy_at else None,
+            "overlapping_page_job_pairs": overlapping_pairs,
+            "missed": self.missed,
+            "errors": self.errors,
+        }
+
+
+async def replay(args) -> dict:
+    from app import scheduler
+    from app.grab_slots import grab_slots
+    from app.monitor import ticket_monitor
+    from app.storage import TaskStorage
+    from app.time_sync import get_time_sync
+    from app.trigger import precise_trigger
+
+    rng = random.Random(args.seed)
+    Config.TIME_SYNC_ENABLED = False
+    Config.GRAB_SLOTS = args.grab_slots
+    start = _at(date.fromisoformat(args.day), args.start)
+    until = _at(date.fromisoformat(args.day), args.until)
+    clock = VirtualClock(start, speed=args.speed)
+    set_clock(clock)
+    get_time_sync().mark_ready()
+
+    board, resources = SaleBoard(), Resources()
+    install_standins(board, resources, rng, args.success_rate)
+
+    data_dir = tempfile.TemporaryDirectory()
+    storage = TaskStorage(str(Path(data_dir.name) / "tasks.json"))
+    tasks = [storage.add_task(task) for task in build_day(args, board, rng)]
+
+    slot_peak = {"running": 0, "waiting": 0}
+
+    async def on_slots(status: dict) -> None:
+        slot_peak["running"] = max(slot_peak["running"], len(status["running"]))
+        slot_peak["waiting"] = max(slot_peak["waiting"], len(status["waiting"]))
+
+    grab_slots.set_on_change(on_slots)
+
+    # Orders drop their timeline when they close; keep the last one each leader reported.
+    # Members hear of every stage start while the order is still open, so their leader is known.
+    timelines: dict[str, list[dict]] = {}
+    leader_of: dict[str, str] = {}
+
+    async def on_timeline(task_id: str, stages: list[dict]) -> None:
+        leader = leader_of.setdefault(task_id, scheduler._order_of.get(task_id, task_id))
+        timelines[leader] = stages
+
+    scheduler.set_on_timeline_update(on_timeline)
+
+    async def on_monitor_change(task_id: str, state: str, url: str) -> None:
+        storage.update_task(task_id, status="pending", eventim_url=url)
+        task = storage.get_task(task_id)
+        if task:
+            scheduler.schedule_grab(task)
+
+    intervals: list[tuple[float, float, int]] = []  # (festival ts, poll interval, watches)
+    next_interval = ticket_monitor._next_interval
+
+    def traced_interval() -> float:
+        interval = next_interval()
+        if not intervals or intervals[-1][1] != interval:
+            intervals.append((_now(), interval, len(ticket_monitor.get_watches())))
+        return interval
+
+    ticket_monitor._next_interval = traced_interval
+
+    jobs = JobLog()
+    scheduler.set_storage(storage)
+    sched = scheduler.get_scheduler()
+    sched.add_listener(jobs, EVENT_JOB_SUBMITTED | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED)
+    probe = LoopLagProbe()
+    probe.start()
+    scheduler.start_scheduler()
+    scheduler.reschedule_pending_tasks(storage)
+    ticket_monitor.start(storage, on_monitor_change)
+
+    sale_ts = datetime.fromisoformat(tasks[0].sale_time).timestamp() if args.tasks else None
+    real_start = time.perf_counter()
+    print(f"Replaying {args.day} {args.start}-{args.until} at {args.speed:g}x: "
+          f"{args.tasks} sale tasks, {args.watches} watched screenings")
+    try:
+        while _now() < until.timestamp():
+            if sale_ts is not None:
+                probe.mark("rush" if sale_ts - 60 <= _now() <= sale_ts + 60 else "day")
+            remaining = [t for t in storage.get_all_tasks() if t.status not in ("success", "failed")]
+            if not remaining:
+                break
+            await asyncio.sleep(0.02)
+    finally:
+        ticket_monitor.stop()
+        scheduler.shutdown_scheduler()
+        await probe.stop()
+        end_ts = _now()
+        set_clock(None)
+        final_tasks = storage.get_all_tasks()
+        data_dir.cleanup()
+
+    stages: dict[str, dict[str, list]] = {}
+    for timeline in timelines.values():
+        for stage in timeline:
+            entry = stages.setdefault(stage["name"], {"latency": [], "missed": 0, "failed": 0})
+            if stage["latency_ms"] is not None:
+                entry["latency"].append(abs(stage["latency_ms"]))
+            entry["missed"] += stage["met_deadline"] is False
+            entry["failed"] += stage["status"] == "failed"
+
+    triggers = precise_trigger.get_report()
+    by_status: dict[str, int] = {}
+    for task in final_tasks:
+        by_status[task.status] = by_status.get(task.status, 0) + 1
+    sale_clicks = [
+        (resources.first_clicks[t.id] - sale_ts) * 1000
+        for t in final_tasks if sale_ts and t.id in resources.first_clicks and t.status != "watching"
+        and t.sale_time == tasks[0].sale_time
+    ]
+    return {
+        "real_seconds": round(time.perf_counter() - real_start, 1),
+        "festival_end": _fmt(end_ts),
+        "tasks": by_status,
+        "orders": len({t.ext_id_screening for t in tasks[:args.tasks]}),
+        "triggers": [
+            {k: r[k] for k in ("target", "fires", "within_tolerance", "max_abs_skew_ms", "mean_abs_skew_ms")}
+            for r in triggers
+        ],
+        "stages_abs_latency_ms": {
+            name: {**(stats(entry["latency"]) or {}), "missed_deadline": entry["missed"], "failed": entry["failed"]}
+            for name, entry in stages.items()
+        },
+        "sale_to_first_click_ms": stats(sale_clicks),
+        "monitor_intervals": [
+            {"at": _fmt(at), "interval_s": interval, "watches": watches} for at, interval, watches in intervals
+        ],
+        "ticket_js_polls": board.polls,
+        "jobs": jobs.overlap(),
+        "resources": {
+            "peak_pages": resources.peak_pages,
+            "peak_purchases": resources.peak_purchases,
+            "grab_slots": {"capacity": grab_slots.capacity, "peak_running": slot_peak["running"],
+                           "peak_waiting": slot_peak["waiting"]},
+            **probe.summary(),
+        },
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"\nReplayed to {report['festival_end']} in {report['real_seconds']}s real time")
+    print(f"tasks: {report['tasks']}  (sale orders: {report['orders']})")
+    for trig in report["triggers"]:
+        print(f"trigger {trig['target']}: {trig['within_tolerance']}/{trig['fires']} within tolerance, "
+              f"max |skew| {trig['max_abs_skew_ms']}ms, mean {trig['mean_abs_skew_ms']}ms")
+    for name, stage in report["stages_abs_latency_ms"].items():
+        print(f"  stage {name:<10} |latency| p50 {stage.get('p50')}ms  p95 {stage.get('p95')}ms  "
+              f"max {stage.get('max')}ms  missed {stage['missed_deadline']}  failed {stage['failed']}")
+    if report["sale_to_first_click_ms"]:
+        clicks = report["sale_to_first_click_ms"]
+        print(f"sale -> first click: p50 {clicks['p50']}ms  p95 {clicks['p95']}ms  max {clicks['max']}ms")
+    print("monitor intervals: " + ", ".join(
+        f"{m['at']} {m['interval_s']}s ({m['watches']} watched)" for m in report["monitor_intervals"]))
+    jobs = report["jobs"]
+    print(f"jobs: {jobs['jobs_run']} run, peak {jobs['peak_concurrent_jobs']} at {jobs['peak_jobs_at']}; "
+          f"page jobs peak {jobs['peak_concurrent_page_jobs']} at {jobs['peak_page_jobs_at']}, "
+          f"{jobs['overlapping_page_job_pairs']} overlapping pairs; missed {len(jobs['missed'])}, "
+          f"errors {len(jobs['errors'])}")
+    res = report["resources"]
+    slots = res["grab_slots"]
+    print(f"peaks: {res['peak_pages']} pages, {res['peak_purchases']} purchases, "
+          f"grab slots {slots['peak_running']}/{slots['capacity']} running, {slots['peak_waiting']} waiting")
+    print(f"event loop lag (real ms): {res['loop_lag_ms']}  rss: {res['rss_mb']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--day", default=Config.FESTIVAL_START_DATE, help="sale day (YYYY-MM-DD)")
+    parser.add_argument("--start", default="09:58", help="festival time the replay starts at")
+    parser.add_argument("--until", default="23:00", help="festival time the replay stops at")
+    parser.add_argument("--speed", type=float, default=120, help="festival seconds per real second")
+    parser.add_argument("--tasks", type=int, default=12, help="tasks in the 10:00 sale")
+    parser.add_argument("--shared", type=float, default=0.25, help="chance a sale task shares a screening")
+    parser.add_argument("--watches", type=int, default=6, help="watched screenings that get returns")
+    parser.add_argument("--modes", nargs="+", default=["browser", "hybrid", "api"],
+                        choices=["browser", "hybrid", "api"])
+    parser.add_argument("--grab-slots", type=int, default=Config.GRAB_SLOTS, help="0 = auto")
+    parser.add_argument("--success-rate", type=float, default=0.8)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+    report = asyncio.run(replay(args))
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
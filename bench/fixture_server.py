@@ -0,0 +1,94 @@
+"""Local server for the offline Eventim page fixtures.
+
+Serves ``bench/fixtures/*.html`` plus synthetic sub-resources under
+``/asset/<name>?kb=<size>&ms=<latency>``, so pages carry realistic image,
+font and script weight without any network access.
+
+Run standalone to click through the fixtures by hand::
+
+    python -m bench.fixture_server --port 8765
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+ASSET_TYPES = {
+    ".jpg": "image/jpeg",
+    ".png": "image/png",
+    ".woff2": "font/woff2",
+    ".js": "application/javascript",
+    ".css": "text/css",
+}
+
+logger = logging.getLogger(__name__)
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=str(FIXTURES_DIR), **kwargs)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path.startswith("/asset/"):
+            self._send_asset(parsed.path, parse_qs(parsed.query))
+        else:
+            super().do_GET()
+
+    def _send_asset(self, path: str, query: dict) -> None:
+        size = int(float(query.get("kb", ["10"])[0]) * 1024)
+        latency_ms = float(query.get("ms", ["0"])[0])
+        if latency_ms:
+            time.sleep(latency_ms / 1000)
+        content_type = ASSET_TYPES.get(Path(path).suffix, "application/octet-stream")
+        if content_type.endswith("javascript"):
+            body = (b"/* vendor bundle */\n" + b" " * size)[:max(size, 1)]
+        else:
+            body = b"\0" * size
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def end_headers(self):
+        if not self.path.startswith("/asset/"):
+            self.send_header("Cache-Control", "no-store")
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def start_server(host: str = "127.0.0.1", port: int = 0) -> tuple[ThreadingHTTPServer, str]:
+    """Start the fixture server in a daemon thread; returns (server, base URL)."""
+    server = ThreadingHTTPServer((host, port), FixtureHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server, base_url = start_server(args.host, args.port)
+    print(f"Serving fixtures at {base_url}/event.html (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
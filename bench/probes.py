@@ -0,0 +1,116 @@
+"""Process probes for the benchmarks: event-loop lag and memory.
+
+``LoopLagProbe`` wakes up every ``interval`` seconds and records how late
+it was; lag is what every other coroutine on the loop waited for as well.
+``rss_mb()`` reads the current resident set size (Linux /proc, falling
+back to the peak from ``getrusage`` elsewhere).
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def stats(values: list[float]) -> dict | None:
+    """p50/p95/max summary of a sample, None if it is empty."""
+    if not values:
+        return None
+    return {"p50": round(percentile(values, 50), 2), "p95": round(percentile(values, 95), 2),
+            "max": round(max(values), 2), "n": len(values)}
+
+
+def peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def rss_mb() -> float | None:
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+    except (OSError, ValueError, AttributeError):
+        return peak_rss_mb()
+
+
+class LoopLagProbe:
+    """Samples event-loop lag and RSS in the background.
+
+    ``mark(label)`` tags the samples that follow (e.g. "T-0"), so the
+    report can show lag around the sale separately from the idle baseline.
+    """
+
+    def __init__(self, interval: float = 0.01, rss_every: int = 10) -> None:
+        self.interval = interval
+        self.rss_every = rss_every
+        self.samples: list[tuple[float, str, float]] = []  # (perf_counter, label, lag ms)
+        self.rss: list[tuple[float, float]] = []  # (perf_counter, MB)
+        self._label = "idle"
+        self._task: asyncio.Task | None = None
+
+    def mark(self, label: str) -> None:
+        self._label = label
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        n = 0
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            self.samples.append((now, self._label, max(0.0, (now - expected) * 1000)))
+            if n % self.rss_every == 0:
+                mb = rss_mb()
+                if mb is not None:
+                    self.rss.append((now, mb))
+            n += 1
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def summary(self) -> dict:
+        by_label: dict[str, list[float]] = {}
+        for _, label, lag in self.samples:
+            by_label.setdefault(label, []).append(lag)
+        lags = [lag for _, _, lag in self.samples]
+        rss = [mb for _, mb in self.rss]
+        return {
+            "loop_lag_ms": {
+                label: {
+                    "p50": round(percentile(v, 50), 2),
+                    "p99": round(percentile(v, 99), 2),
+                    "max": round(max(v), 2),
+                    "n": len(v),
+                }
+                for label, v in by_label.items()
+            },
+            "loop_lag_max_ms": round(max(lags), 2) if lags else None,
+            "rss_mb": {"start": rss[0], "peak": max(rss), "end": rss[-1]} if rss else None,
+            "peak_rss_mb": peak_rss_mb(),
+        }
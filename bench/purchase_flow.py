@@ -0,0 +1,234 @@
+"""Purchase-flow latency benchmark against the offline Eventim fixtures.
+
+Drives the real ``TicketGrabber.grab_ticket`` (headless Chromium) from
+navigation to the checkout page for every fixture variant, N runs each,
+and reports p50/p95 per step and for the whole navigate-to-cart time::
+
+    python -m bench.purchase_flow --runs 20
+    python -m bench.purchase_flow --variants consent delayed --filter
+    python -m bench.purchase_flow --screenshot-policy ring --json out.json
+
+Steps are timed by wrapping the grabber's step methods, so the numbers
+include everything the live flow does (probes, human-like clicks, waits).
+Selector learning uses a throwaway stats file; ``data/`` is never touched.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from app.grabber import TicketGrabber
+from app.models import GrabTask
+from app.request_filter import request_filter
+from app.screenshots import screenshots
+from app.selector_stats import SelectorStats
+import app.grabber as grabber_module
+
+from bench.fixture_server import start_server
+from bench.probes import percentile
+
+# name -> fixture path and query
+VARIANTS = {
+    "stepper": "/event.html",
+    "consent": "/event.html?consent=1",
+    "no-stepper": "/landing.html",
+    "intermediate": "/event.html?intermediate=1",
+    "delayed": "/event.html?delay=800",
+    "waitingroom": "/waitingroom.html?release=1500",
+}
+
+# TicketGrabber methods timed as flow steps (method -> label)
+TIMED_STEPS = {
+    "_dismiss_cookie_banner": "consent",
+    "_set_ticket_quantity": "quantity",
+    "_click_buy_button": "buy",
+    "_click_ticket_link": "ticket_link",
+    "_handle_intermediate_steps": "intermediate",
+    "_wait_in_queue": "waiting_room",
+    "_probe": "probe",
+}
+
+logger = logging.getLogger("bench")
+
+
+class BenchBrowser:
+    """Minimal stand-in for BrowserManager: a fresh headless context."""
+
+    def __init__(self, headless: bool = True):
+        self.headless = headless
+        self._playwright = None
+        self._browser = None
+        self._context = None
+
+    async def start(self) -> None:
+        from playwright.async_api import async_playwright
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=self.headless)
+        self._context = await self._browser.new_context(
+            viewport={"width": 1280, "height": 900}, locale="de-DE",
+        )
+        if request_filter.enabled:
+            self._context.on("response", request_filter.learn)
+
+    async def new_page(self, filtered: bool = False):
+        page = await self._context.new_page()
+        if filtered:
+            await request_filter.attach(page)
+        return page
+
+    async def acquire_page(self, owner: str = ""):
+        return await self.new_page(filtered=True)
+
+    def mark_checkout(self, page) -> None:
+        pass
+
+    def mark_queued(self, page, queued: bool = True) -> None:
+        pass
+
+    async def release_page(self, page) -> None:
+        if not page.is_closed():
+            await page.close()
+
+    async def close(self) -> None:
+        if self._context:
+            await self._context.close()
+        if self._browser:
+            await self._browser.close()
+        if self._playwright:
+            await self._playwright.stop()
+
+
+def instrument(grabber: TicketGrabber) -> dict[str, float]:
+    """Wrap the grabber's step methods; returns the dict each call adds to."""
+    timings: dict[str, float] = {}
+
+    def timed(label_for, fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                label = label_for(args, kwargs)
+                timings[label] = timings.get(label, 0.0) + (time.perf_counter() - start) * 1000
+        return wrapper
+
+    for name, label in TIMED_STEPS.items():
+        setattr(grabber, name, timed(lambda a, k, label=label: label, getattr(grabber, name)))
+    # Readiness waits are reported per wait step ("wait:page_load", ...)
+    grabber._wait_ready = timed(
+        lambda a, k: "wait:" + (a[2] if len(a) > 2 else k.get("step", "?")), grabber._wait_ready,
+    )
+    return timings
+
+
+async def run_once(grabber: TicketGrabber, timings: dict[str, float], url: str, tickets: int) -> dict:
+    timings.clear()
+    task = GrabTask(ext_id_screening="bench", eventim_url=url, ticket_count=tickets)
+
+    start = time.perf_counter()
+    result = await grabber.grab_ticket(task)
+    total = (time.perf_counter() - start) * 1000
+
+    # grab_ticket keeps the page open on success for the user to pay
+    reached_cart = False
+    for page in list(grabber.browser._context.pages):
+        reached_cart = reached_cart or "checkout" in page.url
+        await page.close()
+    return {"success": result["success"] and reached_cart, "total": total, "steps": dict(timings)}
+
+
+def summarize(runs: list[dict]) -> dict:
+    ok = [r for r in runs if r["success"]]
+    per_step: dict[str, list[float]] = defaultdict(list)
+    for r in ok:
+        for label, ms in r["steps"].items():
+            per_step[label].append(ms)
+    totals = [r["total"] for r in ok]
+    summary = {
+        "runs": len(runs),
+        "succeeded": len(ok),
+        "steps": {
+            label: {"p50": round(percentile(v, 50), 1), "p95": round(percentile(v, 95), 1), "n": len(v)}
+            for label, v in sorted(per_step.items())
+        },
+    }
+    if totals:
+        summary["total"] = {"p50": round(percentile(totals, 50), 1), "p95": round(percentile(totals, 95), 1)}
+    return summary
+
+
+def print_summary(name: str, summary: dict) -> None:
+    total = summary.get("total")
+    print(f"\n{name}: {summary['succeeded']}/{summary['runs']} reached checkout", end="")
+    print(f"  total p50 {total['p50']}ms  p95 {total['p95']}ms" if total else "")
+    for label, stats in summary["steps"].items():
+        print(f"  {label:<24} p50 {stats['p50']:>8.1f}ms  p95 {stats['p95']:>8.1f}ms  (n={stats['n']})")
+
+
+async def main_async(args) -> dict:
+    screenshots.policy = args.screenshot_policy
+    request_filter.enabled = args.filter
+
+    # Keep learned selectors out of the real data/ directory
+    stats_dir = tempfile.TemporaryDirectory()
+    grabber_module.selector_stats = SelectorStats(str(Path(stats_dir.name) / "selector_stats.json"))
+
+    server, base_url = start_server()
+    browser = BenchBrowser(headless=not args.headed)
+    await browser.start()
+    results = {}
+    try:
+        for name in args.variants:
+            grabber = TicketGrabber(browser)
+            timings = instrument(grabber)
+            runs = []
+            for i in range(args.runs):
+                runs.append(await run_once(grabber, timings, base_url + VARIANTS[name], args.tickets))
+                logger.debug("%s run %d: %.1fms", name, i + 1, runs[-1]["total"])
+            results[name] = summarize(runs)
+            print_summary(name, results[name])
+        await screenshots.drain()
+    finally:
+        await browser.close()
+        server.shutdown()
+        stats_dir.cleanup()
+
+    if args.filter:
+        print(f"\nrequest filter: {request_filter.status()}")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="runs per variant")
+    parser.add_argument("--variants", nargs="+", choices=list(VARIANTS), default=list(VARIANTS))
+    parser.add_argument("--tickets", type=int, default=2)
+    parser.add_argument("--filter", action="store_true", help="enable request filtering on grab pages")
+    parser.add_argument("--screenshot-policy", default="off", choices=["off", "on-failure", "async", "ring"])
+    parser.add_argument("--headed", action="store_true", help="show the browser")
+    parser.add_argument("--json", help="also write the summary to this file")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.WARNING,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+    results = asyncio.run(main_async(args))
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    if not all(r["succeeded"] == r["runs"] for r in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
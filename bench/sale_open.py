@@ -0,0 +1,530 @@
+"""Sale-open load test: the whole app under the T-0 burst.
+
+Starts the real app in-process (uvicorn, scheduler, monitor, grabbers,
+the /ws/status feed) against local stand-ins for the Berlinale ticket JS
+and Eventim, creates N tasks with the same sale time through the REST
+API, attaches M WebSocket clients and flips every screening to available
+at T-0::
+
+    python -m bench.sale_open --mode api --tasks 50 --clients 20
+    xvfb-run python -m bench.sale_open --mode hybrid --tasks 8 --clients 5
+    python -m bench.sale_open --mode api --tasks 200 --clients 50 --json open.json
+
+Per task it reports trigger skew, detection latency (T-0 until the app
+saw the tickets open), first-click latency (T-0 until the first purchase
+click; in API mode until the cart POST reaches the stand-in), storage
+write time and broadcast latency (``ws_manager.broadcast`` call until a
+client received the message). Event-loop lag and RSS are sampled
+throughout and split before / around / after T-0.
+
+Browser and hybrid tasks drive the real, headed Chromium over
+``bench/fixtures``, so they need a display. Tasks, selector stats, the
+browser profile and screenshots go to a temporary directory; nothing in
+``data/`` is read or written.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import socket
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+from zoneinfo import ZoneInfo
+
+from app.config import Config
+
+from bench.fixture_server import FixtureHandler
+from bench.probes import LoopLagProbe, stats
+
+logger = logging.getLogger("bench")
+
+TZ = ZoneInfo(Config.TIMEZONE)
+FINAL_STATUSES = ("success", "failed", "cancelled")
+BURST_WINDOW = 5.0  # seconds after T-0 reported as the "sale" phase of loop lag
+
+
+class SaleState:
+    """What the stand-ins serve, and what reached them, shared across handler threads."""
+
+    def __init__(self, page_kb: int) -> None:
+        self.page_kb = page_kb
+        self.urls: dict[str, str] = {}  # ext id -> ticket URL in the ticket JS
+        self.open = False
+        self.opened_at: float | None = None  # perf_counter of the flip
+        self.carts: dict[str, float] = {}  # ext id -> perf_counter of its first cart POST
+        self.ticket_js_hits = 0
+        self._lock = threading.Lock()
+
+    def flip(self) -> None:
+        self.opened_at = time.perf_counter()
+        self.open = True
+
+    def ticket_js(self) -> bytes:
+        state = "available" if self.open else "pending"
+        tickets = {
+            ext_id: {"extIdScreening": ext_id, "state": state, "text": state, "url": url}
+            for ext_id, url in self.urls.items()
+        }
+        with self._lock:
+            self.ticket_js_hits += 1
+        return json.dumps({"success": "true", "environment": "bench", "tickets": tickets}).encode()
+
+    def event_page(self, ext_id: str) -> bytes:
+        """Eventim event page for API mode; the cart form only appears once the sale is open."""
+        filler = "<p>" + "Programm und Saalplan. " * 40 + "</p>\n"
+        padding = filler * max(1, self.page_kb * 1024 // len(filler) // 2)
+        form = (
+            '<form id="buy" action="/cart/add" method="post">\n'
+            '  <input type="hidden" name="_csrf" value="bench-token">\n'
+            f'  <input type="hidden" name="eventId" value="{ext_id}">\n'
+            '  <button type="submit">In den Warenkorb</button>\n'
+            "</form>\n"
+        ) if self.open else "<p>Noch nicht im Verkauf</p>\n"
+        return (
+            '<!doctype html><html><head><meta name="csrf-token" content="bench-token"></head><body>\n'
+            f"{padding}{form}{padding}</body></html>\n"
+        ).encode()
+
+    def add_to_cart(self, ext_id: str) -> bool:
+        if not self.open:
+            return False
+        with self._lock:
+            self.carts.setdefault(ext_id, time.perf_counter())
+        return True
+
+
+class SaleHandler(FixtureHandler):
+    """Fixture server plus the ticket JS, API event pages and cart endpoint."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real sites
+    sale: SaleState
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == Config.TICKET_STATUS_URL:
+            self._send(200, self.sale.ticket_js(), "application/javascript")
+        elif path.startswith("/api-event/"):
+            self._send(200, self.sale.event_page(path.rsplit("/", 1)[1]), "text/html; charset=utf-8")
+        else:
+            super().do_GET()
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode()
+        if urlparse(self.path).path != "/cart/add":
+            self._send(404, b"{}", "application/json")
+            return
+        ext_id = parse_qs(body).get("eventId", [""])[0]
+        added = self.sale.add_to_cart(ext_id)
+        self._send(200 if added else 409, json.dumps({"added": added}).encode(), "application/json")
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_standin(sale: SaleState) -> tuple:
+    """Start a stand-in site in a daemon thread; returns (server, base URL)."""
+    handler = type("BoundSaleHandler", (SaleHandler,), {"sale": sale})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _flip_at(sale: SaleState, sale_ts: float) -> None:
+    """Open the sale at ``sale_ts`` from its own thread, independent of the app's loop."""
+    time.sleep(max(0.0, sale_ts - time.time() - 0.005))
+    while time.time() < sale_ts:
+        pass
+    sale.flip()
+
+
+class StatusClients:
+    """M clients on /ws/status, on their own thread and event loop.
+
+    Each keeps (perf_counter, raw text) for every message it receives, so
+    receipts can be matched with the broadcasts that sent them.
+    """
+
+    def __init__(self, url: str, count: int) -> None:
+        self.url = url
+        self.count = count
+        self.received: list[list[tuple[float, str]]] = [[] for _ in range(count)]
+        self.errors: list[str] = []
+        self._connected = threading.Event()
+        self._stop = threading.Event()
+        self._ready = 0
+        self._thread: threading.Thread | None = None
+
+    def start(self, timeout: float = 15.0) -> None:
+        if self.count == 0:
+            return
+        self._thread = threading.Thread(target=asyncio.run, args=(self._run(),), daemon=True)
+        self._thread.start()
+        if not self._connected.wait(timeout):
+            raise RuntimeError(f"only {self._ready}/{self.count} WebSocket clients connected: {self.errors}")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    async def _run(self) -> None:
+        await asyncio.gather(*(self._client(i) for i in range(self.count)))
+
+    async def _client(self, index: int) -> None:
+        import websockets
+
+        try:
+            async with websockets.connect(self.url, max_size=None) as ws:
+                self._ready += 1
+                if self._ready == self.count:
+                    self._connected.set()
+                inbox = self.received[index]
+                while not self._stop.is_set():
+                    try:
+                        raw = await asyncio.wait_for(ws.recv(), 0.2)
+                    except asyncio.TimeoutError:
+                        continue
+                    inbox.append((time.perf_counter(), raw))
+        except Exception as e:
+            self.errors.append(repr(e))
+
+
+class Probes:
+    """Instruments the running app's singletons; every wrapper only records timestamps."""
+
+    def __init__(self) -> None:
+        self.broadcasts: dict[str, list[float]] = {}  # message text -> perf_counter of each send
+        self.writes: dict[str, list[float]] = {}  # task id -> storage write durations (ms)
+        self.detections: dict[str, float] = {}  # task id -> perf_counter the app saw tickets open
+        self.clicks: dict[str, float] = {}  # task id -> perf_counter of the first purchase click
+
+    def install(self, main_module) -> None:
+        from app.api_grabber import api_grabber
+        from app.grabber import _first_click, ticket_grabber
+
+        ws_manager, storage = main_module.ws_manager, main_module.storage
+
+        broadcast = ws_manager.broadcast
+
+        @functools.wraps(broadcast)
+        async def timed_broadcast(message: dict):
+            # ConnectionManager.broadcast sends exactly this text
+            key = json.dumps(message, ensure_ascii=False)
+            self.broadcasts.setdefault(key, []).append(time.perf_counter())
+            await broadcast(message)
+
+        ws_manager.broadcast = timed_broadcast
+
+        def timed_write(fn, task_id_of):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    ms = (time.perf_counter() - start) * 1000
+                    self.writes.setdefault(task_id_of(args, kwargs), []).append(ms)
+            return wrapper
+
+        storage.add_task = timed_write(storage.add_task, lambda a, k: (a[0] if a else k["task"]).id)
+        storage.update_task = timed_write(storage.update_task, lambda a, k: a[0] if a else k["task_id"])
+
+        # API mode: poll_and_grab calls grab_ticket the moment the ticket JS says available
+        grab_ticket = api_grabber.grab_ticket
+
+        @functools.wraps(grab_ticket)
+        async def detected_grab(task, *args, **kwargs):
+            self.detections.setdefault(task.id, time.perf_counter())
+            return await grab_ticket(task, *args, **kwargs)
+
+        api_grabber.grab_ticket = detected_grab
+
+        # Hybrid mode: the detection stage reports when polling saw the tickets open
+        wait_for_availability = api_grabber.wait_for_availability
+
+        @functools.wraps(wait_for_availability)
+        async def detected_wait(task, *args, **kwargs):
+            detection = await wait_for_availability(task, *args, **kwargs)
+            if detection is not None:
+                self.detections.setdefault(task.id, detection["detected_at"])
+            return detection
+
+        api_grabber.wait_for_availability = detected_wait
+
+        # Browser and hybrid: the grabber marks its first click in the _first_click context
+        # (grab_detected sets one itself; fired browser grabs get one here)
+        def clicked(fn, task_of):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                mark = _first_click.get()
+                token = None
+                if mark is None:
+                    mark = {}
+                    token = _first_click.set(mark)
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    if token is not None:
+                        _first_click.reset(token)
+                    if "at" in mark:
+                        self.clicks.setdefault(task_of(args, kwargs).id, mark["at"])
+            return wrapper
+
+        ticket_grabber.grab_with_refresh = clicked(
+            ticket_grabber.grab_with_refresh, lambda a, k: a[1] if len(a) > 1 else k["task"],
+        )
+        ticket_grabber.grab_ticket = clicked(ticket_grabber.grab_ticket, lambda a, k: a[0] if a else k["task"])
+
+    def deliveries(self, clients: StatusClients) -> dict[str, list[float]]:
+        """Broadcast latency (ms) per task id ("-" for messages about no single task).
+
+        A client gets the broadcasts in send order, so its k-th receipt of a
+        given text is the k-th broadcast of that text.
+        """
+        latencies: dict[str, list[float]] = {}
+        for inbox in clients.received:
+            seen: dict[str, int] = {}
+            for received_at, raw in inbox:
+                sends = self.broadcasts.get(raw)
+                k = seen.get(raw, 0)
+                seen[raw] = k + 1
+                if not sends or k >= len(sends):
+                    continue  # a direct reply (pong, ticket status), not a broadcast
+                data = json.loads(raw).get("data")
+                task_id = data.get("task_id", "-") if isinstance(data, dict) else "-"
+                latencies.setdefault(task_id, []).append((received_at - sends[k]) * 1000)
+        return latencies
+
+
+def configure(data_dir: Path, berlinale_url: str, eventim_url: str, args) -> None:
+    """Point the app at the stand-ins and a throwaway data directory.
+
+    Runs before the first import of an app module: TaskStorage, the
+    selector stats and the screenshot store read their paths at import.
+    """
+    Config.BERLINALE_BASE_URL = berlinale_url
+    Config.EVENTIM_BASE_URL = eventim_url
+    Config.SERVER_CLOCK_HOSTS = [berlinale_url, eventim_url]
+    Config.TIME_SYNC_ENABLED = False  # the stand-ins share our clock
+    Config.TASKS_FILE = str(data_dir / "tasks.json")
+    Config.SELECTOR_STATS_FILE = str(data_dir / "selector_stats.json")
+    Config.BROWSER_PROFILE_DIR = str(data_dir / "browser_profile")
+    Config.SCREENSHOT_DIR = str(data_dir)
+    if args.grab_slots is not None:
+        Config.GRAB_SLOTS = args.grab_slots
+
+
+async def run(args) -> dict:
+    data_dir = tempfile.TemporaryDirectory()
+    sale = SaleState(args.page_kb)
+    berlinale, berlinale_url = start_standin(sale)
+    eventim, eventim_url = start_standin(sale)
+    configure(Path(data_dir.name), berlinale_url, eventim_url, args)
+
+    import httpx
+    import uvicorn
+
+    import app.main as main_module
+    from app.trigger import precise_trigger
+
+    probes = Probes()
+    probes.install(main_module)
+    storage = main_module.storage
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(main_module.app, host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    lag = LoopLagProbe()
+    lag.start()
+    clients = StatusClients(f"ws://127.0.0.1:{port}/ws/status", args.clients)
+    flipper = None
+    task_ids: list[str] = []
+    try:
+        while not server.started:
+            if serving.done():
+                serving.result()  # startup failed: raise its error
+            await asyncio.sleep(0.05)
+        await asyncio.to_thread(clients.start)
+
+        sale_dt = (datetime.now(TZ) + timedelta(seconds=args.lead)).replace(microsecond=0)
+        sale_ts = sale_dt.timestamp()
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=30) as api:
+            for i in range(args.tasks):
+                ext_id = f"BENCH{i:04d}"
+                url = f"{eventim_url}/api-event/{ext_id}" if args.mode == "api" else f"{eventim_url}/event.html?e={ext_id}"
+                sale.urls[ext_id] = url
+                resp = await api.post("/api/tasks", json={
+                    "film_title": f"Sale-open bench {i + 1}",
+                    "ext_id_screening": ext_id,
+                    "sale_time": sale_dt.isoformat(),
+                    "eventim_url": url,
+                    "mode": args.mode,
+                    "ticket_count": args.tickets,
+                })
+                resp.raise_for_status()
+                task_ids.append(resp.json()["task"]["id"])
+        logger.warning(
+            "%d %s tasks and %d clients ready, sale opens at %s (in %.0fs)",
+            args.tasks, args.mode, args.clients, sale_dt.strftime("%H:%M:%S"), sale_ts - time.time(),
+        )
+
+        flipper = threading.Thread(target=_flip_at, args=(sale, sale_ts), daemon=True)
+        flipper.start()
+        loop = asyncio.get_running_loop()
+        lag.mark("before")
+        loop.call_later(max(0.0, sale_ts - time.time()), lag.mark, "sale")
+        loop.call_later(max(0.0, sale_ts - time.time()) + BURST_WINDOW, lag.mark, "after")
+
+        deadline = sale_ts + args.timeout
+        while time.time() < deadline:
+            tasks = [storage.get_task(task_id) for task_id in task_ids]
+            if sale.open and all(t is None or t.status in FINAL_STATUSES for t in tasks):
+                break
+            await asyncio.sleep(0.25)
+        await asyncio.sleep(0.5)  # let the last broadcasts arrive
+    finally:
+        await asyncio.to_thread(clients.stop)
+        await lag.stop()
+        server.should_exit = True
+        try:
+            await asyncio.wait_for(serving, 60)
+        except Exception:
+            logger.exception("App shutdown failed")
+        berlinale.shutdown()
+        eventim.shutdown()
+
+    final_tasks = {task_id: storage.get_task(task_id) for task_id in task_ids}
+    ext_to_task = {task.ext_id_screening: task_id for task_id, task in final_tasks.items() if task}
+    clicks = dict(probes.clicks)
+    for ext_id, at in sale.carts.items():
+        if ext_id in ext_to_task:
+            clicks.setdefault(ext_to_task[ext_id], at)
+    deliveries = probes.deliveries(clients)
+    data_dir.cleanup()
+
+    def since_open(at: float | None) -> float | None:
+        if at is None or sale.opened_at is None:
+            return None
+        return round((at - sale.opened_at) * 1000, 2)
+
+    rows = []
+    for task_id, task in final_tasks.items():
+        records = precise_trigger.get_records(task_id)
+        writes = probes.writes.get(task_id, [])
+        delivered = deliveries.get(task_id, [])
+        rows.append({
+            "task_id": task_id,
+            "status": task.status if task else "deleted",
+            "trigger_skew_ms": records[-1].skew_ms if records else None,
+            "detect_ms": since_open(probes.detections.get(task_id)),
+            "first_click_ms": since_open(clicks.get(task_id)),
+            "storage_writes": len(writes),
+            "storage_ms": round(sum(writes), 2),
+            "storage_max_ms": round(max(writes), 2) if writes else None,
+            "broadcast_p50_ms": stats(delivered)["p50"] if delivered else None,
+            "broadcast_max_ms": round(max(delivered), 2) if delivered else None,
+        })
+
+    def column(name: str) -> list[float]:
+        return [row[name] for row in rows if row[name] is not None]
+
+    by_status: dict[str, int] = {}
+    for row in rows:
+        by_status[row["status"]] = by_status.get(row["status"], 0) + 1
+    return {
+        "mode": args.mode,
+        "tasks": by_status,
+        "clients": args.clients,
+        "client_errors": clients.errors,
+        "tasks_detail": rows,
+        "trigger_abs_skew_ms": stats([abs(v) for v in column("trigger_skew_ms")]),
+        "detect_ms": stats(column("detect_ms")),
+        "first_click_ms": stats(column("first_click_ms")),
+        "storage_write_ms": stats([ms for writes in probes.writes.values() for ms in writes]),
+        "broadcast_ms": stats([ms for latencies in deliveries.values() for ms in latencies]),
+        "broadcasts": sum(len(sends) for sends in probes.broadcasts.values()),
+        "ticket_js_polls": sale.ticket_js_hits,
+        "cart_posts": len(sale.carts),
+        "resources": lag.summary(),
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"\n{'task':<10}{'status':<11}{'skew':>9}{'detect':>10}{'click':>10}"
+          f"{'writes':>8}{'store ms':>10}{'bcast p50':>11}{'bcast max':>11}")
+
+    def cell(value, width: int) -> str:
+        return f"{'-' if value is None else value:>{width}}"
+
+    for row in report["tasks_detail"]:
+        print(f"{row['task_id']:<10}{row['status']:<11}{cell(row['trigger_skew_ms'], 9)}"
+              f"{cell(row['detect_ms'], 10)}{cell(row['first_click_ms'], 10)}{cell(row['storage_writes'], 8)}"
+              f"{cell(row['storage_ms'], 10)}{cell(row['broadcast_p50_ms'], 11)}{cell(row['broadcast_max_ms'], 11)}")
+
+    print(f"\n{report['mode']} mode: tasks {report['tasks']}, {report['clients']} WebSocket clients"
+          + (f" ({len(report['client_errors'])} errors)" if report["client_errors"] else ""))
+    for label, key in (
+        ("|trigger skew|", "trigger_abs_skew_ms"),
+        ("T-0 -> detection", "detect_ms"),
+        ("T-0 -> first click", "first_click_ms"),
+        ("storage write", "storage_write_ms"),
+        ("broadcast -> client", "broadcast_ms"),
+    ):
+        s = report[key]
+        print(f"  {label:<20} " + (f"p50 {s['p50']}ms  p95 {s['p95']}ms  max {s['max']}ms  (n={s['n']})" if s else "-"))
+    print(f"{report['broadcasts']} broadcasts, {report['ticket_js_polls']} ticket JS polls, "
+          f"{report['cart_posts']} cart POSTs")
+    res = report["resources"]
+    print(f"event loop lag (ms): {res['loop_lag_ms']}")
+    print(f"rss (MB): {res['rss_mb']}  peak {res['peak_rss_mb']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=20, help="tasks sharing the sale time")
+    parser.add_argument("--clients", type=int, default=5, help="WebSocket clients on /ws/status")
+    parser.add_argument("--mode", default=Config.GRAB_MODE, choices=["browser", "hybrid", "api"])
+    parser.add_argument("--lead", type=float, default=Config.PRE_SALE_WARMUP + 15,
+                        help="seconds from startup to the sale, enough for the pre-sale timeline")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds after T-0 to wait for final statuses")
+    parser.add_argument("--tickets", type=int, default=1)
+    parser.add_argument("--page-kb", type=int, default=60, help="size of the API-mode event page")
+    parser.add_argument("--grab-slots", type=int, default=None, help="override GRAB_SLOTS (0 = auto)")
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if report["tasks"].get("success", 0) != sum(report["tasks"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,14 @@ let currentTab = "today-on-sale";
 let programmeCache = {};  // day -> {data, timestamp}
 const CACHE_TTL = 60000;  // 60 seconds
 let tasks = [];
+let timelines = {};  // task_id -> pre-sale timeline stages
+let grabSlots = { capacity: 0, running: [], waiting: {} };  // waiting: task_id -> place in line
 let ticketStatus = {};  // ext_id_screening -> {state, url, text}
 let searchQuery = "";
 let debounceTimer = null;
 let config = { 
     ticket_count: 2,
+    grab_mode: "browser",
     festival_start_date: "2026-02-12",
     festival_end_date: "2026-02-22"
 };  // Default fallback, loaded from backend
@@ -67,6 +70,8 @@ function connectWebSocket() {
 function handleWSMessage(msg) {
     if (msg.type === "task_update") {
         const data = msg.data;
+        const prev = tasks.find(t => t.id === data.task_id);
+        const prevStatus = prev ? prev.status : null;
         // Update local task list
         if (data.task) {
             const idx = tasks.findIndex(t => t.id === data.task_id);
@@ -87,7 +92,15 @@ function handleWSMessage(msg) {
             showToast(`Ticket grabbed: ${data.message}`, "success");
         } else if (data.status === "failed") {
             showToast(`Grab failed: ${data.message}`, "error");
+        } else if (data.status === "queued" && prevStatus !== "queued") {
+            showToast("In the Eventim waiting room - holding position, not reloading", "info");
         }
+    } else if (msg.type === "timeline") {
+        timelines[msg.data.task_id] = msg.data.stages || [];
+        renderTasks();
+    } else if (msg.type === "grab_slots") {
+        grabSlots = msg.data || grabSlots;
+        renderTasks();
     } else if (msg.type === "monitor_alert") {
         showToast(`Ticket available! ${msg.data.film_title} - auto-grabbing...`, "success");
     } else if (msg.type === "ticket_status") {
@@ -150,6 +163,8 @@ async function loadTasks() {
         const resp = await fetch("/api/tasks");
         const data = await resp.json();
         tasks = data.tasks || [];
+        timelines = data.timelines || {};
+        grabSlots = data.slots || grabSlots;
         renderTasks();
     } catch (e) {
         console.error("Failed to load tasks:", e);
@@ -166,7 +181,7 @@ async function createTask(filmData, eventData) {
             screening_time: eventData.date_display || eventData.time_text || "",
             sale_time: eventData.sale_time_str || "",
             eventim_url: eventData.ticket_url || "",
-            mode: "browser",
+            mode: config.grab_mode || "browser",
             ticket_count: config.ticket_count,
         };
         const resp = await fetch("/api/tasks", {
@@ -197,6 +212,24 @@ async function deleteTask(taskId) {
     }
 }
 
+async function setTaskPriority(taskId, priority) {
+    try {
+        const resp = await fetch(`/api/tasks/${taskId}/priority`, {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ priority }),
+        });
+        const data = await resp.json();
+        if (data.task) {
+            const idx = tasks.findIndex(t => t.id === taskId);
+            if (idx >= 0) tasks[idx] = data.task;
+            renderTasks();
+        }
+    } catch (e) {
+        console.error("Failed to set priority:", e);
+    }
+}
+
 async function runTaskNow(taskId) {
     try {
         await fetch(`/api/tasks/${taskId}/run`, { method: "POST" });
@@ -624,12 +657,19 @@ function renderTasks() {
         const statusLabels = {
             pending: "Waiting",
             grabbing: "Grabbing...",
+            queued: "In queue...",
             watching: "Watching...",
             success: "Success!",
             failed: "Failed",
             cancelled: "Cancelled",
         };
         const statusLabel = statusLabels[task.status] || task.status;
+        const priority = task.priority || 0;
+        const slotPlace = grabSlots.waiting[task.id];
+        const slotInfo = slotPlace
+            ? `<div class="task-detail task-slot">Waiting for a grab slot: #${slotPlace} in line (${grabSlots.capacity} running at once)</div>`
+            : "";
+        const canReprioritize = ["pending", "grabbing", "watching"].includes(task.status);
 
         html += `<div class="task-card">
             <div class="task-info">
@@ -638,13 +678,20 @@ function renderTasks() {
                     ${escHtml(task.venue || "")} &middot; ${escHtml(task.screening_time || "")}
                     ${task.sale_time ? ` &middot; Sale: ${escHtml(formatDateTime(task.sale_time))}` : ""}
                 </div>
+                ${slotInfo}
                 ${task.result_message ? `<div class="task-detail" style="color:${task.status === 'success' ? 'var(--green)' : task.status === 'failed' ? 'var(--red)' : 'var(--text-secondary)'}">${escHtml(truncateError(task.result_message))}</div>` : ""}
+                ${renderTimeline(timelines[task.id])}
             </div>
             <div class="task-status">
                 <span class="status-dot ${task.status}"></span>
                 ${statusLabel}
             </div>
             <div class="task-actions">
+                ${canReprioritize ? `<span class="task-priority" title="Higher priority grabs first when grab slots are scarce">
+                    <button class="btn btn-outline btn-xs" onclick="setTaskPriority('${task.id}', ${priority - 1})">&minus;</button>
+                    P${priority}
+                    <button class="btn btn-outline btn-xs" onclick="setTaskPriority('${task.id}', ${priority + 1})">+</button>
+                </span>` : ""}
                 ${task.status === "pending" ? `<button class="btn btn-outline btn-xs" onclick="runTaskNow('${task.id}')">Run Now</button>` : ""}
                 ${["pending", "failed", "watching"].includes(task.status) ? `<button class="btn btn-danger btn-xs" onclick="deleteTask('${task.id}')">Cancel</button>` : ""}
                 ${["success", "cancelled"].includes(task.status) ? `<button class="btn btn-outline btn-xs" onclick="deleteTask('${task.id}')">Dismiss</button>` : ""}
@@ -654,6 +701,26 @@ function renderTasks() {
     container.innerHTML = html;
 }
 
+function renderTimeline(stages) {
+    if (!stages || !stages.length) return "";
+    const stageLabels = { warmup: "Warmup", open_page: "Open page", fire: "Fire", detect: "Detect" };
+    const pills = stages.map(stage => {
+        const offset = stage.offset_s ? `T${stage.offset_s}s` : "T-0";
+        let timing = "";
+        if (stage.latency_ms !== null && stage.latency_ms !== undefined) {
+            const latency = stage.name === "fire" ? `${stage.latency_ms >= 0 ? "+" : ""}${stage.latency_ms.toFixed(1)}ms` : `+${Math.round(stage.latency_ms)}ms`;
+            timing += ` &middot; ${latency}`;
+        }
+        if (stage.duration_ms !== null && stage.duration_ms !== undefined) {
+            timing += ` &middot; ${(stage.duration_ms / 1000).toFixed(1)}s`;
+        }
+        const missed = stage.met_deadline === false ? " missed" : "";
+        const title = `${stage.status}${stage.message ? ": " + stage.message : ""} (due ${formatDateTime(stage.planned_at)}, deadline ${formatDateTime(stage.deadline)})`;
+        return `<span class="timeline-stage ${escAttr(stage.status)}${missed}" title="${escAttr(title)}">${offset} ${stageLabels[stage.name] || escHtml(stage.name)}${timing}</span>`;
+    });
+    return `<div class="task-timeline">${pills.join("")}</div>`;
+}
+
 // === Actions ===
 function scheduleGrab(filmData, eventData) {
     if (typeof filmData === "string") filmData = JSON.parse(filmData);